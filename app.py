@@ -1,117 +1,190 @@
 """
 NIVA - Voice-Based Government Scheme Assistant
 Gradio UI with bilingual support (Telugu + English)
+
+Handlers are async: STT, the agent and TTS await network I/O instead of
+blocking a worker thread, so one process can serve many voice sessions.
+Concurrency is bounded by NIVA_CONCURRENCY_LIMIT and NIVA_QUEUE_SIZE.
+
+Models load in the background as soon as the app starts (src/startup.py);
+requests that arrive earlier wait for them.
 """
+import asyncio
 import gradio as gr
 import os
 import sys
+import uuid
 import numpy as np
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.groq_stt import GroqWhisperSTT
-from src.tts import EdgeTTS
-from src.langgraph_agent import AgentWorkflow
+from src.groq_client import PRIORITY_VOICE, PRIORITY_CHAT
+from src.tracing import get_tracer, serve_metrics
+from src.profiling import get_profiler, requested
+from src.memory import watch as watch_memory
+from src.serving import serve, supported as serving_supported
+from src.startup import get_startup
+
+# STT, TTS and the agent (langchain, chromadb, scipy) are imported when the models load
+startup = get_startup()
+startup.mark("imports")
 
 # Global instances
 stt_model = None
 tts_model = None
 agent = None
-chat_history = []  # Store chat messages for display
+
+# Speculation: transcribe the first seconds of longer recordings separately and
+# start the likely tool calls while the full transcription is still running
+SPECULATION = os.getenv("NIVA_SPECULATION", "0").lower() in ("1", "true", "yes")
+SPECULATION_PREFIX_SECONDS = float(os.getenv("NIVA_SPECULATION_PREFIX_SECONDS", "3"))
 
 def initialize_models():
     """Initialize all AI models."""
     global stt_model, tts_model, agent
     
     if stt_model is None:
+        from src.groq_stt import GroqWhisperSTT
         print("Loading Groq Whisper STT...")
         stt_model = GroqWhisperSTT(use_local_fallback=True)
         print("✅ STT loaded!")
     
     if tts_model is None:
+        from src.tts import EdgeTTS
         print("Loading Edge TTS...")
         tts_model = EdgeTTS()
         print("✅ Edge TTS loaded!")
     
     if agent is None:
+        from src.langgraph_agent import AgentWorkflow
         print("Initializing LangGraph Agent with ChromaDB...")
         agent = AgentWorkflow()
         print("✅ LangGraph Agent initialized!")
     
+    # Per-component memory on /metrics; shrinks caches/sessions/models over NIVA_MEMORY_BUDGET_MB
+    watch_memory(stt=stt_model, agent=agent)
+    startup.set_ready()
+    
     return "✅ All models loaded successfully!"
 
-def process_audio(audio_input, language_choice):
+def init_worker(index):
+    """Per-worker setup after the fork (NIVA_WORKERS > 1): models, metrics port."""
+    initialize_models()
+    serve_metrics(int(os.getenv("NIVA_METRICS_PORT", "9464")) + index)
+
+async def stream_response(user_text, lang_code, chat, session_id, priority=PRIORITY_CHAT):
+    """
+    Run one turn through the agent and stream it to the UI.
+    
+    Yields (chat messages, audio chunk) pairs: new messages are appended to
+    the chatbot's current value and the assistant message grows token by
+    token, while each completed sentence is handed to TTS as the LLM keeps
+    generating.
+    """
+    from src.tts import AsyncSentenceTTSStream
+    
+    # Process through agent - force language from user selection
+    agent.current_language = lang_code
+    chat.append({"role": "user", "content": user_text})
+    chat.append({"role": "assistant", "content": ""})
+    
+    # One trace for the turn: agent stages and every TTS sentence (joins the STT turn for voice).
+    # The audio directory goes when the generator resumes past its last yield (Gradio has
+    # copied that chunk by then) or is closed early.
+    with get_tracer().turn(), AsyncSentenceTTSStream(tts_model, language=lang_code) as speech:
+        agent_response = ""
+        async for event in agent.aprocess_stream(user_text, priority=priority, session_id=session_id):
+            if event["type"] == "token":
+                agent_response += event["content"]
+                speech.feed(event["content"])
+            elif event["type"] == "reset":
+                # A provider failed mid-answer: the "done" event brings the real one
+                agent_response = ""
+                speech.cancel()
+            elif not agent_response:
+                # Cached, templated and clarification answers arrive whole
+                agent_response = event["response"]
+                speech.feed(agent_response)
+            
+            chat[-1]["content"] = agent_response
+            chunks = speech.ready()
+            if not chunks:
+                yield chat, gr.update()
+            for path in chunks:
+                yield chat, path
+        
+        speech.close()
+        async for path in speech.drain():
+            yield chat, path
+
+async def transcribe(audio_data, sample_rate, lang_code, session_id):
+    """Transcribe a recording, speculating on a prefix transcript when enabled."""
+    full = asyncio.create_task(stt_model.atranscribe_numpy(audio_data, sample_rate=sample_rate, language=lang_code))
+    prefix_samples = int(SPECULATION_PREFIX_SECONDS * sample_rate)
+    if SPECULATION and len(audio_data) > 2 * prefix_samples:
+        prefix = asyncio.create_task(stt_model.atranscribe_numpy(audio_data[:prefix_samples], sample_rate=sample_rate,
+                                                                 language=lang_code, use_fallback=False))
+        await asyncio.wait([full, prefix], return_when=asyncio.FIRST_COMPLETED)
+        if prefix.done() and not full.done() and prefix.result().get("text"):
+            await asyncio.to_thread(agent.speculate, prefix.result()["text"], session_id)
+        elif not prefix.done():
+            prefix.cancel()
+    return await full
+
+def with_error(chat, error_msg):
+    """Chat messages plus an error shown as an assistant message."""
+    return (chat or []) + [{"role": "assistant", "content": error_msg}]
+
+async def process_audio(audio_input, language_choice, chat, session_id, request: gr.Request = None):
     """
     Process audio input through the full pipeline:
     1. STT (Speech to Text)
-    2. Agent (Process query)
-    3. TTS (Text to Speech)
+    2. Agent (Process query, streamed)
+    3. TTS (Text to Speech, sentence by sentence)
     """
-    global chat_history
+    chat = chat or []
     
-    try:
-        # Initialize if needed
-        if stt_model is None or agent is None or tts_model is None:
-            error_msg = "⚠️ Please click 'Initialize Models' first!"
-            error_history = format_chat_history(chat_history + [("assistant", error_msg, "en")])
-            return error_history, "", None
-        
-        if audio_input is None:
-            error_history = format_chat_history(chat_history)
-            return error_history, "", None
-        
-        # Get audio data
-        sample_rate, audio_data = audio_input
-        
-        # Convert to float32 and normalize
-        if audio_data.dtype != np.float32:
-            audio_data = audio_data.astype(np.float32) / 32768.0
-        
-        # Transcribe - pass actual sample_rate from Gradio
-        lang_code = "te" if language_choice == "Telugu (తెలుగు)" else "en"
-        transcription = stt_model.transcribe_numpy(audio_data, sample_rate=sample_rate, language=lang_code)
-        user_text = transcription["text"]
-        detected_lang = transcription.get("language", lang_code)
-        
-        if not user_text:
-            error_msg = "❌ Could not understand audio. Please try again."
-            error_history = format_chat_history(chat_history + [("assistant", error_msg, "en")])
-            return error_history, "", None
-        
-        # Process through agent - force language from user selection
-        agent.current_language = lang_code
-        result = agent.process(user_text)
-        agent_response = result["response"]
-        detected_lang = lang_code
-        
-        # Generate audio response
-        output_path = "temp_output.mp3"
+    with get_profiler().request(f"voice-{str(session_id)[:8]}", requested(request)), startup.request():
         try:
-            tts_model.synthesize(agent_response, output_path, language=detected_lang)
-        except Exception as tts_error:
-            print(f"TTS Error: {tts_error}")
-            output_path = None
-        
-        # Add to chat history
-        chat_history.append(("user", user_text, detected_lang))
-        chat_history.append(("assistant", agent_response, detected_lang))
-        
-        formatted_history = format_chat_history(chat_history)
-        return formatted_history, "", output_path
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        error_msg = f"❌ Error: {str(e)}"
-        chat_history.append(("assistant", error_msg, "en"))
-        formatted_history = format_chat_history(chat_history)
-        return formatted_history, "", None
+            # Models still loading at launch: wait for them
+            if not await startup.wait_ready():
+                yield with_error(chat, startup.status()), "", None
+                return
+            
+            if audio_input is None:
+                yield chat, "", None
+                return
+            
+            # Get audio data
+            sample_rate, audio_data = audio_input
+            
+            # Convert to float32 and normalize
+            if audio_data.dtype != np.float32:
+                audio_data = audio_data.astype(np.float32) / 32768.0
+            
+            with get_tracer().turn(source="voice"):
+                # Transcribe - pass actual sample_rate from Gradio
+                lang_code = "te" if language_choice == "Telugu (తెలుగు)" else "en"
+                transcription = await transcribe(audio_data, sample_rate, lang_code, session_id)
+                user_text = transcription["text"]
+                
+                if not user_text:
+                    yield with_error(chat, "❌ Could not understand audio. Please try again."), "", None
+                    return
+                
+                async for messages, audio_chunk in stream_response(user_text, lang_code, chat, session_id, PRIORITY_VOICE):
+                    yield messages, "", audio_chunk
+            
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield with_error(chat, f"❌ Error: {str(e)}"), "", None
 
-def process_text(text_input, language_choice):
+async def process_text(text_input, language_choice, chat, session_id, request: gr.Request = None):
     """Process text input (fallback option)."""
-    global chat_history
+    chat = chat or []
     
     print(f"\n{'='*50}")
     print(f"Processing text input: {text_input}")
@@ -120,78 +193,47 @@ def process_text(text_input, language_choice):
     print(f"TTS initialized: {tts_model is not None}")
     print(f"{'='*50}\n")
     
-    try:
-        if agent is None or tts_model is None:
-            error_msg = "⚠️ Please click 'START' button first to initialize models!"
-            print(f"ERROR: Models not initialized")
-            error_history = format_chat_history(chat_history + [("assistant", error_msg, "en")])
-            return error_history, "", None
-        
-        if not text_input or text_input.strip() == "":
-            formatted_history = format_chat_history(chat_history)
-            return formatted_history, text_input, None
-        
-        # Process through agent - force language from user selection
-        lang_code = "te" if language_choice == "Telugu (తెలుగు)" else "en"
-        print(f"Using language code: {lang_code}")
-        agent.current_language = lang_code
-        
-        print("Calling agent.process()...")
-        result = agent.process(text_input)
-        agent_response = result["response"]
-        detected_lang = lang_code
-        
-        print(f"Agent response: {agent_response[:100]}...")
-        
-        # Generate audio response
-        output_path = "temp_output_text.mp3"
+    with get_profiler().request(f"text-{str(session_id)[:8]}", requested(request)), startup.request():
         try:
-            print("Generating TTS audio...")
-            tts_model.synthesize(agent_response, output_path, language=detected_lang)
-            print("TTS audio generated successfully")
-        except Exception as tts_error:
-            print(f"TTS Error: {tts_error}")
-            output_path = None
-        
-        # Add to chat history
-        chat_history.append(("user", text_input, detected_lang))
-        chat_history.append(("assistant", agent_response, detected_lang))
-        
-        print(f"Chat history length: {len(chat_history)}")
-        
-        formatted_history = format_chat_history(chat_history)
-        print(f"Formatted history: {formatted_history}")
-        
-        return formatted_history, "", output_path
-        
-    except Exception as e:
-        import traceback
-        print(f"\n{'!'*50}")
-        print("EXCEPTION in process_text:")
-        traceback.print_exc()
-        print(f"{'!'*50}\n")
-        error_msg = f"❌ Error: {str(e)}"
-        chat_history.append(("assistant", error_msg, "en"))
-        formatted_history = format_chat_history(chat_history)
-        return formatted_history, "", None
+            if not await startup.wait_ready():
+                print(f"ERROR: Models not initialized")
+                yield with_error(chat, startup.status()), "", None
+                return
+            
+            if not text_input or text_input.strip() == "":
+                yield chat, text_input, None
+                return
+            
+            lang_code = "te" if language_choice == "Telugu (తెలుగు)" else "en"
+            print(f"Using language code: {lang_code}")
+            
+            print("Calling agent.aprocess_stream()...")
+            async for messages, audio_chunk in stream_response(text_input, lang_code, chat, session_id):
+                yield messages, "", audio_chunk
+            
+            print(f"Chat history length: {len(chat)}")
+            
+        except Exception as e:
+            import traceback
+            print(f"\n{'!'*50}")
+            print("EXCEPTION in process_text:")
+            traceback.print_exc()
+            print(f"{'!'*50}\n")
+            yield with_error(chat, f"❌ Error: {str(e)}"), "", None
 
-def clear_conversation():
+def clear_conversation(session_id):
     """Clear conversation history."""
-    global chat_history
-    chat_history = []
     if agent:
-        agent.clear_history()
+        agent.clear_history(session_id)
     return [], "", None, None
 
-def format_chat_history(history):
-    """Format chat history for display in chatbot (Gradio 6.2 dictionary format)."""
-    formatted = []
-    for role, message, lang in history:
-        formatted.append({
-            "role": role if role == "user" else "assistant",
-            "content": message
-        })
-    return formatted
+async def load_session(session_id):
+    """Give the browser a session id (kept in local storage) and restore its chat from the agent's checkpoint."""
+    if not session_id:
+        return uuid.uuid4().hex, []
+    if not await startup.wait_ready():
+        return session_id, []
+    return session_id, agent.history(session_id)
 
 # Create Gradio interface with modern, friendly design
 with gr.Blocks(
@@ -301,12 +343,14 @@ with gr.Blocks(
     with gr.Row():
         # Left: Chat Area (70%)
         with gr.Column(scale=7, elem_classes="main-content"):
-            # Initialization Section
+            # Status (models load in the background at launch) and language
             with gr.Row():
-                init_btn = gr.Button(
-                    "🚀 START - Click Here First!",
-                    variant="primary",
-                    size="lg",
+                init_status = gr.Textbox(
+                    value=startup.status,
+                    label="Status",
+                    show_label=True,
+                    container=True,
+                    interactive=False,
                     scale=3
                 )
                 language_select = gr.Dropdown(
@@ -315,14 +359,7 @@ with gr.Blocks(
                     label="🌐 Choose Language",
                     scale=2
                 )
-            
-            init_status = gr.Textbox(
-                label="Status",
-                show_label=True,
-                container=True,
-                interactive=False,
-                placeholder="Click START button to initialize models..."
-            )
+            status_timer = gr.Timer(1.0)
             
             gr.Markdown("---")
             
@@ -363,7 +400,9 @@ with gr.Blocks(
                 audio_output = gr.Audio(
                     label="Listen to response",
                     type="filepath",
-                    interactive=False
+                    interactive=False,
+                    streaming=True,
+                    autoplay=True
                 )
             
             # Action Buttons
@@ -375,11 +414,11 @@ with gr.Blocks(
             gr.Markdown("""
             ### 🎯 How to Use
             
-            **1.** Click **START** button ⬆️  
-            **2.** Wait for models to load  
-            **3.** Choose your language  
-            **4.** Type or speak your question  
-            **5.** Get instant AI response!
+            **1.** Choose your language  
+            **2.** Type or speak your question  
+            **3.** Get instant AI response!  
+            
+            (Right after launch, the first answer waits for the models to load.)
             """)
             
             gr.Markdown("---")
@@ -445,32 +484,42 @@ with gr.Blocks(
     </center>
     """)
     
+    # Stable per-browser session id, so history survives reloads (and restarts with a persistent backend)
+    session_state = gr.BrowserState(None, storage_key="niva_session")
+    demo.load(fn=load_session, inputs=session_state, outputs=[session_state, chatbot])
+    
     # Event handlers
-    init_btn.click(
-        fn=initialize_models,
-        outputs=init_status
+    def refresh_status():
+        """Show loading progress; stop polling once the models are loaded (or failed)."""
+        done = startup.ready or startup.error is not None
+        return startup.status(), gr.Timer(active=not done)
+    
+    status_timer.tick(
+        fn=refresh_status,
+        outputs=[init_status, status_timer]
     )
     
     send_btn.click(
         fn=process_text,
-        inputs=[text_input, language_select],
+        inputs=[text_input, language_select, chatbot, session_state],
         outputs=[chatbot, text_input, audio_output]
     )
     
     text_input.submit(
         fn=process_text,
-        inputs=[text_input, language_select],
+        inputs=[text_input, language_select, chatbot, session_state],
         outputs=[chatbot, text_input, audio_output]
     )
     
     voice_btn.click(
         fn=process_audio,
-        inputs=[audio_input, language_select],
+        inputs=[audio_input, language_select, chatbot, session_state],
         outputs=[chatbot, text_input, audio_output]
     )
     
     clear_btn.click(
         fn=clear_conversation,
+        inputs=session_state,
         outputs=[chatbot, text_input, audio_input, audio_output]
     )
 
@@ -480,8 +529,20 @@ if __name__ == "__main__":
     print("🚀 Starting NIVA - Government Scheme Assistant")
     print("="*60)
     print("\n📍 Local URL: http://localhost:7860")
-    print("🌐 Public URL: Will be generated...\n")
     
+    demo.queue(
+        default_concurrency_limit=int(os.getenv("NIVA_CONCURRENCY_LIMIT", "32")),
+        max_size=int(os.getenv("NIVA_QUEUE_SIZE", "256"))
+    )
+    workers = int(os.getenv("NIVA_WORKERS", "1"))
+    if workers > 1 and serving_supported():
+        # Preloaded models shared by forked workers behind a sticky front (src/serving.py)
+        serve(demo, workers, port=7860, init_worker=init_worker)
+        sys.exit(0)
+    
+    print("🌐 Public URL: Will be generated...\n")
+    serve_metrics()  # only with NIVA_TRACING=prometheus
+    startup.start(initialize_models)  # the UI is served while the models load
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -0,0 +1,217 @@
+"""
+Local stand-ins for NIVA's network backends, for offline benchmarks.
+
+    FakeGroqServer     - HTTP server speaking Groq's chat-completions (plain
+                         and SSE streaming) and audio-transcriptions API,
+                         with configurable latency
+    FakeCommunicate    - drop-in for edge_tts.Communicate with configurable
+                         latency (install_fake_tts)
+    KeywordVectorStore - only used when the real embedding model can't load
+    fixture_audio      - deterministic speech-like clips; the fake Whisper
+                         endpoint picks the fixture transcript by clip length
+
+Fixtures (queries, transcripts, the canned LLM answer) are in
+fixtures/queries.json.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "queries.json")
+
+
+def load_fixtures(path: str = FIXTURES_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixture_audio(seconds: float, sample_rate: int = 48000, seed: int = 0) -> np.ndarray:
+    """Speech-like float32 clip: noise under a syllable-rate envelope, at the browser's usual 48 kHz."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) * np.clip(np.sin(np.pi * t / seconds) * 4, 0, 1)
+    return (0.3 * envelope * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _wav_seconds(body: bytes, sample_rate: int = 16000) -> float:
+    """Length of the 16-bit mono WAV inside a multipart upload."""
+    data = body.find(b"data", body.find(b"RIFF"))
+    return int.from_bytes(body[data + 4:data + 8], "little") / (2 * sample_rate)
+
+
+class _GroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGroq/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        fake = self.server.fake
+        if self.path.endswith("/chat/completions"):
+            fake.count("chat")
+            self._chat(json.loads(body), fake)
+        elif self.path.endswith("/audio/transcriptions"):
+            fake.count("transcriptions")
+            self._transcribe(body, fake)
+        else:
+            self.send_error(404)
+
+    def _chat(self, request: dict, fake):
+        words = fake.answer.split(" ")[:request.get("max_tokens") or None]
+        usage = {"prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in request["messages"]),
+                 "completion_tokens": len(words)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+        time.sleep(fake.llm_latency)
+
+        if not request.get("stream"):
+            time.sleep(fake.token_latency * len(words))
+            self._send_json({**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(words):
+            time.sleep(fake.token_latency)
+            delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            self._chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+        last = {**base, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self._chunk(f"data: {json.dumps(last)}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _transcribe(self, body: bytes, fake):
+        seconds = _wav_seconds(body)
+        fixture = min(fake.audio, key=lambda a: abs(a["seconds"] - seconds))
+        time.sleep(fake.whisper_latency + fake.whisper_per_second * seconds)
+        self._send_json({"text": fixture["transcript"], "language": fixture["language"], "duration": seconds, "segments": []})
+
+
+class FakeGroqServer:
+    """Groq API stand-in on localhost; point GROQ_BASE_URL / GROQ_API_BASE at `url`."""
+
+    def __init__(self, fixtures: dict = None, llm_latency: float = 0.25, token_latency: float = 0.005,
+                 whisper_latency: float = 0.3, whisper_per_second: float = 0.02, port: int = 0):
+        fixtures = fixtures or load_fixtures()
+        self.answer = fixtures["answer"]
+        self.audio = fixtures["audio"]
+        self.llm_latency = llm_latency
+        self.token_latency = token_latency
+        self.whisper_latency = whisper_latency
+        self.whisper_per_second = whisper_per_second
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _GroqHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def use(self):
+        """Point the Groq SDK and ChatGroq at this server (before any client is created)."""
+        os.environ["GROQ_BASE_URL"] = self.url
+        os.environ["GROQ_API_BASE"] = self.url
+        os.environ.setdefault("GROQ_API_KEY", "gsk_offline_benchmark")
+        return self
+
+
+class FakeCommunicate:
+    """edge_tts.Communicate stand-in: sleeps like the service would, writes a dummy MP3."""
+
+    latency = 0.15
+    per_char = 0.001
+    calls = 0
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def save(self, path):
+        FakeCommunicate.calls += 1
+        await asyncio.sleep(self.latency + self.per_char * len(self.text))
+        with open(path, "wb") as f:
+            f.write(b"ID3" + bytes(1024))
+
+
+def install_fake_tts(latency: float = 0.15, per_char: float = 0.001):
+    import edge_tts
+    FakeCommunicate.latency = latency
+    FakeCommunicate.per_char = per_char
+    edge_tts.Communicate = FakeCommunicate
+
+
+class KeywordVectorStore:
+    """SchemeVectorStore stand-in: ranks schemes by word overlap with their names and descriptions."""
+
+    def __init__(self):
+        from src.catalogue import SCHEMES
+        self.schemes = SCHEMES
+
+    def search(self, query: str, language: str = "te", n_results: int = 3):
+        from src.results import SchemeMatch, SchemeListResult
+        words = set(query.lower().split())
+        scored = []
+        for s in self.schemes:
+            text = " ".join([s["name_en"], s["name_te"], s["description_en"], s["sector"]]).lower()
+            scored.append((len(words & set(text.split())) / (len(words) or 1), s["id"]))
+        scored.sort(reverse=True)
+        return SchemeListResult(kind="vector", language=language, query=query,
+                                matches=[SchemeMatch(sid, score) for score, sid in scored[:n_results]])
+
+    def search_many(self, queries: list, language: str = "te", n_results: int = 3) -> list:
+        return [self.search(query, language, n_results) for query in queries]
+
+
+def vector_store(allow_stand_in: bool = True):
+    """The real vector store, or KeywordVectorStore when its embedding model can't load."""
+    import src.vector_store as vs
+    try:
+        return vs.get_vector_store(), "chromadb"
+    except Exception as e:
+        if not allow_stand_in:
+            raise
+        print(f"⚠️ Real vector store unavailable ({type(e).__name__}: {e}); using keyword stand-in")
+        vs._vector_store = KeywordVectorStore()
+        return vs._vector_store, "keyword stand-in"
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark: LangGraph overhead per turn (node work excluded).
+
+Compares the old state handling (every node mutates and returns the whole
+state, the caller builds a fresh state with the full history each turn)
+with the current one (nodes return only changed keys, history is a
+bounded reducer channel, per-session state lives in a checkpointer).
+Both graphs have the agent's shape (planner -> executor -> synthesizer)
+and do no real work, so the numbers are pure graph overhead. On LangGraph
+1.2 the two are within run-to-run noise (~1.3 ms): it copies channel values
+either way, so partial updates do not reduce the overhead. Checkpointing
+once per turn costs less than checkpointing after every node.
+
+    python benchmarks/graph_overhead.py [--turns 500] [--repeats 5]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langgraph.graph import StateGraph, END
+
+from src.checkpointer import SessionCheckpoints, BoundedMemorySaver
+from src.langgraph_agent import AgentState, HISTORY_LIMIT
+
+
+class FullState(TypedDict):
+    user_input: str
+    language: str
+    conversation_history: list
+    intent: str
+    intents: list
+    intent_confidence: float
+    requires_info: bool
+    missing_info: list
+    extracted_params: dict
+    tool_calls: list
+    tool_results: list
+    final_response: str
+
+
+def _graph(state_type, planner, executor, synthesizer, checkpointer=None):
+    workflow = StateGraph(state_type)
+    workflow.add_node("planner", planner)
+    workflow.add_node("executor", executor)
+    workflow.add_node("synthesizer", synthesizer)
+    workflow.add_edge("planner", "executor")
+    workflow.add_edge("executor", "synthesizer")
+    workflow.add_edge("synthesizer", END)
+    workflow.set_entry_point("planner")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def full_state_graph():
+    def planner(state):
+        state["intent"], state["intents"], state["intent_confidence"] = "search", ["search"], 0.9
+        state["requires_info"], state["missing_info"] = False, []
+        state["extracted_params"] = {"scheme_name": "pmkisan"}
+        state["tool_calls"] = [{"intent": "search", "tool": "vector_search", "args": {"query": state["user_input"]}}]
+        return state
+
+    def executor(state):
+        state["tool_results"] = ["result"]
+        return state
+
+    def synthesizer(state):
+        state["final_response"] = "answer " * 40
+        return state
+
+    return _graph(FullState, planner, executor, synthesizer)
+
+
+def partial_state_graph(checkpointer):
+    def planner(state):
+        return {"intent": "search", "intents": ["search"], "intent_confidence": 0.9, "requires_info": False,
+                "missing_info": [], "extracted_params": {"scheme_name": "pmkisan"}, "user_context": {"scheme_name": "pmkisan"},
+                "tool_calls": [{"intent": "search", "tool": "vector_search", "args": {"query": state["user_input"]}}],
+                "tool_results": []}
+
+    def executor(state):
+        return {"tool_results": ["result"]}
+
+    def synthesizer(state):
+        response = "answer " * 40
+        return {"final_response": response, "tool_results": [],
+                "conversation_history": [{"role": "user", "content": state["user_input"]}, {"role": "assistant", "content": response}]}
+
+    return _graph(AgentState, planner, executor, synthesizer, checkpointer)
+
+
+def bench_full(turns: int) -> float:
+    graph = full_state_graph()
+    history = []
+    start = time.perf_counter()
+    for i in range(turns):
+        state = {"user_input": f"question {i}", "language": "en", "conversation_history": history,
+                 "intent": "", "intents": [], "intent_confidence": 0.0, "requires_info": False, "missing_info": [],
+                 "extracted_params": {}, "tool_calls": [], "tool_results": [], "final_response": ""}
+        final = graph.invoke(state)
+        history.extend([{"role": "user", "content": state["user_input"]}, {"role": "assistant", "content": final["final_response"]}])
+        history = history[-HISTORY_LIMIT:]
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def bench_partial(turns: int, checkpoints: SessionCheckpoints, durability: str = None) -> float:
+    graph = partial_state_graph(checkpoints.saver)
+    config = checkpoints.config("bench")
+    durability = durability or checkpoints.durability
+    start = time.perf_counter()
+    for i in range(turns):
+        graph.invoke({"user_input": f"question {i}", "language": "en", "priority": 1}, config, durability=durability)
+        checkpoints.compact("bench")
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def best_of(repeats: int, fn, *args) -> float:
+    return min(fn(*args) for _ in range(repeats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    bench_full(50)  # warm-up
+    n, r = args.turns, args.repeats
+    results = [
+        ("full state, no checkpointer (before)", best_of(r, bench_full, n)),
+        ("partial updates, no checkpointer", best_of(r, bench_partial, n, SessionCheckpoints(None))),
+        ("partial + checkpoint after every node", best_of(r, bench_partial, n, SessionCheckpoints(BoundedMemorySaver()), "sync")),
+        ("partial + checkpoint per turn (after)", best_of(r, bench_partial, n, SessionCheckpoints(BoundedMemorySaver()))),
+    ]
+    print(f"Graph overhead per turn (best of {r} x {n} turns):")
+    for name, micros in results:
+        print(f"  {name:40s} {micros:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
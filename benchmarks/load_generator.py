@@ -0,0 +1,317 @@
+"""
+Load generator: replays text and voice traffic against NIVA to find the
+load one process can take.
+
+Traffic is a JSONL file, one request per line (see fixtures/traffic.jsonl):
+
+    {"type": "text", "language": "en", "text": "What is PM Kisan?"}
+    {"type": "voice", "language": "te", "seconds": 3.0}     synthetic clip
+    {"type": "voice", "language": "te", "audio": "q.wav"}   recorded clip
+    optional: "session" (turns sharing a session), "at" (offset in seconds, for replay)
+
+Without --traffic, synthetic traffic is built from fixtures/queries.json.
+
+Targets:
+    inproc  - calls app.process_text / app.process_audio in this process,
+              with fake Groq and edge-tts (--backends real to use the real ones)
+    gradio  - a running app through gradio_client (--url); per-stage numbers
+              are scraped from its metrics endpoint if --metrics-url is given
+
+Arrivals:
+    closed  - N users, each sending its next request when the last finished
+    poisson - open loop, exponential inter-arrival times at R requests/s
+    replay  - the traffic's own "at" offsets (scaled by --speed)
+
+--sweep runs one step per concurrency (closed) or rate (poisson) and reports
+the highest step that met --slo (p95 seconds) with under --max-error-rate.
+
+    python benchmarks/load_generator.py --mode closed --sweep 1,4,16,32
+    python benchmarks/load_generator.py --mode poisson --sweep 2,5,10 --duration 30
+    python benchmarks/load_generator.py --target gradio --url http://localhost:7860 --mode closed --sweep 8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_backends import FakeGroqServer, fixture_audio, install_fake_tts, load_fixtures, vector_store
+from offline_suite import LANGUAGE_CHOICES, RESULTS_DIR, configure_env, consume, git_commit, summarize
+
+
+def load_traffic(path: str = None, voice_ratio: float = 0.5, seed: int = 0) -> list:
+    """Traffic records from a JSONL file, or synthetic ones from the fixtures."""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    fixtures = load_fixtures()
+    rng = random.Random(seed)
+    texts = [{"type": "text", **q} for q in fixtures["text"]]
+    voices = [{"type": "voice", "language": a["language"], "seconds": a["seconds"]} for a in fixtures["audio"]]
+    return [rng.choice(voices if rng.random() < voice_ratio else texts) for _ in range(200)]
+
+
+class _Clips:
+    """48 kHz clips for voice records, built once per record."""
+
+    def __init__(self):
+        self._clips = {}
+
+    def get(self, record: dict) -> tuple:
+        key = record.get("audio") or record["seconds"]
+        if key not in self._clips:
+            if record.get("audio"):
+                from scipy.io import wavfile
+                self._clips[key] = wavfile.read(record["audio"])
+            else:
+                clip = fixture_audio(record["seconds"], seed=int(record["seconds"] * 10))
+                self._clips[key] = (48000, (clip * 32767).astype(np.int16))
+        return self._clips[key]
+
+
+class InprocTarget:
+    """The app's handlers, called directly in this process."""
+
+    name = "inproc"
+
+    def __init__(self, backends: str = "fake", warm: bool = False):
+        self.clips = _Clips()
+        self.server = None
+        configure_env(argparse.Namespace(rate_limited=backends == "real", warm=warm))
+        if backends == "fake":
+            self.server = FakeGroqServer().start().use()
+            install_fake_tts()
+            vector_store()
+        import app
+        app.initialize_models()
+        self.app = app
+
+    async def send(self, record: dict, session_id: str) -> tuple:
+        start = time.perf_counter()
+        language = LANGUAGE_CHOICES[record.get("language", "te")]
+        if record["type"] == "voice":
+            return await consume(self.app.process_audio(self.clips.get(record), language, [], session_id), start)
+        return await consume(self.app.process_text(record["text"], language, [], session_id), start)
+
+    def stages(self, tracer) -> dict:
+        return tracer.percentiles()
+
+    def close(self):
+        if self.server:
+            self.server.stop()
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class GradioTarget:
+    """A running app, through gradio_client."""
+
+    name = "gradio"
+
+    def __init__(self, url: str, metrics_url: str = None):
+        from gradio_client import Client
+        self.client = Client(url, verbose=False)
+        self.metrics_url = metrics_url
+        self.clips = _Clips()
+        self._files = {}
+        self.audio_dir = tempfile.mkdtemp(prefix="niva_load_")
+
+    def _audio_file(self, record: dict) -> str:
+        if record.get("audio"):
+            return record["audio"]
+        key = record["seconds"]
+        if key not in self._files:
+            from scipy.io import wavfile
+            path = os.path.join(self.audio_dir, f"{key}.wav")
+            wavfile.write(path, *self.clips.get(record))
+            self._files[key] = path
+        return self._files[key]
+
+    def _send(self, record: dict, session_id: str) -> tuple:
+        from gradio_client import handle_file
+        start = time.perf_counter()
+        language = LANGUAGE_CHOICES[record.get("language", "te")]
+        if record["type"] == "voice":
+            job = self.client.submit(handle_file(self._audio_file(record)), language, [], session_id, api_name="/process_audio")
+        else:
+            job = self.client.submit(record["text"], language, [], session_id, api_name="/process_text")
+        first = None
+        for _, _, audio in job:
+            if first is None and audio:
+                first = time.perf_counter() - start
+        chat = job.result()[0]
+        ok = bool(chat) and not _message_text(chat[-1]).startswith(("❌", "⚠️"))
+        return ok, first
+
+    async def send(self, record: dict, session_id: str) -> tuple:
+        return await asyncio.to_thread(self._send, record, session_id)
+
+    def stages(self, tracer) -> dict:
+        if not self.metrics_url:
+            return {}
+        with urllib.request.urlopen(self.metrics_url.rstrip("/") + "/metrics/percentiles", timeout=5) as response:
+            return json.load(response)
+
+    def close(self):
+        pass
+
+
+def poisson_arrivals(rng: random.Random, rate: float, duration: float) -> list:
+    """Arrival offsets of a Poisson process with `rate` per second over `duration` seconds."""
+    arrivals, t = [], rng.expovariate(rate)
+    while t < duration:
+        arrivals.append(t)
+        t += rng.expovariate(rate)
+    return arrivals
+
+
+async def run_step(target, traffic: list, mode: str, load: float, duration: float, speed: float = 1.0, seed: int = 0) -> dict:
+    """One load step: `load` users (closed) or requests/s (poisson) for `duration` seconds, or one replay."""
+    from src import tracing
+    from src.tracing import Tracer, PrometheusExporter
+    tracer = Tracer([PrometheusExporter()])
+    tracing.set_tracer(tracer)
+
+    rng = random.Random(seed)
+    latencies, first_audio, errors, in_flight, peak = [], [], 0, 0, 0
+    counter = iter(range(10 ** 9))
+
+    async def one(record: dict, n: int):
+        nonlocal errors, in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        start = time.perf_counter()
+        try:
+            ok, first = await target.send(record, f"load-{record.get('session', n)}")
+        except Exception as e:
+            print(f"⚠️ Request {n} failed: {e}", file=sys.__stderr__)
+            ok, first = False, None
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+        if first is not None:
+            first_audio.append(first)
+        in_flight -= 1
+
+    start = time.perf_counter()
+    deadline = start + duration
+    if mode == "closed":
+        async def user():
+            while time.perf_counter() < deadline:
+                n = next(counter)
+                await one(traffic[n % len(traffic)], n)
+        await asyncio.gather(*(user() for _ in range(int(load))))
+    else:
+        tasks = []
+        if mode == "poisson":
+            arrivals = poisson_arrivals(rng, load, duration)
+        else:
+            arrivals = [record.get("at", 0.0) / speed for record in traffic]
+        for n, offset in enumerate(arrivals):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(traffic[n % len(traffic)], n)))
+        await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    completed = len(latencies)
+    result = {"mode": mode, "load": load, "completed": completed, "errors": errors,
+              "error_rate": round(errors / completed, 4) if completed else 0.0,
+              "throughput_rps": round(completed / wall, 2), "max_in_flight": peak}
+    if latencies:
+        result["latency_ms"] = summarize(latencies)
+    if first_audio:
+        result["first_audio_ms"] = summarize(first_audio)
+    stages = target.stages(tracer)
+    if stages:
+        result["stages_s"] = stages
+    tracing.set_tracer(Tracer())
+    return result
+
+
+def within_slo(step: dict, slo: float, max_error_rate: float) -> bool:
+    return ("latency_ms" in step and step["latency_ms"]["p95"] <= slo * 1000
+            and step["error_rate"] <= max_error_rate)
+
+
+async def run(target, traffic: list, args) -> list:
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=256))
+    steps = []
+    loads = [float(x) for x in args.sweep.split(",")] if args.mode != "replay" else [0.0]
+    for load in loads:
+        step = await run_step(target, traffic, args.mode, load, args.duration, args.speed, args.seed)
+        steps.append(step)
+        latency = step.get("latency_ms", {})
+        label = {"closed": f"users={load:g}", "poisson": f"rate={load:g}/s", "replay": f"speed={args.speed:g}x"}[args.mode]
+        print(f"{label:12s} done {step['completed']:5d}  {step['throughput_rps']:7.2f} req/s  "
+              f"p50 {latency.get('p50', 0):8.1f} ms  p95 {latency.get('p95', 0):8.1f} ms  p99 {latency.get('p99', 0):8.1f} ms  "
+              f"errors {step['error_rate']:6.1%}  in flight ≤{step['max_in_flight']}  "
+              f"{'✅' if within_slo(step, args.slo, args.max_error_rate) else '❌'}", file=sys.__stdout__, flush=True)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("inproc", "gradio"), default="inproc")
+    parser.add_argument("--url", default="http://localhost:7860", help="app URL for --target gradio")
+    parser.add_argument("--metrics-url", help="app metrics endpoint for --target gradio, e.g. http://localhost:9464")
+    parser.add_argument("--backends", choices=("fake", "real"), default="fake", help="for --target inproc")
+    parser.add_argument("--traffic", help="JSONL traffic file (default: synthetic from the fixtures)")
+    parser.add_argument("--voice-ratio", type=float, default=0.5, help="share of voice requests in synthetic traffic")
+    parser.add_argument("--mode", choices=("closed", "poisson", "replay"), default="closed")
+    parser.add_argument("--sweep", default="1,4,16", help="users (closed) or requests/s (poisson) per step")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per step")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up")
+    parser.add_argument("--slo", type=float, default=3.0, help="p95 latency target in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--warm", action="store_true", help="keep the response cache and single-flight on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="results path (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's per-request output")
+    args = parser.parse_args()
+
+    traffic = load_traffic(args.traffic, args.voice_ratio, args.seed)
+    if args.target == "gradio":
+        target = GradioTarget(args.url, args.metrics_url)
+    else:
+        target = InprocTarget(args.backends, args.warm)
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        steps = asyncio.run(run(target, traffic, args))
+    target.close()
+
+    passing = [s["load"] for s in steps if within_slo(s, args.slo, args.max_error_rate)]
+    if args.mode != "replay":
+        unit = "users" if args.mode == "closed" else "requests/s"
+        print(f"\nHighest load within p95 ≤ {args.slo:g}s and errors ≤ {args.max_error_rate:.0%}: "
+              + (f"{max(passing):g} {unit}" if passing else "none of the steps"))
+
+    path = args.save or os.path.join(RESULTS_DIR, time.strftime("load-%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "target": target.name,
+            "mode": args.mode, "duration_s": args.duration, "traffic": args.traffic or "synthetic",
+            "slo_p95_s": args.slo, "max_error_rate": args.max_error_rate}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "steps": steps}, f, indent=2, ensure_ascii=False)
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
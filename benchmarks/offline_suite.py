@@ -0,0 +1,265 @@
+"""
+Offline benchmark suite: each stage and the full pipelines, no network.
+
+Runs against local stand-ins (fake_backends.py): a fake Groq HTTP server
+with configurable latency, a fake edge-tts, and text/audio fixtures. For
+each scenario and concurrency level it measures throughput and latency
+percentiles; pipeline scenarios also report time to first audio and
+per-stage percentiles from the tracing layer. Results are saved as JSON
+and can be compared against a saved baseline.
+
+    stt    - GroqWhisperSTT.atranscribe_numpy on fixture audio
+    agent  - AgentWorkflow.aprocess on fixture text
+    tts    - EdgeTTS.asynthesize of one answer sentence
+    text   - app.process_text, the text pipeline (agent + TTS)
+    audio  - app.process_audio, the voice pipeline (STT + agent + TTS)
+
+    python benchmarks/offline_suite.py [--levels 1,4,16] [--requests 48]
+        [--scenarios stt,agent,tts,text,audio] [--save PATH]
+        [--compare benchmarks/results/baseline.json] [--tolerance 0.2]
+
+The response cache and single-flight coalescing are off unless --warm, so
+every request reaches the (fake) backends. Groq rate limits are lifted
+unless --rate-limited.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_backends import FakeGroqServer, fixture_audio, install_fake_tts, load_fixtures, vector_store
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SCENARIOS = ("stt", "agent", "tts", "text", "audio")
+LANGUAGE_CHOICES = {"te": "Telugu (తెలుగు)", "en": "English"}
+
+
+def configure_env(args):
+    """Environment for the run; must be set before any client, scheduler or agent exists."""
+    if not args.rate_limited:
+        for name in ("NIVA_GROQ_LLM_RPM", "NIVA_GROQ_LLM_TPM", "NIVA_GROQ_WHISPER_RPM"):
+            os.environ[name] = "1000000000"
+    if not args.warm:
+        os.environ["NIVA_RESPONSE_CACHE_SIZE"] = "0"
+        os.environ["NIVA_SINGLE_FLIGHT"] = "0"
+    os.environ["NIVA_LLM_PROVIDERS"] = "groq"
+    os.environ["NIVA_TRACING"] = ""
+
+
+def summarize(latencies: list) -> dict:
+    ms = np.array(latencies) * 1000
+    return {"mean": round(float(ms.mean()), 2), "p50": round(float(np.percentile(ms, 50)), 2),
+            "p95": round(float(np.percentile(ms, 95)), 2), "p99": round(float(np.percentile(ms, 99)), 2),
+            "max": round(float(ms.max()), 2)}
+
+
+async def run_level(request, level: int, total: int) -> dict:
+    """`total` requests from `level` concurrent workers; request(i) returns (ok, seconds to first audio or None)."""
+    from src import tracing
+    from src.tracing import Tracer, PrometheusExporter
+    tracer = Tracer([PrometheusExporter()])
+    tracing.set_tracer(tracer)
+
+    latencies, first_audio, errors = [], [], 0
+    pending = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            start = time.perf_counter()
+            try:
+                ok, first = await request(i)
+            except Exception as e:
+                print(f"⚠️ Request {i} failed: {e}", file=sys.__stderr__)
+                ok, first = False, None
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+            if first is not None:
+                first_audio.append(first)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(level)))
+    wall = time.perf_counter() - start
+
+    result = {"requests": total, "concurrency": level, "errors": errors,
+              "throughput_rps": round(total / wall, 2), "latency_ms": summarize(latencies)}
+    if first_audio:
+        result["first_audio_ms"] = summarize(first_audio)
+    stages = tracer.percentiles()
+    if stages:
+        result["stages_s"] = stages
+    tracing.set_tracer(Tracer())
+    return result
+
+
+async def consume(handler, start: float) -> tuple:
+    """Drain one app handler; (answered without an error message, seconds to first audio or None)."""
+    first, chat = None, None
+    async for chat, _, audio_chunk in handler:
+        if first is None and isinstance(audio_chunk, str):
+            first = time.perf_counter() - start
+    ok = bool(chat) and not chat[-1]["content"].startswith(("❌", "⚠️"))
+    return ok, first
+
+
+def make_requests(fixtures: dict) -> dict:
+    """Scenario name -> async request(i) callable, on the app's models."""
+    import app
+    from src.tts import split_sentences
+
+    texts = fixtures["text"]
+    clips = [(a, fixture_audio(a["seconds"], seed=i)) for i, a in enumerate(fixtures["audio"])]
+    sentences, tail = split_sentences(fixtures["answer"] + " ")
+    sentences = sentences + ([tail.strip()] if tail.strip() else [])
+    tts_dir = os.path.join(RESULTS_DIR, "tts")
+    os.makedirs(tts_dir, exist_ok=True)
+
+    async def stt(i):
+        audio, clip = clips[i % len(clips)]
+        result = await app.stt_model.atranscribe_numpy(clip, sample_rate=48000, language=audio["language"])
+        return result.get("text") == audio["transcript"], None
+
+    async def agent(i):
+        query = texts[i % len(texts)]
+        result = await app.agent.aprocess(query["text"], session_id=f"bench-agent-{i}")
+        return bool(result["response"]), None
+
+    async def tts(i):
+        path = os.path.join(tts_dir, f"{i}.mp3")
+        return await app.tts_model.asynthesize(sentences[i % len(sentences)], path, "en") is not None, None
+
+    async def text(i):
+        query = texts[i % len(texts)]
+        start = time.perf_counter()
+        return await consume(app.process_text(query["text"], LANGUAGE_CHOICES[query["language"]], [], f"bench-text-{i}"), start)
+
+    async def audio(i):
+        fixture, clip = clips[i % len(clips)]
+        start = time.perf_counter()
+        recording = (48000, (clip * 32767).astype(np.int16))
+        return await consume(app.process_audio(recording, LANGUAGE_CHOICES[fixture["language"]], [], f"bench-audio-{i}"), start)
+
+    return {"stt": stt, "agent": agent, "tts": tts, "text": text, "audio": audio}
+
+
+async def run_suite(requests: dict, scenarios: list, levels: list, per_level: int) -> dict:
+    results = {}
+    for scenario in scenarios:
+        results[scenario] = {}
+        for level in levels:
+            result = await run_level(requests[scenario], level, max(per_level, 2 * level))
+            results[scenario][str(level)] = result
+            latency = result["latency_ms"]
+            first = result.get("first_audio_ms", {}).get("p50")
+            print(f"{scenario:6s} c={level:<3d} {result['throughput_rps']:8.2f} req/s  p50 {latency['p50']:8.1f} ms  "
+                  f"p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms"
+                  + (f"  first audio p50 {first:8.1f} ms" if first is not None else "")
+                  + (f"  errors {result['errors']}" if result["errors"] else ""), file=sys.__stdout__, flush=True)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> bool:
+    """Print changes against a saved run; returns False on a regression beyond `tolerance`."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    ok = True
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for scenario, levels in results.items():
+        for level, current in levels.items():
+            before = baseline.get(scenario, {}).get(level)
+            if before is None:
+                continue
+            p95 = current["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1
+            rps = current["throughput_rps"] / before["throughput_rps"] - 1
+            regressed = p95 > tolerance or rps < -tolerance
+            ok &= not regressed
+            print(f"  {scenario:6s} c={level:>3s}  p95 {p95:+7.1%}  throughput {rps:+7.1%}  {'❌ REGRESSION' if regressed else '✅'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,4,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=48, help="requests per level (at least 2 per worker)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="fake Groq time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="fake Groq time per token (s)")
+    parser.add_argument("--whisper-latency", type=float, default=0.3, help="fake Whisper time per request (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="fake edge-tts time per sentence (s)")
+    parser.add_argument("--warm", action="store_true", help="keep the response cache and single-flight on")
+    parser.add_argument("--rate-limited", action="store_true", help="keep the configured Groq rate limits")
+    parser.add_argument("--save", help="results path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="keep the app's per-request output")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    configure_env(args)
+    fixtures = load_fixtures()
+    server = FakeGroqServer(fixtures, llm_latency=args.llm_latency, token_latency=args.token_latency,
+                            whisper_latency=args.whisper_latency).start().use()
+    install_fake_tts(latency=args.tts_latency)
+    _, store_kind = vector_store()
+
+    import app
+    app.initialize_models()
+    requests = make_requests(fixtures)
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        # One event loop for the whole run, so keep-alive connections carry over between levels
+        results = asyncio.run(run_suite(requests, scenarios, levels, args.requests))
+    server.stop()
+
+    from src.tracing import collector_report
+    speculation = collector_report("speculation")
+    if speculation and speculation["speculated"]:
+        print(f"speculation: {speculation['hits']} hits, {speculation['misses']} misses "
+              f"(hit rate {speculation['hit_rate']:.0%})")
+    flights = collector_report("single_flight") or {}
+    for name, stats in flights.items():
+        if stats["coalesced"]:
+            print(f"single-flight {name}: {stats['executions']} leaders, {stats['coalesced']} coalesced")
+
+    meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "python": platform.python_version(),
+            "platform": platform.platform(), "vector_store": store_kind, "warm": args.warm,
+            "fake_latency_s": {"llm_first_token": args.llm_latency, "per_token": args.token_latency,
+                               "whisper": args.whisper_latency, "tts": args.tts_latency},
+            "backend_requests": server.requests, "speculation": speculation,
+            "single_flight": flights}
+    path = args.save or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"\nSaved {path}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
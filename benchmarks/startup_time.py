@@ -0,0 +1,72 @@
+"""
+Cold-start benchmark: time to ready and first-request latency, no network.
+
+Each run is a fresh interpreter (fake Groq server and edge-tts from
+fake_backends.py) that imports the app, starts loading the models in the
+background exactly as `python app.py` does, and sends one text request as
+soon as the UI could accept it. Reported per run, in seconds since
+process start:
+
+    imports        app module imported (the UI can be built and served)
+    ready          models loaded
+    first_request  first answer finished; its latency (waiting for the
+                   models included) is first_request_latency
+
+    python benchmarks/startup_time.py [--runs 3] [--query "..."]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+PHASES = ("imports", "ready", "first_request", "first_request_latency")
+
+
+def run_once(query: str) -> dict:
+    from fake_backends import FakeGroqServer, install_fake_tts, load_fixtures, vector_store
+    from offline_suite import LANGUAGE_CHOICES, configure_env, consume
+
+    configure_env(argparse.Namespace(rate_limited=False, warm=False))
+    server = FakeGroqServer(load_fixtures()).start().use()
+    install_fake_tts()
+    vector_store()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        app.startup.start(app.initialize_models)
+        ok, _ = asyncio.run(consume(app.process_text(query, LANGUAGE_CHOICES["en"], [], "startup-bench"), 0.0))
+    server.stop()
+    return {"ok": ok, **app.startup.report()["phases"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NIVA cold start: time to ready and first-request latency")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--query", default="Tell me about PM Kisan")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args.query)))
+        return
+
+    runs = []
+    for i in range(args.runs):
+        out = subprocess.run([sys.executable, __file__, "--child", "--query", args.query],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+        print(f"run {i + 1}: " + "  ".join(f"{p} {runs[-1][p]:.2f}s" for p in PHASES if p in runs[-1])
+              + ("" if runs[-1]["ok"] else "  (request failed)"))
+    print("median: " + "  ".join(f"{p} {statistics.median(r[p] for r in runs):.2f}s"
+                                 for p in PHASES if all(p in r for r in runs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,34 @@
 """
 Package initialization for NIVA agent modules.
+
+Exports are imported on first use (PEP 562), so `import src.api` or
+`import src.catalogue` doesn't pay for langchain, chromadb, edge-tts and
+scipy. `python -m src.startup` reports what importing a module costs.
 """
-from .groq_stt import GroqWhisperSTT, WhisperSTT
-from .tts import EdgeTTS
-from .langgraph_agent import AgentWorkflow
-from .tools import search_schemes, check_eligibility, get_all_schemes
-from .vector_store import get_vector_store
+import importlib
+
+_EXPORTS = {
+    'GroqWhisperSTT': '.groq_stt',
+    'WhisperSTT': '.groq_stt',
+    'EdgeTTS': '.tts',
+    'AgentWorkflow': '.langgraph_agent',
+    'search_schemes': '.tools',
+    'check_eligibility': '.tools',
+    'get_all_schemes': '.tools',
+    'get_vector_store': '.vector_store',
+    'render': '.renderer',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'GroqWhisperSTT',
-    'WhisperSTT',
-    'EdgeTTS',
-    'AgentWorkflow',
-    'search_schemes',
-    'check_eligibility',
-    'get_all_schemes',
-    'get_vector_store'
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,497 @@
+"""
+Headless HTTP API, without Gradio.
+
+A lean ASGI app (Starlette) on AgentWorkflow, GroqWhisperSTT and EdgeTTS
+for integrations such as the IVR and WhatsApp bots:
+
+    POST /v1/chat              {"message", "session_id"?, "stream"?}
+                               -> {"response", "language", "intent", "session_id"};
+                               with "stream": true, NDJSON token/done events
+                               (a "reset" before "done": discard the tokens)
+    POST /v1/voice             WAV body; ?language=te|en&session_id=...
+                               -> MP3 streamed sentence by sentence (transcript
+                               in X-NIVA-Transcript); ?format=ndjson streams
+                               transcript/token/audio (base64)/done events
+    GET  /v1/schemes/search    ?q=...&language=te&n=3
+    POST /v1/schemes/search    {"query"} or {"queries": [...]}, "language", "n"
+    WS   /v1/voice/stream      full-duplex call (src/duplex.py); ?language=te|en
+                               &codec=mulaw|pcm16&rate=8000|16000&session_id=...
+                               in: binary frames, or {"type": "audio", "seq", "data"
+                               (base64)} / {"type": "hangup"}; out: binary frames in
+                               the same codec and JSON events (speech_start,
+                               partial, transcript, token, reset, barge_in,
+                               turn_end, error); a malformed message gets an
+                               error event and the call goes on
+    GET  /healthz, /readyz
+
+Concurrent searches are micro-batched: one MiniLM forward pass and one
+Chroma query for up to NIVA_API_BATCH_SIZE queries arriving within
+NIVA_API_BATCH_MS. Chat/voice turns and searches each run at most
+NIVA_API_CONCURRENCY at a time with at most NIVA_API_QUEUE waiting (for up
+to NIVA_API_QUEUE_TIMEOUT seconds); beyond that the API answers 503 with
+Retry-After instead of queueing without bound. At most NIVA_API_CALLS
+duplex calls run at once; further ones are closed with code 1013.
+
+    python -m src.api [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import urllib.parse
+import uuid
+
+import numpy as np
+from scipy.io import wavfile
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+
+from .catalogue import SCHEMES_BY_ID
+from .groq_client import PRIORITY_CHAT, PRIORITY_VOICE
+from .profiling import get_profiler, requested
+from .startup import get_startup
+from .tracing import get_tracer
+
+LANGUAGES = ("te", "en")
+
+
+class Overloaded(Exception):
+    """Raised when a request can't be admitted; answered with 503."""
+
+
+class Admission:
+    """At most `limit` requests at a time and at most `queue` waiting for a slot."""
+
+    def __init__(self, limit: int = 32, queue: int = 64, timeout: float = 10.0):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.waiting >= self.queue:
+            self.rejected += 1
+            raise Overloaded(f"{self.waiting} requests already waiting")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"no slot within {self.timeout:g}s")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting, "rejected": self.rejected}
+
+
+class MicroBatcher:
+    """Runs concurrent submissions as one batch_fn(items) call in a worker thread."""
+
+    def __init__(self, batch_fn, max_size: int = 16, max_wait: float = 0.005):
+        self.batch_fn = batch_fn
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: list):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.to_thread(self.batch_fn, [item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0}
+
+
+def decode_wav(body: bytes) -> tuple:
+    """(sample_rate, float32 samples) from a PCM WAV upload."""
+    sample_rate, data = wavfile.read(io.BytesIO(body))
+    if data.dtype == np.uint8:
+        data = (data.astype(np.float32) - 128) / 128
+    elif data.dtype != np.float32:
+        data = data.astype(np.float32) / np.iinfo(data.dtype).max
+    return sample_rate, data
+
+
+async def _json_object(request):
+    """The request body as a JSON object, or None when it is malformed or not an object."""
+    try:
+        payload = await request.json()
+    except ValueError:  # JSONDecodeError, UnicodeDecodeError
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _call_event(message: dict) -> dict:
+    """A caller's WebSocket message as an event (audio decoded into "payload"); ValueError when malformed."""
+    if message.get("bytes") is not None:
+        return {"type": "audio", "payload": message["bytes"]}
+    event = json.loads(message.get("text") or "{}")
+    if not isinstance(event, dict):
+        raise ValueError("a text message must be a JSON object")
+    if event.get("type") == "audio":
+        if not isinstance(event.get("data"), str):
+            raise ValueError("an audio message needs base64 \"data\"")
+        event["payload"] = base64.b64decode(event["data"], validate=True)  # binascii.Error is a ValueError
+    return event
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode()
+
+
+class NivaAPI:
+    """Models, admission control and batching behind the HTTP routes."""
+
+    def __init__(self, agent=None, stt=None, tts=None, vector_store=None, concurrency: int = 32, queue: int = 64,
+                 queue_timeout: float = 10.0, batch_size: int = 16, batch_wait: float = 0.005, max_audio_bytes: int = 10 * 1024 * 1024,
+                 max_calls: int = 32, call_options: dict = None):
+        self.agent = agent
+        self.stt = stt
+        self.tts = tts
+        self.vector_store = vector_store
+        self.turns = Admission(concurrency, queue, queue_timeout)
+        self.searches = Admission(concurrency, queue, queue_timeout)
+        self.search_batcher = MicroBatcher(self._search_batch, batch_size, batch_wait)
+        self.max_audio_bytes = max_audio_bytes
+        self.calls = Admission(max_calls, 0)
+        self.call_options = call_options or {}
+        self.ready = False
+
+    def load(self):
+        """Build whichever models weren't passed in."""
+        if self.agent is None:
+            from .langgraph_agent import AgentWorkflow
+            self.agent = AgentWorkflow()
+        if self.vector_store is None:
+            self.vector_store = self.agent.vector_store
+        if self.tts is None:
+            from .tts import EdgeTTS
+            self.tts = EdgeTTS()
+        if self.stt is None:
+            from .groq_stt import GroqWhisperSTT
+            try:
+                self.stt = GroqWhisperSTT(use_local_fallback=True)
+            except ValueError as e:
+                print(f"⚠️ /v1/voice unavailable: {e}")
+        self.ready = True
+
+    def _search_batch(self, items: list) -> list:
+        """items: (query, language, n); one vector store call for the whole batch."""
+        n = max(n for _, _, n in items)
+        results = self.vector_store.search_many([query for query, _, _ in items], n_results=n)
+        return [dataclasses.replace(result, language=language, matches=result.matches[:k])
+                for result, (_, language, k) in zip(results, items)]
+
+    @staticmethod
+    def _scheme_json(result) -> dict:
+        suffix = "te" if result.language == "te" else "en"
+        matches = []
+        for match in result.matches:
+            scheme = SCHEMES_BY_ID.get(match.scheme_id, {})
+            matches.append({"id": match.scheme_id, "score": round(match.score, 4), "name": scheme.get(f"name_{suffix}"),
+                            "sector": scheme.get("sector"), "benefits": scheme.get(f"benefits_{suffix}")})
+        return {"query": result.query, "language": result.language, "results": matches}
+
+    async def search(self, request):
+        if request.method == "GET":
+            params = request.query_params
+            queries, language, n = [params.get("q", "")], params.get("language", "te"), params.get("n", "3")
+        else:
+            payload = await _json_object(request)
+            if payload is None:
+                return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+            queries = payload.get("queries") or [payload.get("query", "")]
+            language, n = payload.get("language", "te"), payload.get("n", 3)
+        n = int(n) if isinstance(n, int) or (isinstance(n, str) and n.isascii() and n.isdigit()) else 0
+        if not isinstance(queries, list) or not all(isinstance(q, str) and q.strip() for q in queries) \
+                or language not in LANGUAGES or not 1 <= n <= 10:
+            return JSONResponse({"error": "need non-empty queries (strings), language te|en and 1 <= n <= 10"},
+                                status_code=400)
+        queries = [q.strip() for q in queries]
+
+        async with self.searches.slot():
+            results = await asyncio.gather(*(self.search_batcher.submit((q, language, n)) for q in queries))
+        if request.method == "POST" and "queries" in payload:
+            return JSONResponse({"results": [self._scheme_json(r) for r in results]})
+        return JSONResponse(self._scheme_json(results[0]))
+
+    async def chat(self, request):
+        payload = await _json_object(request)
+        if payload is None:
+            return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+        message = payload.get("message", "")
+        if not isinstance(message, str) or not message.strip():
+            return JSONResponse({"error": "message is required"}, status_code=400)
+        message = message.strip()
+        session_id = str(payload.get("session_id") or uuid.uuid4())
+        profile = get_profiler().request(f"api-chat-{session_id[:8]}", requested(request))
+        first = get_startup().request()
+
+        await self.turns.acquire()
+        if not payload.get("stream"):
+            try:
+                with profile, first:
+                    result = await self.agent.aprocess(message, priority=PRIORITY_CHAT, session_id=session_id)
+            finally:
+                self.turns.release()
+            return JSONResponse({**result, "session_id": session_id})
+
+        async def events():
+            try:
+                with profile, first:
+                    async for event in self.agent.aprocess_stream(message, priority=PRIORITY_CHAT, session_id=session_id):
+                        if event["type"] == "done":
+                            event = {**event, "session_id": session_id}
+                        yield _ndjson(event)
+            finally:
+                self.turns.release()
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    async def voice(self, request):
+        if self.stt is None:
+            return JSONResponse({"error": "speech-to-text is not configured (GROQ_API_KEY)"}, status_code=503)
+        language = request.query_params.get("language", "te")
+        if language not in LANGUAGES:
+            return JSONResponse({"error": "language must be te or en"}, status_code=400)
+        try:
+            length = int(request.headers.get("content-length") or 0)
+        except ValueError:
+            return JSONResponse({"error": "invalid Content-Length"}, status_code=400)
+        if length > self.max_audio_bytes:
+            return JSONResponse({"error": f"audio larger than {self.max_audio_bytes} bytes"}, status_code=413)
+        body = await request.body()
+        if len(body) > self.max_audio_bytes:
+            return JSONResponse({"error": f"audio larger than {self.max_audio_bytes} bytes"}, status_code=413)
+        try:
+            sample_rate, audio = decode_wav(body)
+        except ValueError as e:
+            return JSONResponse({"error": f"expected a PCM WAV body: {e}"}, status_code=415)
+        session_id = request.query_params.get("session_id") or str(uuid.uuid4())
+        ndjson = request.query_params.get("format") == "ndjson"
+        profile = get_profiler().request(f"api-voice-{session_id[:8]}", requested(request))
+        first = get_startup().request()
+
+        await self.turns.acquire()
+        try:
+            with get_tracer().turn(source="voice"):
+                transcription = await self.stt.atranscribe_numpy(audio, sample_rate=sample_rate, language=language)
+        except BaseException:
+            self.turns.release()
+            raise
+        transcript = transcription.get("text", "")
+        if not transcript:
+            self.turns.release()
+            return JSONResponse({"error": "could not understand the audio", "session_id": session_id}, status_code=422)
+
+        async def stream():
+            from .tts import AsyncSentenceTTSStream
+            speech = AsyncSentenceTTSStream(self.tts, language=language)
+
+            def audio_out(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+                return _ndjson({"type": "audio", "format": "mp3", "data": base64.b64encode(data).decode()}) if ndjson else data
+
+            try:
+                with profile, first:
+                    if ndjson:
+                        yield _ndjson({"type": "transcript", "text": transcript, "session_id": session_id})
+                    response, done = "", None
+                    async for event in self.agent.aprocess_stream(transcript, priority=PRIORITY_VOICE, session_id=session_id):
+                        if event["type"] == "token":
+                            response += event["content"]
+                            speech.feed(event["content"])
+                            if ndjson:
+                                yield _ndjson(event)
+                        elif event["type"] == "reset":
+                            # The streamed tokens were not the answer: drop their unsent audio
+                            response = ""
+                            speech.cancel()
+                            if ndjson:
+                                yield _ndjson(event)
+                        else:
+                            done = {**event, "session_id": session_id}
+                            if not response:
+                                # Cached, templated and clarification answers arrive whole
+                                speech.feed(event["response"])
+                        for path in speech.ready():
+                            yield audio_out(path)
+                    speech.close()
+                    async for path in speech.drain():
+                        yield audio_out(path)
+                    if ndjson:
+                        yield _ndjson(done)
+            finally:
+                self.turns.release()
+                speech.cleanup()
+
+        headers = {"X-NIVA-Transcript": urllib.parse.quote(transcript), "X-NIVA-Session": session_id}
+        return StreamingResponse(stream(), media_type="application/x-ndjson" if ndjson else "audio/mpeg", headers=headers)
+
+    async def voice_stream(self, websocket):
+        from .duplex import CODECS, DuplexSession
+
+        params = websocket.query_params
+        language, codec = params.get("language", "te"), params.get("codec", "mulaw")
+        await websocket.accept()
+        if self.stt is None:
+            await websocket.close(code=1011, reason="speech-to-text is not configured (GROQ_API_KEY)")
+            return
+        rate = params.get("rate", "")
+        try:
+            if language not in LANGUAGES or codec not in CODECS or rate and not (rate.isascii() and rate.isdigit()):
+                raise ValueError
+            session = DuplexSession(self.agent, self.stt, self.tts, websocket.send_json, websocket.send_bytes,
+                                    language=language, codec=codec, rate=int(rate) if rate else None,
+                                    session_id=params.get("session_id"), **self.call_options)
+        except ValueError:
+            await websocket.close(code=1008, reason="language te|en, codec mulaw|pcm16, a rate with samples in a frame")
+            return
+        try:
+            await self.calls.acquire()
+        except Overloaded:
+            await websocket.close(code=1013, reason="too many calls")
+            return
+
+        try:
+            await session.send_json({"type": "ready", "session_id": session.session_id, "codec": codec,
+                                     "rate": session.rate, "frame_ms": session.frame_ms})
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                try:
+                    event = _call_event(message)
+                    if event.get("type") == "audio":
+                        await session.receive(event["payload"], event.get("seq"))
+                except ValueError as e:
+                    # A malformed frame is reported; the call goes on
+                    await session.send_json({"type": "error", "error": f"bad message: {e}"})
+                    continue
+                if event.get("type") == "hangup":
+                    await websocket.close()
+                    break
+        finally:
+            await session.close()
+            self.calls.release()
+
+    async def healthz(self, request):
+        return JSONResponse({"ok": True})
+
+    async def readyz(self, request):
+        stats = {"turns": self.turns.stats(), "searches": self.searches.stats(), "search_batches": self.search_batcher.stats(),
+                 "calls": self.calls.stats(), "voice": self.stt is not None}
+        return JSONResponse({"ready": self.ready, **stats}, status_code=200 if self.ready else 503)
+
+
+def create_app(api: NivaAPI = None) -> Starlette:
+    """The ASGI app; models are built at startup unless passed in."""
+    api = api or from_env()
+
+    async def overloaded(request, exc):
+        return JSONResponse({"error": f"overloaded: {exc}"}, status_code=503, headers={"Retry-After": "1"})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        from .memory import watch as watch_memory
+        from .tracing import serve_metrics
+        # Models (langchain, chromadb, edge-tts) are imported here, not when the module loads
+        await asyncio.to_thread(api.load)
+        get_startup().set_ready()
+        watch_memory(stt=api.stt, agent=api.agent)
+        serve_metrics()  # only with NIVA_TRACING=prometheus
+        yield
+
+    app = Starlette(routes=[
+        Route("/v1/chat", api.chat, methods=["POST"]),
+        Route("/v1/voice", api.voice, methods=["POST"]),
+        Route("/v1/schemes/search", api.search, methods=["GET", "POST"]),
+        WebSocketRoute("/v1/voice/stream", api.voice_stream),
+        Route("/healthz", api.healthz),
+        Route("/readyz", api.readyz),
+    ], exception_handlers={Overloaded: overloaded}, lifespan=lifespan)
+    app.state.api = api
+    return app
+
+
+def from_env() -> NivaAPI:
+    """Configure from NIVA_API_CONCURRENCY / _QUEUE / _QUEUE_TIMEOUT / _BATCH_SIZE / _BATCH_MS / _MAX_AUDIO_MB / _CALLS and NIVA_DUPLEX_*."""
+    from .duplex import session_options_from_env
+    return NivaAPI(max_calls=int(os.getenv("NIVA_API_CALLS", "32")), call_options=session_options_from_env(),
+                   concurrency=int(os.getenv("NIVA_API_CONCURRENCY", "32")),
+                   queue=int(os.getenv("NIVA_API_QUEUE", "64")),
+                   queue_timeout=float(os.getenv("NIVA_API_QUEUE_TIMEOUT", "10")),
+                   batch_size=int(os.getenv("NIVA_API_BATCH_SIZE", "16")),
+                   batch_wait=float(os.getenv("NIVA_API_BATCH_MS", "5")) / 1000,
+                   max_audio_bytes=int(float(os.getenv("NIVA_API_MAX_AUDIO_MB", "10")) * 1024 * 1024))
+
+
+def main():
+    import uvicorn
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="NIVA headless HTTP API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("NIVA_API_PORT", "8000")))
+    args = parser.parse_args()
+    load_dotenv()
+    print(f"🚀 NIVA API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
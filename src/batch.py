@@ -0,0 +1,310 @@
+"""
+Batch scoring: a CSV of citizens against every scheme, offline.
+
+    python -m src.batch citizens.csv -o scored.parquet [--chunk-size 5000]
+        [--workers N] [--languages te,en] [--months 12] [--llm] [--llm-batch 20]
+
+Input columns: age and annual_income (required; `income` is accepted too),
+occupation, category, land_acres (or land_holding) and family_size. Any
+other columns are passed through.
+
+The CSV is streamed in chunks. Within a chunk the rules of
+check_eligibility are evaluated column-wise with NumPy, one scheme at a
+time, and calculate_benefits' formulas for all schemes at once
+(benefits.py). The per-row text (scheme lists, Telugu/English summaries)
+is rendered in a process pool. Each chunk is appended to the output before
+the next one is read, so memory stays flat however long the list is. A .parquet output needs pyarrow; any other
+extension is written as CSV.
+
+Output columns: the input columns, then eligible_schemes (ids joined by
+";"), eligible_count, benefit_total (money paid out), cover_total
+(insurance cover), eligible_<id> and benefit_<id> per scheme, summary_<language>, and error (rows missing age or income).
+
+The LLM is never called unless --llm is given. Then each summary column is
+rewritten with one prompt per --llm-batch rows; rows the model doesn't
+answer keep their template summary.
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .benefits import get_benefit_engine
+from .catalogue import SCHEMES
+from .renderer import _field, _issue_text
+from .results import EligibilityIssue
+
+COLUMN_ALIASES = {"income": "annual_income", "land_holding": "land_acres", "land": "land_acres"}
+# Failed-rule bits per scheme, in check_eligibility's order
+RULES = ("min_age", "max_age", "income_limit", "occupation", "category", "category_missing")
+FARMER_WORDS = ("farmer", "రైతు")
+
+
+def prepare(chunk: pd.DataFrame) -> dict:
+    """The scoring inputs of a chunk as arrays: numbers as float (NaN when missing), text normalized."""
+    columns = {COLUMN_ALIASES.get(c.strip().lower(), c.strip().lower()): c for c in chunk.columns}
+    n = len(chunk)
+
+    def number(name, default):
+        if name not in columns:
+            return np.full(n, default, dtype=float)
+        values = pd.to_numeric(chunk[columns[name]], errors="coerce").to_numpy(dtype=float)
+        return values if np.isnan(default) else np.where(np.isnan(values), default, values)
+
+    def text(name):
+        if name not in columns:
+            return pd.Series([""] * n, index=chunk.index)
+        return chunk[columns[name]].fillna("").astype(str).str.strip()
+
+    return {"age": number("age", np.nan), "annual_income": number("annual_income", np.nan),
+            "land_acres": number("land_acres", 0.0), "family_size": number("family_size", 1.0),
+            "occupation": text("occupation").str.lower(), "category": text("category").str.upper()}
+
+
+def issue_bits(inputs: dict, scheme: dict) -> np.ndarray:
+    """One byte per row with a bit set for each eligibility rule of `scheme` the row fails."""
+    eligibility = scheme["eligibility"]
+    bits = np.zeros(len(inputs["age"]), dtype=np.uint8)
+
+    def fail(rule, mask):
+        bits[np.asarray(mask, dtype=bool)] |= 1 << RULES.index(rule)
+
+    if "min_age" in eligibility:
+        fail("min_age", inputs["age"] < eligibility["min_age"])
+    if "max_age" in eligibility:
+        fail("max_age", inputs["age"] > eligibility["max_age"])
+    if eligibility.get("income_limit"):
+        fail("income_limit", inputs["annual_income"] > eligibility["income_limit"])
+    if "occupation" in eligibility:
+        required, occupation = eligibility["occupation"].lower(), inputs["occupation"]
+        ok = occupation.str.contains(required, regex=False)
+        if any(word in required for word in FARMER_WORDS):
+            for word in FARMER_WORDS:
+                ok |= occupation.str.contains(word, regex=False)
+        fail("occupation", ~ok)
+    if "category" in eligibility and "all" not in eligibility["category"]:
+        category = inputs["category"]
+        missing = category == ""
+        fail("category", ~missing & ~category.isin([c.upper() for c in eligibility["category"]]))
+        fail("category_missing", missing)
+    return bits
+
+
+def score(chunk: pd.DataFrame, months: int = 12):
+    """Vectorized scores for a chunk: (output frame without text columns, issue bits, eligible, totals)."""
+    inputs = prepare(chunk)
+    valid = ~(np.isnan(inputs["age"]) | np.isnan(inputs["annual_income"]))
+    bits = np.stack([issue_bits(inputs, scheme) for scheme in SCHEMES], axis=1)
+    eligible = (bits == 0) & valid[:, None]
+    # calculate_benefits' totals for every row and scheme in one broadcast (0 for text-only schemes)
+    engine = get_benefit_engine()
+    totals = engine.totals(inputs["land_acres"], inputs["family_size"], months) * eligible
+
+    scores = {"eligible_count": eligible.sum(axis=1), "benefit_total": totals[:, ~engine.coverage].sum(axis=1),
+              "cover_total": totals[:, engine.coverage].sum(axis=1)}
+    for j, scheme in enumerate(SCHEMES):
+        scores[f"eligible_{scheme['id']}"] = eligible[:, j]
+        scores[f"benefit_{scheme['id']}"] = totals[:, j]
+    scores["error"] = np.where(valid, "", "missing age or annual_income")
+    return chunk.assign(**scores), bits, eligible, totals
+
+
+@lru_cache(maxsize=4096)
+def _reason(j: int, bits: int, language: str) -> str:
+    """"Scheme (why not)" for scheme j and its failed-rule bits."""
+    scheme = SCHEMES[j]
+    eligibility = scheme["eligibility"]
+    issues = [_issue_text(EligibilityIssue(rule, eligibility["category"] if rule.startswith("category") else eligibility.get(rule)), language)
+              for k, rule in enumerate(RULES) if bits & (1 << k)]
+    return f"{_field(scheme, 'name', language)} ({'; '.join(issues)})"
+
+
+def summary(bits: list, totals: list, valid: bool, language: str) -> str:
+    """One citizen's result in a sentence or three."""
+    te = language == "te"
+    if not valid:
+        return "వయస్సు లేదా ఆదాయం వివరాలు లేవు." if te else "Age or annual income is missing."
+    names = []
+    for j, failed in enumerate(bits):
+        if not failed:
+            name = _field(SCHEMES[j], "name", language)
+            names.append(f"{name} (₹{totals[j]:,.0f})" if totals[j] else name)
+    if names:
+        parts = [f"{len(names)} యోజనలకు అర్హులు: {', '.join(names)}." if te else
+                 f"Eligible for {len(names)} schemes: {', '.join(names)}."]
+    else:
+        parts = ["అర్హత ఉన్న యోజనలు లేవు." if te else "Not eligible for any scheme."]
+    cover = get_benefit_engine().coverage
+    paid = sum(t for t, c in zip(totals, cover) if not c)
+    insured = sum(t for t, c in zip(totals, cover) if c)
+    if paid:
+        parts.append(f"అంచనా లాభాలు: ₹{paid:,.0f}." if te else f"Estimated benefits: ₹{paid:,.0f}.")
+    if insured:
+        parts.append(f"బీమా కవరేజ్: ₹{insured:,.0f}." if te else f"Insurance cover: ₹{insured:,.0f}.")
+    reasons = [_reason(j, failed, language) for j, failed in enumerate(bits) if failed]
+    if reasons:
+        parts.append(("అర్హత లేదు: " if te else "Not eligible: ") + ", ".join(reasons) + ".")
+    return " ".join(parts)
+
+
+def render_rows(args) -> list:
+    """Per-row text for a slice of a chunk: [eligible_schemes, summary per language]. Runs in the pool."""
+    bits, totals, valid, languages = args
+    ids = [scheme["id"] for scheme in SCHEMES]
+    rows, seen = [], {}
+    # Citizens with the same outcome share their text: render each outcome once
+    for key in zip(map(tuple, bits.tolist()), map(tuple, totals.tolist()), valid.tolist()):
+        if key not in seen:
+            row_bits, row_totals, row_valid = key
+            schemes = ";".join(sid for sid, failed in zip(ids, row_bits) if not failed) if row_valid else ""
+            seen[key] = [schemes] + [summary(row_bits, row_totals, row_valid, language) for language in languages]
+        rows.append(seen[key])
+    return rows
+
+
+LLM_SYSTEM = {
+    "te": "ప్రతి పంక్తిని ఒక పౌరునికి సరళమైన తెలుగులో ఒకటి లేదా రెండు వాక్యాల సారాంశంగా తిరిగి రాయండి. "
+          "అదే సంఖ్యతో, ఒక్కో పంక్తికి ఒక సారాంశం మాత్రమే ఇవ్వండి. మొత్తాలు మరియు యోజనల పేర్లు మార్చవద్దు.",
+    "en": "Rewrite each numbered line as a plain one- or two-sentence summary for the citizen. "
+          "Answer with the same numbers, one line each. Keep the amounts and scheme names unchanged.",
+}
+
+
+def llm_summaries(summaries: list, language: str, provider, batch_size: int = 20) -> list:
+    """Rewrite summaries with the LLM, `batch_size` rows per prompt; unanswered rows keep their text."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from .groq_client import PRIORITY_BATCH
+
+    rewritten = list(summaries)
+    for start in range(0, len(summaries), batch_size):
+        batch = summaries[start:start + batch_size]
+        messages = [SystemMessage(content=LLM_SYSTEM.get(language, LLM_SYSTEM["en"])),
+                    HumanMessage(content="\n".join(f"{i}. {text}" for i, text in enumerate(batch, 1)))]
+        try:
+            reply = provider.invoke(messages, max_tokens=80 * len(batch), priority=PRIORITY_BATCH)
+        except Exception as e:
+            print(f"⚠️ LLM summaries for rows {start + 1}-{start + len(batch)} failed ({e}); keeping templates")
+            continue
+        for line in reply.content.splitlines():
+            match = re.match(r"\s*(\d+)[.)]\s*(.+)", line)
+            if match and 1 <= int(match.group(1)) <= len(batch):
+                rewritten[start + int(match.group(1)) - 1] = match.group(2).strip()
+    return rewritten
+
+
+class CSVSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.header = True
+
+    def write(self, frame: pd.DataFrame):
+        frame.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """Appends each chunk as a row group of one Parquet file."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow); or write a .csv")
+        self.path = path
+        self.writer = None
+
+    def write(self, frame: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path: str):
+    return ParquetSink(path) if path.endswith(".parquet") else CSVSink(path)
+
+
+def score_csv(input_path: str, output_path: str, chunk_size: int = 5000, workers: int = None,
+              languages: tuple = ("te", "en"), months: int = 12, llm=None, llm_batch: int = 20) -> dict:
+    """Score every row of `input_path` into `output_path`; `llm` is a provider for rewritten summaries, or None."""
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    sink = open_sink(output_path)
+    stats = {"rows": 0, "eligible_rows": 0, "errors": 0, "chunks": 0, "llm_calls": 0}
+    start = time.perf_counter()
+    try:
+        # Everything as text: passthrough columns keep one type across chunks
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            frame, bits, eligible, totals = score(chunk, months)
+            valid = (frame["error"] == "").to_numpy()
+            slices = np.array_split(np.arange(len(frame)), max(1, min(workers, len(frame))))
+            jobs = [(bits[s], totals[s], valid[s], languages) for s in slices]
+            text = [row for part in (pool.map(render_rows, jobs) if pool else map(render_rows, jobs)) for row in part]
+
+            columns = {"eligible_schemes": [row[0] for row in text]}
+            for k, language in enumerate(languages, 1):
+                summaries = [row[k] for row in text]
+                if llm is not None:
+                    summaries = llm_summaries(summaries, language, llm, llm_batch)
+                    stats["llm_calls"] += -(-len(summaries) // llm_batch)
+                columns[f"summary_{language}"] = summaries
+            frame = frame.assign(**columns)
+            sink.write(frame[list(chunk.columns) + ["eligible_schemes"] +
+                             [c for c in frame.columns if c not in chunk.columns and c != "eligible_schemes"]])
+
+            stats["rows"] += len(frame)
+            stats["eligible_rows"] += int((frame["eligible_count"] > 0).sum())
+            stats["errors"] += int((~valid).sum())
+            stats["chunks"] += 1
+            elapsed = time.perf_counter() - start
+            print(f"📊 {stats['rows']:,} rows scored ({stats['rows'] / elapsed:,.0f} rows/s)")
+    finally:
+        sink.close()
+        if pool is not None:
+            pool.shutdown()
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV of citizens against every scheme")
+    parser.add_argument("input", help="CSV with age, annual_income, occupation, category, land_acres, family_size")
+    parser.add_argument("-o", "--output", required=True, help=".parquet (needs pyarrow) or .csv")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="processes for text rendering (default: all cores)")
+    parser.add_argument("--languages", default="te,en")
+    parser.add_argument("--months", type=int, default=12, help="period for recurring benefits")
+    parser.add_argument("--llm", action="store_true", help="rewrite summaries with the LLM (batched prompts)")
+    parser.add_argument("--llm-batch", type=int, default=20, help="rows per LLM prompt")
+    args = parser.parse_args()
+
+    llm = None
+    if args.llm:
+        from .llm_providers import router_from_env
+        candidates = router_from_env().candidates("batch")
+        if not candidates:
+            parser.error("--llm needs a configured provider (GROQ_API_KEY or NIVA_LOCAL_MODEL_PATH)")
+        llm = candidates[0]
+    languages = tuple(language.strip() for language in args.languages.split(",") if language.strip())
+    stats = score_csv(args.input, args.output, args.chunk_size, args.workers, languages, args.months,
+                      llm, args.llm_batch)
+    print(f"✅ {stats['rows']:,} rows → {args.output} in {stats['seconds']:.1f} s "
+          f"({stats['eligible_rows']:,} eligible for at least one scheme, {stats['errors']:,} with missing data)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benefit formulas from the catalogue, compiled for NumPy.
+
+Each scheme in schemes.json may declare a "benefit": its kind ("annual",
+prorated to the months asked for; "one_time"; "coverage", insurance cover)
+and any of these terms, summed:
+
+    fixed              a flat amount
+    per_installment    an amount paid `installments` times (a year, for annual)
+    per_acre           an amount per acre of land
+    per_family_member  an amount per family member
+    cap                the most the amount can reach
+
+    "benefit": {"kind": "annual", "per_installment": 2000, "installments": 3}
+
+Schemes without one are described by their text only ("generic"). Every
+formula is linear in (1, land_acres, family_size), so the catalogue
+compiles once into a coefficient matrix: one user is a dot product, and
+many users or a sweep over land, family size or months is one broadcast
+matrix product.
+"""
+import numpy as np
+
+from .catalogue import SCHEMES, on_reload
+
+KINDS = ("annual", "one_time", "coverage")
+TERMS = ("fixed", "per_installment", "installments", "per_acre", "per_family_member", "cap")
+
+
+class BenefitEngine:
+    """Compiled benefit formulas of a list of schemes (the catalogue by default)."""
+
+    def __init__(self, schemes: list = None):
+        schemes = SCHEMES if schemes is None else schemes
+        self.ids = [s["id"] for s in schemes]
+        self.index = {sid: j for j, sid in enumerate(self.ids)}
+        n = len(schemes)
+        self.coefficients = np.zeros((n, 3))  # amount = c0 + c1 * land_acres + c2 * family_size
+        self.caps = np.full(n, np.inf)
+        self.annual = np.zeros(n, dtype=bool)
+        self.coverage = np.zeros(n, dtype=bool)  # insurance cover, not money paid out
+        self.kinds = ["generic"] * n
+        self.installments = np.zeros(n, dtype=int)
+        for j, scheme in enumerate(schemes):
+            if scheme.get("benefit"):
+                self._compile(j, scheme["id"], scheme["benefit"])
+
+    def _compile(self, j: int, scheme_id: str, benefit: dict):
+        unknown = set(benefit) - set(TERMS) - {"kind"}
+        if unknown or benefit.get("kind") not in KINDS:
+            raise ValueError(f"{scheme_id}: benefit needs a kind in {KINDS} and terms from {TERMS} "
+                             f"(got kind={benefit.get('kind')!r}, unknown={sorted(unknown)})")
+        if any(benefit.get(term, 0) < 0 for term in TERMS):
+            raise ValueError(f"{scheme_id}: benefit amounts can't be negative")
+        installments = int(benefit.get("installments", 1 if "per_installment" in benefit else 0))
+        self.coefficients[j] = (benefit.get("fixed", 0) + benefit.get("per_installment", 0) * installments,
+                                benefit.get("per_acre", 0), benefit.get("per_family_member", 0))
+        self.caps[j] = benefit.get("cap", np.inf)
+        self.annual[j] = benefit["kind"] == "annual"
+        self.coverage[j] = benefit["kind"] == "coverage"
+        self.kinds[j] = benefit["kind"]
+        self.installments[j] = installments
+
+    def amounts(self, land_acres=0.0, family_size=1.0) -> np.ndarray:
+        """Yearly (annual) or one-off amount of every scheme; inputs broadcast, schemes on the last axis."""
+        land = np.asarray(land_acres, dtype=float)[..., None]
+        family = np.asarray(family_size, dtype=float)[..., None]
+        amount = self.coefficients[:, 0] + land * self.coefficients[:, 1] + family * self.coefficients[:, 2]
+        return np.minimum(amount, self.caps)
+
+    def totals(self, land_acres=0.0, family_size=1.0, months=12) -> np.ndarray:
+        """Amounts with annual schemes prorated to `months`; e.g. totals(land_array, family_array) -> (users, schemes)."""
+        months = np.asarray(months, dtype=float)[..., None]
+        return self.amounts(land_acres, family_size) * np.where(self.annual, months / 12, 1.0)
+
+    def evaluate(self, scheme_id: str, family_size: int = 1, land_acres: float = 0, months: int = 12):
+        """(kind, amount, total, installments) for one user, or None for a scheme without a formula."""
+        j = self.index.get(scheme_id)
+        if j is None or self.kinds[j] == "generic":
+            return None
+        amount = float(self.amounts(land_acres, family_size)[j])
+        total = amount * (months / 12) if self.annual[j] else amount
+        return self.kinds[j], amount, total, int(self.installments[j])
+
+
+_engine = None
+
+
+def get_benefit_engine() -> BenefitEngine:
+    """The catalogue's engine, compiled on first use and again after a catalogue reload."""
+    global _engine
+    if _engine is None:
+        _engine = BenefitEngine()
+    return _engine
+
+
+def _reset():
+    global _engine
+    _engine = None
+
+
+on_reload(_reset)
@@ -0,0 +1,81 @@
+"""
+Scheme catalogue shared by tools, renderer and vector store.
+Loads data/schemes.json once and indexes it by scheme id.
+
+The catalogue carries a content version; reload_schemes() re-reads the
+JSON in place, bumps the version and notifies listeners (renderer and
+response caches) so nothing keeps serving stale scheme data.
+"""
+import hashlib
+import json
+import os
+import types
+import weakref
+from typing import Callable, Optional
+
+
+def _load_schemes():
+    """Load schemes from JSON file."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.path.join(current_dir, "..", "data", "schemes.json")
+    with open(data_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compute_version(schemes: list) -> str:
+    payload = json.dumps(schemes, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+SCHEMES = _load_schemes()
+SCHEMES_BY_ID = {s["id"]: s for s in SCHEMES}
+_version = _compute_version(SCHEMES)
+_reload_listeners = []
+
+
+def catalogue_version() -> str:
+    """Short content hash of the currently loaded catalogue."""
+    return _version
+
+
+def on_reload(callback: Callable[[], None]) -> Callable[[], None]:
+    """Register a callback to run after the catalogue is reloaded; returns a function that unregisters it.
+
+    Bound methods are held weakly, so registering e.g. a cache's clear()
+    doesn't keep the cache alive; the listener goes away with its object.
+    """
+    ref = weakref.WeakMethod(callback) if isinstance(callback, types.MethodType) else (lambda: callback)
+    _reload_listeners.append(ref)
+
+    def unsubscribe():
+        if ref in _reload_listeners:
+            _reload_listeners.remove(ref)
+    return unsubscribe
+
+
+def reload_schemes() -> str:
+    """Re-read schemes.json in place and return the new catalogue version."""
+    global _version
+    schemes = _load_schemes()
+    SCHEMES[:] = schemes
+    SCHEMES_BY_ID.clear()
+    SCHEMES_BY_ID.update({s["id"]: s for s in schemes})
+    _version = _compute_version(schemes)
+    for ref in list(_reload_listeners):
+        callback = ref()
+        if callback is None:
+            _reload_listeners.remove(ref)
+        else:
+            callback()
+    return _version
+
+
+def find_scheme(name: str) -> Optional[dict]:
+    """Find the first scheme whose Telugu/English name or id contains `name`."""
+    name_lower = name.lower()
+    for s in SCHEMES:
+        if (name_lower in s.get("name_te", "").lower() or
+            name_lower in s.get("name_en", "").lower() or
+            name_lower in s["id"].lower()):
+            return s
+    return None
@@ -0,0 +1,170 @@
+"""
+Per-session agent state for the shared compiled graph.
+
+The agent compiles its graph once and keeps each session's state (history,
+remembered params) in a LangGraph checkpointer, keyed by thread_id:
+
+    memory - in-memory saver (default)
+    sqlite - SqliteSaver from langgraph-checkpoint-sqlite, so sessions
+             survive restarts (pip install langgraph-checkpoint-sqlite)
+    none   - no per-session state; every turn starts fresh
+
+Only the latest checkpoint of a thread is kept (compact() after each turn)
+and in memory only the most recently used sessions are kept, so memory
+stays flat.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+def _sqlite_saver(path: str):
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        raise ImportError("NIVA_CHECKPOINTER=sqlite needs: pip install langgraph-checkpoint-sqlite")
+    import sqlite3
+
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver whose async methods run the sync ones in a worker thread."""
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+        def prune(self, thread_id: str):
+            """Delete every checkpoint and write of a thread except the latest."""
+            with self.lock, self.conn:
+                for table in ("checkpoints", "writes"):
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < "
+                        "(SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)", (thread_id, thread_id))
+
+    return ThreadedSqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
+def _serialized_bytes(value) -> int:
+    """Total length of the serialized (bytes) payloads nested in saver storage."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_serialized_bytes(v) for v in list(value.values()))
+    if isinstance(value, (tuple, list)):
+        return sum(_serialized_bytes(v) for v in value)
+    return 0
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """InMemorySaver that can drop all but the latest checkpoint of a thread in place."""
+
+    def memory_bytes(self) -> int:
+        return sum(_serialized_bytes(dict(store)) for store in (self.storage, self.writes, self.blobs))
+
+    def prune(self, thread_id: str):
+        for ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if len(checkpoints) < 2:
+                continue
+            latest = max(checkpoints)
+            keep = self.serde.loads_typed(checkpoints[latest][0])["channel_versions"]
+            for checkpoint_id in [c for c in checkpoints if c != latest]:
+                old = self.serde.loads_typed(checkpoints.pop(checkpoint_id)[0])["channel_versions"]
+                self.writes.pop((thread_id, ns, checkpoint_id), None)
+                for channel, version in old.items():
+                    if keep.get(channel) != version:
+                        self.blobs.pop((thread_id, ns, channel, version), None)
+
+
+class SessionCheckpoints:
+    """A checkpointer plus the bookkeeping that keeps it bounded."""
+
+    def __init__(self, saver=None, max_sessions: int = 1000):
+        self.saver = saver
+        self.max_sessions = max_sessions
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def config(session_id: str) -> dict:
+        return {"configurable": {"thread_id": session_id}}
+
+    @property
+    def durability(self):
+        """Checkpoint once at the end of a turn, not after every node."""
+        return "exit" if self.saver is not None else None
+
+    def compact(self, session_id: str):
+        """Keep only the latest checkpoint of a session; drop old sessions held in memory."""
+        if self.saver is None:
+            return
+        if hasattr(self.saver, "prune"):
+            self.saver.prune(session_id)
+        else:
+            latest = self.saver.get_tuple(self.config(session_id))
+            if latest is not None:
+                self.saver.delete_thread(session_id)
+                config = {"configurable": {"thread_id": session_id, "checkpoint_ns": ""}}
+                self.saver.put(config, latest.checkpoint, latest.metadata, latest.checkpoint["channel_versions"])
+
+        evicted = []
+        with self._lock:
+            self._recent[session_id] = time.monotonic()
+            self._recent.move_to_end(session_id)
+            # Persistent savers keep every session on disk; in memory, only the recent ones
+            if isinstance(self.saver, InMemorySaver):
+                while len(self._recent) > self.max_sessions:
+                    evicted.append(self._recent.popitem(last=False)[0])
+        for old in evicted:
+            self.saver.delete_thread(old)
+
+    def evict_idle(self, idle_seconds: float) -> int:
+        """Drop in-memory sessions whose last turn is older than `idle_seconds`; returns how many."""
+        if not isinstance(self.saver, InMemorySaver):
+            return 0
+        cutoff = time.monotonic() - idle_seconds
+        evicted = []
+        with self._lock:
+            while self._recent and next(iter(self._recent.values())) < cutoff:
+                evicted.append(self._recent.popitem(last=False)[0])
+        for old in evicted:
+            self.saver.delete_thread(old)
+        return len(evicted)
+
+    def memory_bytes(self) -> int:
+        """Serialized size of the checkpoints held in memory (0 for persistent savers)."""
+        return self.saver.memory_bytes() if hasattr(self.saver, "memory_bytes") else 0
+
+    def clear(self, session_id: str):
+        if self.saver is not None:
+            self.saver.delete_thread(session_id)
+        with self._lock:
+            self._recent.pop(session_id, None)
+
+
+def from_env() -> SessionCheckpoints:
+    """Configure from NIVA_CHECKPOINTER / NIVA_CHECKPOINT_PATH / NIVA_CONVERSATION_MAX_SESSIONS."""
+    kind = os.getenv("NIVA_CHECKPOINTER", "memory")
+    if kind == "memory":
+        saver = BoundedMemorySaver()
+    elif kind == "sqlite":
+        saver = _sqlite_saver(os.getenv("NIVA_CHECKPOINT_PATH") or "checkpoints.db")
+    elif kind == "none":
+        saver = None
+    else:
+        raise ValueError(f"Unknown checkpointer: {kind}")
+    return SessionCheckpoints(saver, max_sessions=int(os.getenv("NIVA_CONVERSATION_MAX_SESSIONS", "1000")))
@@ -0,0 +1,217 @@
+"""
+Bounded per-session conversation store.
+
+Each session keeps its last N messages in a fixed-capacity ring buffer of
+compact `Message` records, and only a bounded number of sessions stay in
+memory (least recently used ones are dropped, and reloaded from the
+backend on demand), so
+memory stays flat however long a session runs. An optional backend
+persists messages so sessions survive restarts:
+
+    memory - nothing persisted (default)
+    sqlite - one table, trimmed to the last N messages per session
+    log    - append-only JSONL log, replayed on load (compact() rewrites it)
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class Message:
+    __slots__ = ("role", "content", "language", "ts")
+
+    def __init__(self, role: str, content: str, language: str = "te", ts: float = None):
+        self.role = role
+        self.content = content
+        self.language = language
+        self.ts = ts if ts is not None else time.time()
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+    def __repr__(self):
+        return f"Message({self.role!r}, {self.content[:30]!r})"
+
+
+class Session:
+    __slots__ = ("session_id", "messages", "last_used")
+
+    def __init__(self, session_id: str, capacity: int, messages=()):
+        self.session_id = session_id
+        self.messages = deque(messages, maxlen=capacity)
+        self.last_used = time.monotonic()
+
+
+class SQLiteBackend:
+    """Messages in one SQLite table, trimmed to `capacity` rows per session."""
+
+    def __init__(self, path: str, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS messages (
+            session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL,
+            content TEXT NOT NULL, language TEXT, ts REAL,
+            PRIMARY KEY (session_id, seq))""")
+        self._conn.commit()
+
+    def load(self, session_id: str) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, language, ts FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, self.capacity)).fetchall()
+        return [Message(*row) for row in reversed(rows)]
+
+    def append(self, session_id: str, messages: list):
+        with self._lock, self._conn:
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM messages WHERE session_id = ?",
+                                     (session_id,)).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                [(session_id, seq + i + 1, m.role, m.content, m.language, m.ts) for i, m in enumerate(messages)])
+            self._conn.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?",
+                               (session_id, seq + len(messages) - self.capacity))
+
+    def clear(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+
+class AppendLogBackend:
+    """Append-only JSONL log; a session is rebuilt by replaying its records."""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    def _replay(self) -> dict:
+        sessions = {}
+        if not os.path.exists(self.path):
+            return sessions
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("op") == "clear":
+                    sessions.pop(record["s"], None)
+                else:
+                    sessions.setdefault(record["s"], deque(maxlen=self.capacity)).append(
+                        Message(record["r"], record["c"], record.get("l", "te"), record.get("t")))
+        return sessions
+
+    def load(self, session_id: str) -> list:
+        with self._lock:
+            return list(self._replay().get(session_id, ()))
+
+    @staticmethod
+    def _record(session_id: str, m: Message) -> str:
+        return json.dumps({"s": session_id, "r": m.role, "c": m.content, "l": m.language, "t": m.ts}, ensure_ascii=False) + "\n"
+
+    def append(self, session_id: str, messages: list):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(self._record(session_id, m) for m in messages)
+
+    def clear(self, session_id: str):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"s": session_id, "op": "clear"}) + "\n")
+
+    def compact(self):
+        """Rewrite the log with only the messages each session still keeps."""
+        with self._lock:
+            sessions = self._replay()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._record(sid, m) for sid, messages in sessions.items() for m in messages)
+            os.replace(tmp, self.path)
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "log": AppendLogBackend}
+
+
+class ConversationStore:
+    """Per-session ring buffers with optional persistence."""
+
+    def __init__(self, capacity: int = 20, max_sessions: int = 1000, backend=None):
+        self.capacity = capacity
+        self.max_sessions = max_sessions
+        self.backend = backend
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def session(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                loaded = self.backend.load(session_id) if self.backend else ()
+                session = Session(session_id, self.capacity, loaded)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def append(self, session_id: str, *messages: Message):
+        """Add messages to a session (and persist them)."""
+        self.session(session_id).messages.extend(messages)
+        if self.backend:
+            self.backend.append(session_id, list(messages))
+
+    def add_turn(self, session_id: str, user_text: str, response: str, language: str = "te"):
+        self.append(session_id, Message("user", user_text, language), Message("assistant", response, language))
+
+    def history(self, session_id: str, last: int = None) -> list:
+        """Messages as {"role", "content"} dicts, oldest first."""
+        messages = self.session(session_id).messages
+        if last is not None:
+            messages = list(messages)[-last:] if last else []
+        return [m.to_dict() for m in messages]
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend:
+            self.backend.clear(session_id)
+
+    def evict_idle(self, idle_seconds: float) -> int:
+        """
+        Drop sessions unused for `idle_seconds` from memory; returns how many.
+
+        With a backend they are reloaded on their next use; without one their
+        messages are gone.
+        """
+        cutoff = time.monotonic() - idle_seconds
+        evicted = 0
+        with self._lock:
+            # Least recently used first
+            while self._sessions and next(iter(self._sessions.values())).last_used < cutoff:
+                self._sessions.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the sessions held in memory."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return sum(sys.getsizeof(m) + sys.getsizeof(m.content) for s in sessions for m in list(s.messages))
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+def from_env() -> ConversationStore:
+    """Configure from NIVA_CONVERSATION_CAPACITY / _MAX_SESSIONS / _BACKEND / _PATH."""
+    capacity = int(os.getenv("NIVA_CONVERSATION_CAPACITY", "20"))
+    kind = os.getenv("NIVA_CONVERSATION_BACKEND", "memory")
+    backend = None
+    if kind in BACKENDS:
+        default_path = "conversations.db" if kind == "sqlite" else "conversations.jsonl"
+        backend = BACKENDS[kind](os.getenv("NIVA_CONVERSATION_PATH") or default_path, capacity)
+    elif kind != "memory":
+        raise ValueError(f"Unknown conversation backend: {kind}")
+    return ConversationStore(capacity=capacity, max_sessions=int(os.getenv("NIVA_CONVERSATION_MAX_SESSIONS", "1000")), backend=backend)
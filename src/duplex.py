@@ -0,0 +1,381 @@
+"""
+Full-duplex voice sessions for telephony (IVR).
+
+The caller streams 20 ms frames (8 kHz μ-law or 16 kHz 16-bit PCM) and
+hears the answer as frames in the same format, while the line stays open
+both ways:
+
+    jitter buffer  sequenced frames are reordered; one still missing once
+                   NIVA_DUPLEX_JITTER_FRAMES later frames have arrived is
+                   played as silence, and a large jump in seq (wraparound,
+                   a restarted count) resyncs instead of waiting or padding
+    VAD            an energy detector over an adaptive noise floor starts an
+                   utterance and ends it after NIVA_DUPLEX_ENDPOINT_MS of
+                   silence (end-pointing)
+    partials       every NIVA_DUPLEX_PARTIAL_MS of speech the utterance so far
+                   is transcribed and sent as a partial transcript; a partial
+                   that already covers the whole utterance is reused as the
+                   final transcript, saving a Whisper round trip
+    barge-in       speech while the answer is playing cancels the LLM stream
+                   and pending TTS and tells the client to flush its playback
+                   buffer; audio is paced at real time (a short lead) so
+                   little is left to flush
+
+The answer's MP3 sentences from EdgeTTS are decoded (pydub, needs ffmpeg),
+resampled to the line rate and encoded back to the caller's codec.
+"""
+import asyncio
+import collections
+import contextlib
+import io
+import os
+import time
+import uuid
+from math import gcd
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from .groq_client import PRIORITY_VOICE
+from .tracing import get_tracer
+
+
+def _mulaw_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent, mantissa = (u >> 4) & 0x07, u & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return (np.where(u & 0x80, -magnitude, magnitude) / 32768).astype(np.float32)
+
+
+_MULAW = _mulaw_table()
+
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    """G.711 μ-law bytes to float32 samples."""
+    return _MULAW[np.frombuffer(data, dtype=np.uint8)]
+
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    """float32 samples to G.711 μ-law bytes."""
+    x = np.clip(np.round(samples * 32768), -32768, 32767).astype(np.int32)
+    magnitude = np.minimum(np.abs(x), 32635) + 0x84
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(((x < 0) << 7) | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def pcm16_decode(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+
+
+def pcm16_encode(samples: np.ndarray) -> bytes:
+    return np.clip(np.round(samples * 32768), -32768, 32767).astype("<i2").tobytes()
+
+
+# codec -> (decode, encode, default sample rate, bytes per sample)
+CODECS = {"mulaw": (mulaw_decode, mulaw_encode, 8000, 1), "pcm16": (pcm16_decode, pcm16_encode, 16000, 2)}
+
+
+def decode_mp3(data: bytes, rate: int) -> np.ndarray:
+    """An EdgeTTS MP3 as mono float32 at `rate` (pydub + ffmpeg)."""
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(data), format="mp3").set_channels(1)
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / (1 << (8 * segment.sample_width - 1))
+    if segment.frame_rate != rate:
+        g = gcd(rate, segment.frame_rate)
+        samples = resample_poly(samples, rate // g, segment.frame_rate // g)
+    return samples.astype(np.float32)
+
+
+class JitterBuffer:
+    """
+    Releases sequenced frames in order; a missing frame is given up (None) once `depth` later frames wait.
+
+    `seq` is an int that counts up by one per frame. A jump of more than
+    `RESYNC_DEPTHS` × depth frames either way (a 16-bit RTP counter wrapping
+    65535 → 0, a client restarting its count, a bogus value) is not filled
+    with silence or counted late: the waiting frames are released and the
+    buffer restarts at the new seq.
+    """
+
+    RESYNC_DEPTHS = 4
+
+    def __init__(self, depth: int = 3):
+        self.depth = depth
+        self.window = self.RESYNC_DEPTHS * depth
+        self.late = 0
+        self.lost = 0
+        self.resyncs = 0
+        self._frames = {}
+        self._next = None
+
+    def push(self, seq, frame: bytes) -> list:
+        if seq is None:
+            return [frame]  # unsequenced frames (binary WebSocket messages) arrive in order
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            raise ValueError(f"seq must be an integer, got {seq!r}")
+        ready = []
+        if self._next is None:
+            self._next = seq
+        elif abs(seq - self._next) > self.window:
+            ready = [self._frames[s] for s in sorted(self._frames)]
+            self._frames.clear()
+            self._next = seq
+            self.resyncs += 1
+        if seq < self._next:
+            self.late += 1
+            return ready
+        self._frames[seq] = frame
+        while self._frames:
+            if self._next in self._frames:
+                ready.append(self._frames.pop(self._next))
+            elif len(self._frames) >= self.depth:
+                ready.append(None)
+                self.lost += 1
+            else:
+                break
+            self._next += 1
+        return ready
+
+
+class EnergyVAD:
+    """Frame energy against an adaptive noise floor; returns "start" / "end" at utterance boundaries."""
+
+    def __init__(self, threshold_db: float = 12.0, min_level_db: float = -45.0, start_frames: int = 3, end_frames: int = 30):
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.start_frames = start_frames
+        self.end_frames = end_frames
+        self.noise_db = -60.0
+        self.speaking = False
+        self._voiced = 0
+        self._silent = 0
+
+    def process(self, frame: np.ndarray):
+        level = 10 * np.log10(float(np.mean(frame * frame)) + 1e-10)
+        voiced = level > max(self.noise_db + self.threshold_db, self.min_level_db)
+        if not voiced:
+            self.noise_db = min(0.95 * self.noise_db + 0.05 * level, -20.0)
+        if not self.speaking:
+            self._voiced = self._voiced + 1 if voiced else 0
+            if self._voiced >= self.start_frames:
+                self.speaking, self._silent = True, 0
+                return "start"
+        else:
+            self._silent = 0 if voiced else self._silent + 1
+            if self._silent >= self.end_frames:
+                self.speaking, self._voiced = False, 0
+                return "end"
+        return None
+
+
+class DuplexSession:
+    """One call: caller frames in, transcripts/events and answer frames out."""
+
+    def __init__(self, agent, stt, tts, send_json, send_bytes, language: str = "te", codec: str = "mulaw", rate: int = None,
+                 session_id: str = None, frame_ms: int = 20, endpoint_ms: int = 600, partial_ms: int = 1000,
+                 barge_in_ms: int = 200, jitter_frames: int = 3, lead_ms: int = 200, speculate: bool = False, decoder=decode_mp3):
+        self.agent = agent
+        self.stt = stt
+        self.tts = tts
+        self.language = language
+        self.decode, self.encode, default_rate, self.sample_bytes = CODECS[codec]
+        self.rate = rate or default_rate
+        self.session_id = session_id or str(uuid.uuid4())
+        self.frame_ms = frame_ms
+        self.frame_samples = self.rate * frame_ms // 1000
+        if self.frame_samples <= 0:
+            raise ValueError(f"a {frame_ms} ms frame at {self.rate} Hz has no samples")
+        self.speculate = speculate
+        self.decoder = decoder
+        self.lead = lead_ms / 1000
+        self.partial_samples = self.rate * partial_ms // 1000
+        self.start_frames = max(1, 60 // frame_ms)
+        self.barge_in_frames = max(1, barge_in_ms // frame_ms)
+        self.jitter = JitterBuffer(jitter_frames)
+        self.vad = EnergyVAD(start_frames=self.start_frames, end_frames=max(1, endpoint_ms // frame_ms))
+        self.stats = {"turns": 0, "errors": 0, "barge_ins": 0, "partials": 0, "partials_reused": 0, "first_audio_ms": []}
+        self._send_json, self._send_bytes = send_json, send_bytes
+        self._send_lock = asyncio.Lock()
+        self._preroll = collections.deque(maxlen=max(1, 200 // frame_ms))
+        self._utterance = None
+        self._partial = None  # (samples covered, task)
+        self._carry = None
+        self._last_audio = None
+        self._turn_task = None
+        self._playing = False
+        self._played = False
+        self._clock = None
+        self._sent = 0.0
+
+    async def send_json(self, event: dict):
+        async with self._send_lock:
+            await self._send_json(event)
+
+    async def send_bytes(self, data: bytes):
+        async with self._send_lock:
+            await self._send_bytes(data)
+
+    async def receive(self, payload: bytes, seq: int = None):
+        """
+        One caller frame (any multiple of the frame size); `seq` for sequenced frames.
+
+        A payload that is not whole samples, or a seq that is not an int, raises
+        ValueError before anything is buffered.
+        """
+        if len(payload) % self.sample_bytes:
+            raise ValueError(f"{len(payload)} bytes is not a whole number of {self.sample_bytes}-byte samples")
+        for frame in self.jitter.push(seq, payload):
+            samples = np.zeros(self.frame_samples, dtype=np.float32) if frame is None else self.decode(frame)
+            for i in range(0, len(samples), self.frame_samples):
+                await self._on_frame(samples[i:i + self.frame_samples])
+
+    async def _on_frame(self, frame: np.ndarray):
+        # A caller talking over the answer must be sure it's speech, not line echo
+        self.vad.start_frames = self.barge_in_frames if self._playing else self.start_frames
+        event = self.vad.process(frame)
+        if self._utterance is None:
+            self._preroll.append(frame)
+        else:
+            self._utterance.append(frame)
+
+        if event == "start":
+            self._utterance = list(self._preroll)
+            self._preroll.clear()
+            self._partial = None
+            if self._turn_task is not None and not self._turn_task.done():
+                await self._barge_in()
+            await self.send_json({"type": "speech_start"})
+        elif event == "end":
+            audio, self._utterance = np.concatenate(self._utterance), None
+            self._turn_task = asyncio.create_task(self._turn(audio, len(audio) - self.vad.end_frames * self.frame_samples))
+        elif self._utterance is not None:
+            covered = self._partial[0] if self._partial else 0
+            if len(self._utterance) * self.frame_samples - covered >= self.partial_samples and \
+                    (self._partial is None or self._partial[1].done()):
+                audio = np.concatenate(self._utterance)
+                self._partial = (len(audio), asyncio.create_task(self._transcribe_partial(audio)))
+
+    async def _transcribe_partial(self, audio: np.ndarray) -> str:
+        result = await self.stt.atranscribe_numpy(audio, sample_rate=self.rate, language=self.language, use_fallback=False)
+        text = result.get("text", "")
+        if text:
+            self.stats["partials"] += 1
+            await self.send_json({"type": "partial", "text": text})
+            if self.speculate:
+                await asyncio.to_thread(self.agent.speculate, text, self.session_id)
+        return text
+
+    async def _final_transcript(self, audio: np.ndarray, speech_samples: int) -> str:
+        partial, self._partial = self._partial, None
+        if partial is not None and self._carry is None and partial[0] >= speech_samples:
+            # The partial already heard everything said: no second Whisper call
+            text = await partial[1]
+            if text:
+                self.stats["partials_reused"] += 1
+                return text
+        elif partial is not None and not partial[1].done():
+            partial[1].cancel()
+        if self._carry is not None:
+            audio, self._carry = np.concatenate([self._carry, audio]), None
+        result = await self.stt.atranscribe_numpy(audio, sample_rate=self.rate, language=self.language)
+        return result.get("text", "")
+
+    async def _turn(self, audio: np.ndarray, speech_samples: int):
+        endpoint = time.perf_counter()
+        self._played = False
+        self._last_audio = audio if self._carry is None else np.concatenate([self._carry, audio])
+        with get_tracer().turn(source="duplex"):
+            try:
+                text = await self._final_transcript(audio, speech_samples)
+                await self.send_json({"type": "transcript", "text": text})
+                if text:
+                    self.stats["turns"] += 1
+                    await self._respond(text, endpoint)
+            except Exception as e:
+                # The turn runs as a background task: report the failure instead of losing it
+                error = f"{type(e).__name__}: {e}"
+                print(f"❌ Duplex turn failed ({self.session_id[:8]}): {error}")
+                self.stats["errors"] += 1
+                with contextlib.suppress(Exception):
+                    await self.send_json({"type": "error", "error": error})
+                    await self.send_json({"type": "turn_end", "error": error})
+
+    async def _respond(self, text: str, endpoint: float):
+        from .tts import AsyncSentenceTTSStream
+        speech = AsyncSentenceTTSStream(self.tts, language=self.language)
+        response, done = "", {}
+        try:
+            async for event in self.agent.aprocess_stream(text, priority=PRIORITY_VOICE, session_id=self.session_id):
+                if event["type"] == "token":
+                    response += event["content"]
+                    speech.feed(event["content"])
+                    await self.send_json(event)
+                elif event["type"] == "reset":
+                    # The streamed tokens were not the answer: drop their unplayed audio
+                    response = ""
+                    speech.cancel()
+                    await self.send_json(event)
+                else:
+                    done = event
+                    if not response:
+                        # Cached, templated and clarification answers arrive whole
+                        speech.feed(event["response"])
+                for path in speech.ready():
+                    await self._play(path, endpoint)
+            speech.close()
+            async for path in speech.drain():
+                await self._play(path, endpoint)
+            await self.send_json({**done, "type": "turn_end"})
+        finally:
+            # Also on barge-in (cancelled): synthesis still in flight is dropped with the files
+            self._playing = False
+            speech.cleanup()
+
+    async def _play(self, path: str, endpoint: float):
+        """Send one synthesized sentence as line frames, paced to stay `lead` ahead of real time."""
+        with open(path, "rb") as f:
+            samples = await asyncio.to_thread(self.decoder, f.read(), self.rate)
+        self._playing = True
+        now = time.perf_counter()
+        if self._clock is None or now - self._clock > self._sent:
+            self._clock, self._sent = now, 0.0  # playback (re)starts now
+        for i in range(0, len(samples), self.frame_samples):
+            ahead = self._sent - (time.perf_counter() - self._clock)
+            if ahead > self.lead:
+                await asyncio.sleep(ahead - self.lead)
+            if not self._played:
+                self._played = True
+                self.stats["first_audio_ms"].append(round((time.perf_counter() - endpoint) * 1000, 1))
+            await self.send_bytes(self.encode(samples[i:i + self.frame_samples]))
+            self._sent += self.frame_ms / 1000
+
+    async def _barge_in(self):
+        """The caller spoke: stop thinking/speaking and have the client drop queued audio."""
+        task, played = self._turn_task, self._played
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        self._turn_task = None
+        self._clock = None
+        self.stats["barge_ins"] += 1
+        if not played:
+            # Nothing was said back yet: the caller was still talking, keep the first part
+            self._carry = self._last_audio
+        await self.send_json({"type": "barge_in"})
+
+    async def close(self):
+        for task in (self._turn_task, self._partial[1] if self._partial else None):
+            if task is not None and not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+
+def session_options_from_env() -> dict:
+    """DuplexSession options from NIVA_DUPLEX_ENDPOINT_MS / _PARTIAL_MS / _BARGE_IN_MS / _JITTER_FRAMES / NIVA_SPECULATION."""
+    return {"endpoint_ms": int(os.getenv("NIVA_DUPLEX_ENDPOINT_MS", "600")),
+            "partial_ms": int(os.getenv("NIVA_DUPLEX_PARTIAL_MS", "1000")),
+            "barge_in_ms": int(os.getenv("NIVA_DUPLEX_BARGE_IN_MS", "200")),
+            "jitter_frames": int(os.getenv("NIVA_DUPLEX_JITTER_FRAMES", "3")),
+            "speculate": os.getenv("NIVA_SPECULATION", "0").lower() in ("1", "true", "yes")}
@@ -0,0 +1,196 @@
+"""
+Compiled single-pass intent and parameter extractor for the planner.
+
+All intent, sector, occupation and scheme keywords (Telugu + English) are
+compiled into one Aho-Corasick automaton, so the input is scanned once no
+matter how many keywords there are. Numbers (age, income) are read by one
+precompiled regex pass.
+
+Keywords come from data/keywords.json; schemes in data/schemes.json may
+add their own aliases with an optional "keywords" list.
+"""
+import json
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+
+from .catalogue import SCHEMES, on_reload
+
+
+class AhoCorasick:
+    """Minimal Aho-Corasick automaton mapping keywords to payloads."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, keyword: str, payload):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), payload))
+
+    def build(self):
+        """Compute failure links (call once after all keywords are added)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        return self
+
+    def iter(self, text: str):
+        """Yield (start, end, payload) for every keyword occurrence in text."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+@dataclass(slots=True)
+class Extraction:
+    intent: str
+    confidence: float
+    params: dict = field(default_factory=dict)
+    keywords: list = field(default_factory=list)
+    intents: list = field(default_factory=list)  # every intent with a keyword hit, by priority
+
+
+AGE_UNITS = ("year", "years", "yrs", "సంవత్సరాలు", "వయస్సు", "ఏళ్ళు")
+LAKH_UNITS = ("lakh", "lakhs", "లక్ష", "లక్షలు")
+
+# One pass over every number: optional ₹ prefix, the number, optional unit
+_NUMBER = re.compile(
+    r'(₹\s*)?(?<![\d.,])(\d+(?:,\d+)*(?:\.\d+)?)\s*(' + "|".join(AGE_UNITS + LAKH_UNITS) + r')?',
+    re.IGNORECASE)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordExtractor:
+    """
+    Compiled extractor returning intent, confidence and params in one pass.
+
+    English keywords must start at a word boundary, and short ones (<= 3
+    chars, like "hi" or "vs") must also end at one, so "this" is not a
+    greeting. Telugu keywords match anywhere because suffixes attach to
+    the word ("రైతులకు" contains "రైతు").
+    """
+
+    def __init__(self, keywords_path: str = None):
+        if keywords_path is None:
+            keywords_path = os.path.join(os.path.dirname(__file__), "..", "data", "keywords.json")
+        self.keywords_path = keywords_path
+        self.compile()
+
+    def compile(self):
+        with open(self.keywords_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        automaton = AhoCorasick()
+        self.intent_priority = {}
+        for rank, entry in enumerate(data["intents"]):
+            self.intent_priority[entry["intent"]] = rank
+            for kw in entry["keywords"]:
+                automaton.add(kw.lower(), ("intent", entry["intent"]))
+        for sector, kws in data.get("sectors", {}).items():
+            for kw in kws:
+                automaton.add(kw.lower(), ("sector", sector))
+        for occupation, kws in data.get("occupations", {}).items():
+            for kw in kws:
+                automaton.add(kw.lower(), ("occupation", occupation))
+        for scheme_id, kws in data.get("schemes", {}).items():
+            for kw in kws:
+                automaton.add(kw.lower(), ("scheme_name", scheme_id))
+        for scheme in SCHEMES:
+            for kw in scheme.get("keywords", []):
+                automaton.add(kw.lower(), ("scheme_name", scheme["id"]))
+
+        self.automaton = automaton.build()
+        return self
+
+    def _boundary_ok(self, text: str, start: int, end: int) -> bool:
+        keyword = text[start:end]
+        if not keyword.isascii():
+            return True
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if len(keyword) <= 3 and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def extract(self, text: str) -> Extraction:
+        lower = text.lower()
+        params = {}
+        intent_hits = {}
+        keywords = []
+
+        for start, end, (kind, value) in self.automaton.iter(lower):
+            if not self._boundary_ok(lower, start, end):
+                continue
+            keywords.append(lower[start:end])
+            if kind == "intent":
+                intent_hits[value] = intent_hits.get(value, 0) + 1
+            elif kind not in params:
+                params[kind] = value
+
+        params.update(self._extract_numbers(text))
+
+        if not intent_hits:
+            return Extraction("search", 0.5, params, keywords)
+        intents = sorted(intent_hits, key=self.intent_priority.get)
+        confidence = intent_hits[intents[0]] / sum(intent_hits.values())
+        return Extraction(intents[0], confidence, params, keywords, intents)
+
+    def _extract_numbers(self, text: str) -> dict:
+        age = fallback_age = income = None
+        for match in _NUMBER.finditer(text):
+            rupee, number, unit = match.group(1), match.group(2), (match.group(3) or "").lower()
+            value = float(number.replace(",", ""))
+            if unit in AGE_UNITS and value < 100:
+                age = age if age is not None else int(value)
+            elif unit in LAKH_UNITS:
+                income = income if income is not None else int(value * 100000)
+            elif not rupee and fallback_age is None and number.isdigit() and len(number) == 2 and 18 <= value <= 80:
+                fallback_age = int(value)
+            elif income is None:
+                # Small bare numbers are lakhs ("income 2" -> ₹2,00,000)
+                income = int(value * 100000) if value < 100 else int(value)
+
+        params = {}
+        if age is not None or fallback_age is not None:
+            params["age"] = age if age is not None else fallback_age
+        if income is not None:
+            params["income"] = income
+        return params
+
+
+_extractor = None
+
+
+def get_extractor() -> KeywordExtractor:
+    """Get or create the shared extractor (recompiled on catalogue reload)."""
+    global _extractor
+    if _extractor is None:
+        _extractor = KeywordExtractor()
+        on_reload(_extractor.compile)
+    return _extractor
@@ -0,0 +1,356 @@
+"""
+Shared Groq client layer: pooled HTTP clients, rate limiting and retries.
+
+Every Groq call (chat LLM and Whisper) goes through one pair of pooled
+httpx clients (keep-alive, bounded connections) and a per-endpoint
+scheduler. The scheduler holds token buckets sized to Groq's per-minute
+request and token limits, serves waiting voice requests before chat and
+batch ones, and retries 429/5xx/connection errors with jittered
+exponential backoff that honours retry-after. Load spikes become short
+queue waits instead of errors.
+
+    with priority(PRIORITY_VOICE):
+        text = get_scheduler("whisper").call(lambda: client.audio.transcriptions.create(...))
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import httpx
+
+
+PRIORITY_VOICE = 0
+PRIORITY_CHAT = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {PRIORITY_VOICE: "voice", PRIORITY_CHAT: "chat", PRIORITY_BATCH: "batch"}
+
+_priority = contextvars.ContextVar("niva_groq_priority", default=PRIORITY_CHAT)
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Run the enclosed Groq calls at `level` (PRIORITY_VOICE / _CHAT / _BATCH)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def deficit_seconds(self, cost: float) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        cost = min(cost, self.capacity)
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+
+def _retry_after(error) -> float:
+    """Seconds from a retry-after / retry-after-ms header, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+
+def is_retryable(error) -> bool:
+    """Rate limits, timeouts, connection errors and 5xx: worth another try."""
+    import groq
+    if isinstance(error, (groq.RateLimitError, groq.APIConnectionError, groq.APITimeoutError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+class GroqScheduler:
+    """
+    Rate-limit-aware scheduler for one Groq endpoint.
+
+    Callers reserve request and token budget before calling; while budget
+    is short they wait, and a caller only takes budget when no caller of a
+    higher priority is waiting. Works from threads (`call`) and asyncio
+    (`acall`).
+    """
+
+    POLL_SECONDS = 0.05
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = None,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 20.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._waiting = {}
+        self._waits = {level: deque(maxlen=self.WAIT_SAMPLES) for level in PRIORITY_NAMES}
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled = 0
+
+    # --- admission ---
+
+    def _try_acquire(self, cost: float, level: int) -> float:
+        """Take budget and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            wait = self.requests.deficit_seconds(1)
+            if self.tokens is not None:
+                self.tokens.refill(now)
+                wait = max(wait, self.tokens.deficit_seconds(cost))
+            if wait == 0 and not any(n for p, n in self._waiting.items() if p < level):
+                self.requests.tokens -= 1
+                if self.tokens is not None:
+                    self.tokens.tokens -= min(cost, self.tokens.capacity)
+                return 0.0
+            return min(max(wait, self.POLL_SECONDS / 5), self.POLL_SECONDS)
+
+    def _enter(self, level: int):
+        with self._lock:
+            self._waiting[level] = self._waiting.get(level, 0) + 1
+
+    def _leave(self, level: int, started: float):
+        waited = time.monotonic() - started
+        with self._lock:
+            self._waiting[level] -= 1
+            self._waits.setdefault(level, deque(maxlen=self.WAIT_SAMPLES)).append(waited)
+            if waited > self.POLL_SECONDS:
+                self.throttled += 1
+
+    def acquire(self, cost: float = 1, level: int = None):
+        level = current_priority() if level is None else level
+        started = time.monotonic()
+        self._enter(level)
+        try:
+            while (wait := self._try_acquire(cost, level)) > 0:
+                time.sleep(wait)
+        finally:
+            self._leave(level, started)
+
+    async def aacquire(self, cost: float = 1, level: int = None):
+        level = current_priority() if level is None else level
+        started = time.monotonic()
+        self._enter(level)
+        try:
+            while (wait := self._try_acquire(cost, level)) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            self._leave(level, started)
+
+    # --- calls with retry ---
+
+    def _backoff(self, attempt: int, error) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, _retry_after(error))
+
+    def _should_retry(self, attempt: int, error) -> bool:
+        if attempt >= self.max_retries or not is_retryable(error):
+            with self._lock:
+                self.failures += 1
+            return False
+        with self._lock:
+            self.retries += 1
+        return True
+
+    def call(self, fn, cost: float = 1, level: int = None):
+        """Run fn() once budget is available, retrying transient Groq errors."""
+        with self._lock:
+            self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            self.acquire(cost, level)
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"⏳ Groq {self.name}: {type(e).__name__}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def acall(self, fn, cost: float = 1, level: int = None):
+        """Async version of call; fn() must return an awaitable."""
+        with self._lock:
+            self.calls += 1
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(cost, level)
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"⏳ Groq {self.name}: {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = {}
+            for level, samples in self._waits.items():
+                if not samples:
+                    continue
+                ordered = sorted(samples)
+                waits[PRIORITY_NAMES.get(level, str(level))] = {
+                    "count": len(ordered),
+                    "p50_ms": ordered[len(ordered) // 2] * 1000,
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return {"calls": self.calls, "retries": self.retries, "failures": self.failures,
+                    "throttled": self.throttled, "queue_wait": waits}
+
+
+# --- shared instances ---
+
+_lock = threading.Lock()
+_schedulers = {}
+_http_client = None
+_async_http_client = None
+_groq = None
+_async_groq = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("NIVA_GROQ_MAX_CONNECTIONS", "32")),
+        max_keepalive_connections=int(os.getenv("NIVA_GROQ_KEEPALIVE_CONNECTIONS", "16")),
+        keepalive_expiry=float(os.getenv("NIVA_GROQ_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(float(os.getenv("NIVA_GROQ_TIMEOUT", "60")), connect=5.0)
+
+
+def get_http_client() -> httpx.Client:
+    """Pooled keep-alive httpx client shared by every sync Groq call."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    One connection pool per event loop behind a single async client.
+    
+    Pooled connections belong to the loop that opened them, so a client
+    shared by the app's loop, `asyncio.run` in benchmarks and the CLI, and
+    worker threads would hand a later loop sockets of a closed one ("Event
+    loop is closed"). Pools of closed loops are dropped on the next request.
+    """
+    
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._pools = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed in [other for other in self._pools if other.is_closed()]:
+                del self._pools[closed]
+            if loop not in self._pools:
+                self._pools[loop] = httpx.AsyncHTTPTransport(**self._kwargs)
+            return self._pools[loop]
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+    
+    async def aclose(self):
+        with self._lock:
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive httpx client shared by every async Groq call (one pool per event loop)."""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(transport=LoopLocalTransport(limits=_limits()), timeout=_timeout())
+        return _async_http_client
+
+
+def get_groq(api_key: str = None):
+    """Shared groq.Groq SDK client (retries are done by the scheduler, not the SDK)."""
+    global _groq
+    from groq import Groq
+    if _groq is None:
+        _groq = Groq(api_key=api_key or os.getenv("GROQ_API_KEY"), http_client=get_http_client(), max_retries=0)
+    return _groq
+
+
+def get_async_groq(api_key: str = None):
+    """Shared groq.AsyncGroq SDK client."""
+    global _async_groq
+    from groq import AsyncGroq
+    if _async_groq is None:
+        _async_groq = AsyncGroq(api_key=api_key or os.getenv("GROQ_API_KEY"), http_client=get_async_http_client(), max_retries=0)
+    return _async_groq
+
+
+def make_chat_groq(**kwargs):
+    """ChatGroq on the shared HTTP clients, with SDK retries left to the scheduler."""
+    from langchain_groq import ChatGroq
+    return ChatGroq(http_client=get_http_client(), http_async_client=get_async_http_client(), max_retries=0, **kwargs)
+
+
+# Defaults follow Groq's free-tier limits for llama-3.3-70b and whisper-large-v3
+SCHEDULER_DEFAULTS = {
+    "llm": ("NIVA_GROQ_LLM_RPM", "30", "NIVA_GROQ_LLM_TPM", "12000"),
+    "whisper": ("NIVA_GROQ_WHISPER_RPM", "20", None, None),
+}
+
+
+def get_scheduler(name: str) -> GroqScheduler:
+    """Shared scheduler for "llm" or "whisper", configured from the environment."""
+    with _lock:
+        if name not in _schedulers:
+            rpm_var, rpm_default, tpm_var, tpm_default = SCHEDULER_DEFAULTS[name]
+            _schedulers[name] = GroqScheduler(
+                name,
+                requests_per_minute=float(os.getenv(rpm_var, rpm_default)),
+                tokens_per_minute=float(os.getenv(tpm_var, tpm_default)) if tpm_var else None,
+                max_retries=int(os.getenv("NIVA_GROQ_MAX_RETRIES", "4")),
+            )
+        return _schedulers[name]
+
+
+def stats() -> dict:
+    """Scheduler metrics (calls, retries, throttling and queue wait per priority) by endpoint."""
+    with _lock:
+        schedulers = dict(_schedulers)
+    return {name: s.stats() for name, s in schedulers.items()}
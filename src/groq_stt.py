@@ -2,7 +2,13 @@
 Groq Whisper STT with local Telugu fallback.
 Primary: Groq API (whisper-large-v3)
 Fallback: Local Hugging Face model for Telugu
+
+Both a blocking API (transcribe, transcribe_numpy) and an asyncio API
+(atranscribe_numpy) are provided; the async one keeps the event loop free
+while the upload is in flight.
 """
+import asyncio
+import io
 import os
 import tempfile
 import numpy as np
@@ -10,6 +16,9 @@ from scipy.io import wavfile
 from scipy import signal
 from dotenv import load_dotenv
 
+from .groq_client import get_groq, get_async_groq, get_scheduler, PRIORITY_VOICE
+from .tracing import span, traced
+
 load_dotenv()
 
 
@@ -21,8 +30,9 @@ class GroqWhisperSTT:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment")
         
-        from groq import Groq
-        self.client = Groq(api_key=self.api_key)
+        self.client = get_groq(self.api_key)
+        self.async_client = get_async_groq(self.api_key)
+        self.scheduler = get_scheduler("whisper")
         self.use_local_fallback = use_local_fallback
         self.local_model = None
         print("✅ Groq Whisper STT initialized!")
@@ -40,16 +50,26 @@ class GroqWhisperSTT:
             print("✅ Local Telugu model loaded!")
         return self.local_model
     
+    def unload_local_model(self) -> bool:
+        """Release the local fallback model (it is reloaded on the next fallback)."""
+        if self.local_model is None:
+            return False
+        self.local_model = None
+        print("♻️ Local Telugu model unloaded")
+        return True
+    
     def transcribe(self, audio_path: str, language: str = "te") -> dict:
         """Transcribe audio file using Groq API."""
         try:
             with open(audio_path, "rb") as audio_file:
-                transcription = self.client.audio.transcriptions.create(
-                    file=(audio_path, audio_file.read()),
+                audio_bytes = audio_file.read()
+            with span("stt.whisper"):
+                transcription = self.scheduler.call(lambda: self.client.audio.transcriptions.create(
+                    file=(audio_path, audio_bytes),
                     model="whisper-large-v3",
                     language=language,
                     response_format="verbose_json"
-                )
+                ), level=PRIORITY_VOICE)
             return {"text": transcription.text, "language": language, "source": "groq"}
         except Exception as e:
             print(f"Groq API error: {e}")
@@ -57,6 +77,7 @@ class GroqWhisperSTT:
                 return self._transcribe_local(audio_path)
             return {"text": "", "language": language, "error": str(e)}
     
+    @traced("stt.local")
     def _transcribe_local(self, audio_path: str) -> dict:
         """Fallback to local Telugu model."""
         try:
@@ -66,13 +87,13 @@ class GroqWhisperSTT:
         except Exception as e:
             return {"text": "", "language": "te", "error": str(e)}
     
-    def transcribe_numpy(self, audio_data: np.ndarray, sample_rate: int = 16000, language: str = "te") -> dict:
-        """Transcribe numpy audio array."""
+    @traced("stt.resample")
+    def _prepare_audio(self, audio_data: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+        """Resample to 16kHz mono int16."""
         # Resample to 16kHz if needed
         if sample_rate != 16000:
             num_samples = int(len(audio_data) * 16000 / sample_rate)
             audio_data = signal.resample(audio_data, num_samples)
-            sample_rate = 16000
         
         # Handle stereo
         if len(audio_data.shape) > 1:
@@ -82,16 +103,58 @@ class GroqWhisperSTT:
         if audio_data.dtype == np.float32 or audio_data.dtype == np.float64:
             audio_data = (audio_data * 32767).astype(np.int16)
         
+        return audio_data
+    
+    @traced("stt")
+    def transcribe_numpy(self, audio_data: np.ndarray, sample_rate: int = 16000, language: str = "te") -> dict:
+        """Transcribe numpy audio array."""
+        audio_data = self._prepare_audio(audio_data, sample_rate)
+        
         # Save to temp file and transcribe
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
             temp_path = f.name
-            wavfile.write(temp_path, sample_rate, audio_data)
+            wavfile.write(temp_path, 16000, audio_data)
         
         try:
             return self.transcribe(temp_path, language)
         finally:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
+    
+    def _to_wav_bytes(self, audio_data: np.ndarray, sample_rate: int) -> bytes:
+        buffer = io.BytesIO()
+        wavfile.write(buffer, 16000, self._prepare_audio(audio_data, sample_rate))
+        return buffer.getvalue()
+    
+    @traced("stt")
+    async def atranscribe_numpy(self, audio_data: np.ndarray, sample_rate: int = 16000, language: str = "te",
+                                use_fallback: bool = True) -> dict:
+        """Async version of transcribe_numpy (resampling runs in a worker thread)."""
+        wav_bytes = await asyncio.to_thread(self._to_wav_bytes, audio_data, sample_rate)
+        try:
+            with span("stt.whisper"):
+                transcription = await self.scheduler.acall(lambda: self.async_client.audio.transcriptions.create(
+                    file=("audio.wav", wav_bytes),
+                    model="whisper-large-v3",
+                    language=language,
+                    response_format="verbose_json"
+                ), level=PRIORITY_VOICE)
+            return {"text": transcription.text, "language": language, "source": "groq"}
+        except Exception as e:
+            print(f"Groq API error: {e}")
+            if use_fallback and self.use_local_fallback and language == "te":
+                return await asyncio.to_thread(self._transcribe_local_bytes, wav_bytes)
+            return {"text": "", "language": language, "error": str(e)}
+    
+    def _transcribe_local_bytes(self, wav_bytes: bytes) -> dict:
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            temp_path = f.name
+            f.write(wav_bytes)
+        try:
+            return self._transcribe_local(temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
 
 # Alias for backward compatibility
@@ -2,59 +2,110 @@
 LangGraph-based Agentic Workflow for Government Schemes.
 
 Architecture:
-- Planner: Intent detection + parameter extraction
-- Executor: ChromaDB search + eligibility tools  
-- Synthesizer: LLM response generation
+- Planner: Intent detection (local classifier, keyword fallback) + parameter extraction
+- Executor: ChromaDB search + eligibility tools (several tool calls run in parallel)
+- Synthesizer: LLM response generation (cached for deterministic intents)
 - Conditional routing for missing info
 """
 import os
-import re
-from typing import TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, TypedDict
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from .tools import check_eligibility, get_all_schemes, compare_schemes, calculate_benefits, get_application_steps, get_schemes_by_sector
 from .vector_store import get_vector_store
+from .extractor import get_extractor
+from .intent_classifier import get_intent_classifier, pick_intent
+from .renderer import render, render_compact
+from .prompt_builder import build_prompt
+from .groq_client import current_priority
+from .llm_providers import router_from_env
+from .checkpointer import from_env as checkpoints_from_env
+from .speculation import Speculator
+from .tracing import add_collector, get_tracer, in_context, span, traced
+from .single_flight import SingleFlight, normalize_text, enabled_from_env as single_flight_enabled
+from .response_cache import CACHEABLE_INTENTS, FACTUAL_INTENTS, make_key, from_env as response_cache_from_env
 
 load_dotenv()
 
 
+HISTORY_LIMIT = 20
+
+
+def add_history(existing: list, new: list) -> list:
+    """Reducer for conversation_history: append the turn, keep the last HISTORY_LIMIT messages."""
+    return (existing + new)[-HISTORY_LIMIT:]
+
+
 class AgentState(TypedDict):
     user_input: str
     language: str
-    conversation_history: list
+    conversation_history: Annotated[list, add_history]
+    user_context: dict  # params remembered across the session's turns
     intent: str
+    intents: list  # primary intent first, then any further parts of the question
+    intent_confidence: float
     requires_info: bool
     missing_info: list
     extracted_params: dict
-    tool_to_use: str
-    tool_results: str
+    tool_calls: list  # [{"intent", "tool", "args"}]
+    tool_results: list  # typed result objects from tools.py / vector store, one per call
     final_response: str
+    priority: int  # groq_client priority of the turn (voice / chat / batch)
+
+
+INTENT_TOOLS = {"search": "vector_search", "eligibility": "check_eligibility", "compare": "compare_schemes",
+                "calculate": "calculate_benefits", "apply": "get_application_steps", "sector": "get_schemes_by_sector",
+                "all": "get_all_schemes"}
+MAX_TOOL_CALLS = 3
+
+TOOLS = {
+    "check_eligibility": check_eligibility,
+    "compare_schemes": compare_schemes,
+    "calculate_benefits": calculate_benefits,
+    "get_application_steps": get_application_steps,
+    "get_schemes_by_sector": get_schemes_by_sector,
+    "get_all_schemes": get_all_schemes,
+}
 
 
 class AgentWorkflow:
     """LangGraph agent with conditional routing."""
     
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not found")
-        
-        self.llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key, temperature=0.3, max_tokens=1024)
+    def __init__(self, response_cache=None, template_answers: bool = None, llm_router=None, checkpoints=None):
+        self.llm_router = llm_router if llm_router is not None else router_from_env()
+        if not any(p.available() for p in self.llm_router.providers.values()):
+            print("⚠️ No LLM provider configured (GROQ_API_KEY / NIVA_LOCAL_MODEL_PATH), answering from templates")
         self.vector_store = get_vector_store()
+        self.extractor = get_extractor()
+        use_classifier = os.getenv("NIVA_INTENT_CLASSIFIER", "1").lower() in ("1", "true", "yes")
+        self.intent_classifier = get_intent_classifier() if use_classifier else None
+        self.intent_threshold = float(os.getenv("NIVA_INTENT_THRESHOLD", "0.6"))
+        self.intent_override = float(os.getenv("NIVA_INTENT_OVERRIDE", "0.9"))
+        self.response_cache = response_cache if response_cache is not None else response_cache_from_env()
+        if template_answers is None:
+            template_answers = os.getenv("NIVA_TEMPLATE_ANSWERS", "0").lower() in ("1", "true", "yes")
+        self.template_answers = template_answers
+        # Identical concurrent tool calls and LLM prompts share one computation
+        self.tool_flight = SingleFlight("tools", enabled=single_flight_enabled())
+        self.llm_flight = SingleFlight("llm", enabled=single_flight_enabled())
+        self.tool_pool = ThreadPoolExecutor(max_workers=MAX_TOOL_CALLS, thread_name_prefix="niva-tool")
+        self.speculator = Speculator(self._run_tool, self.tool_pool,
+                                     threshold=float(os.getenv("NIVA_SPECULATION_THRESHOLD", "0.7")))
+        add_collector("speculation", self.speculator.render, self.speculator.stats)
+        # One compiled graph for every session; per-session state lives in the checkpointer
+        self.checkpoints = checkpoints if checkpoints is not None else checkpoints_from_env()
         self.graph = self._build_graph()
         self.current_language = "te"
-        self.conversation_history = []
-        self.user_context = {}
         print("✅ LangGraph Agent initialized!")
     
     def _build_graph(self):
         workflow = StateGraph(AgentState)
         workflow.add_node("planner", self._planner)
         workflow.add_node("executor", self._executor)
-        workflow.add_node("synthesizer", self._synthesizer)
+        workflow.add_node("synthesizer", RunnableLambda(self._synthesizer, afunc=self._asynthesizer))
         workflow.add_node("ask_info", self._ask_info)
         
         workflow.add_conditional_edges("planner", self._route, {"ask_info": "ask_info", "executor": "executor", "synthesizer": "synthesizer"})
@@ -62,163 +113,307 @@ class AgentWorkflow:
         workflow.add_edge("ask_info", END)
         workflow.add_edge("synthesizer", END)
         workflow.set_entry_point("planner")
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpoints.saver)
     
     def _route(self, state: AgentState) -> str:
         if state["requires_info"] and state["missing_info"]:
             return "ask_info"
         return "synthesizer" if state["intent"] == "greet" else "executor"
     
-    def _extract_params(self, text: str) -> dict:
-        params = {}
-        lower = text.lower()
-        
-        # Age
-        age_match = re.search(r'\b(\d{1,2})\s*(?:years|సంవత్సరాలు|వయస్సు|ఏళ్ళు)', text, re.IGNORECASE)
-        if age_match:
-            params['age'] = int(age_match.group(1))
-        elif re.search(r'\b(\d{2})\b', text):
-            age = int(re.search(r'\b(\d{2})\b', text).group(1))
-            if 18 <= age <= 80:
-                params['age'] = age
-        
-        # Income
-        income_match = re.search(r'₹?\s*(\d+(?:,\d+)*)', text)
-        if income_match:
-            income = int(income_match.group(1).replace(',', ''))
-            params['income'] = income * 100000 if income < 100 else income
-        
-        # Occupation
-        if any(w in lower for w in ['farmer', 'రైతు', 'agriculture']):
-            params['occupation'] = 'farmer'
-        
-        # Scheme name
-        scheme_map = {'kisan': 'pm_kisan', 'కిసాన్': 'pm_kisan', 'awas': 'pm_awas', 'ఆవాస్': 'pm_awas',
-                      'ayushman': 'ayushman_bharat', 'ఆయుష్మాన్': 'ayushman_bharat', 'jan dhan': 'pm_jan_dhan',
-                      'suraksha': 'pm_suraksha', 'సురక్ష': 'pm_suraksha', 'ujjwala': 'pm_ujjwala'}
-        for kw, sid in scheme_map.items():
-            if kw in lower:
-                params['scheme_name'] = sid
-                break
-        
-        return params
+    @traced("planner")
+    def _planner(self, state: AgentState) -> dict:
+        plan = self._plan(state["user_input"], state["language"], state.get("user_context", {}))
+        get_tracer().annotate(intent=plan["intent"])
+        return plan
     
-    def _planner(self, state: AgentState) -> AgentState:
-        text = state["user_input"]
-        lower = text.lower()
-        
-        params = self._extract_params(text)
-        for k, v in self.user_context.items():
-            if k not in params:
-                params[k] = v
-        self.user_context.update(params)
-        state["extracted_params"] = params
+    def _plan(self, text: str, language: str, user_context: dict) -> dict:
+        # One pass over the input: intent, confidence and all params
+        extraction = self.extractor.extract(text)
+        params = {**user_context, **extraction.params}
         
-        # Intent detection
-        intent, requires_info, missing = "search", False, []
-        
-        if any(w in lower for w in ['hello', 'hi', 'నమస్కారం', 'హలో']):
-            intent = "greet"
-        elif any(w in lower for w in ['compare', 'vs', 'పోలిక']):
-            intent = "compare"
-        elif any(w in lower for w in ['how much', 'calculate', 'ఎంత']):
-            intent = "calculate"
-        elif any(w in lower for w in ['apply', 'process', 'దరఖాస్తు']):
-            intent = "apply"
-        elif any(w in lower for w in ['eligible', 'అర్హత', 'నాకు వస్తుందా']):
-            intent = "eligibility"
+        intent, confidence = self._detect_intent(text, extraction)
+        intents = [intent] + [i for i in extraction.intents if i != intent and i in INTENT_TOOLS and intent in INTENT_TOOLS]
+        intents = intents[:MAX_TOOL_CALLS]
+        requires_info, missing = False, []
+        if intent == "clarify":
+            missing.append('intent')
+            requires_info = True
+        elif "eligibility" in intents:
             if 'scheme_name' not in params:
                 missing.append('scheme_name')
             if 'age' not in params:
                 missing.append('age')
             requires_info = bool(missing)
-        elif any(w in lower for w in ['agriculture', 'health', 'housing', 'విభాగం']):
-            intent = "sector"
-        elif any(w in lower for w in ['all schemes', 'అన్ని యోజన', 'జాబితా']):
-            intent = "all"
         
-        state["intent"] = intent
-        state["requires_info"] = requires_info
-        state["missing_info"] = missing
-        state["tool_to_use"] = {"search": "vector_search", "eligibility": "check_eligibility", "compare": "compare_schemes",
-                                "calculate": "calculate_benefits", "apply": "get_application_steps", "sector": "get_schemes_by_sector",
-                                "all": "get_all_schemes", "greet": "none"}.get(intent, "vector_search")
-        return state
-    
-    def _ask_info(self, state: AgentState) -> AgentState:
+        tool_calls = [{"intent": i, "tool": INTENT_TOOLS[i], "args": self._tool_args(INTENT_TOOLS[i], text, language, params)}
+                      for i in intents if i in INTENT_TOOLS]
+        return {"user_context": params, "extracted_params": params, "intent": intent, "intents": intents,
+                "intent_confidence": confidence, "requires_info": requires_info, "missing_info": missing,
+                "tool_calls": tool_calls, "tool_results": []}
+    
+    def _detect_intent(self, text: str, extraction) -> tuple:
+        """Pick the intent: keyword rules when they fired, the local classifier otherwise."""
+        return pick_intent(self.intent_classifier, text, extraction, self.intent_threshold, self.intent_override)
+    
+    def _tool_args(self, tool: str, text: str, lang: str, params: dict) -> dict:
+        """Resolve the arguments the executor will pass to `tool`."""
+        if tool == "check_eligibility":
+            return {"scheme_name": params.get('scheme_name', text), "age": params.get('age', 30),
+                    "annual_income": params.get('income', 100000), "occupation": params.get('occupation'), "language": lang}
+        if tool == "compare_schemes":
+            return {"scheme1": "PM Kisan", "scheme2": "PM Awas", "language": lang}
+        if tool in ("calculate_benefits", "get_application_steps"):
+            return {"scheme_name": params.get('scheme_name', text), "language": lang}
+        if tool == "get_schemes_by_sector":
+            return {"sector": params.get('sector', "agriculture"), "language": lang}
+        if tool == "get_all_schemes":
+            return {"language": lang}
+        return {"query": text, "language": lang, "n_results": 3}
+    
+    def _turn(self, state: AgentState, response: str) -> dict:
+        """Final update of a turn: the response, the turn appended to the history, tool results dropped."""
+        return {"final_response": response, "tool_results": [],
+                "conversation_history": [{"role": "user", "content": state["user_input"]}, {"role": "assistant", "content": response}]}
+    
+    def _ask_info(self, state: AgentState) -> dict:
         lang, missing = state["language"], state["missing_info"]
         questions = {
-            "te": {'scheme_name': "ఏ యోజన కోసం?", 'age': "మీ వయస్సు?"},
-            "en": {'scheme_name': "Which scheme?", 'age': "Your age?"}
+            "te": {'scheme_name': "ఏ యోజన కోసం?", 'age': "మీ వయస్సు?",
+                   'intent': "మీకు ఏమి కావాలి? యోజనల జాబితా, అర్హత, లాభాలు లేదా దరఖాస్తు విధానం?"},
+            "en": {'scheme_name': "Which scheme?", 'age': "Your age?",
+                   'intent': "What would you like to know? Scheme list, eligibility, benefits or how to apply?"}
         }
         response = "🤔 " + ("కొంత సమాచారం అవసరం:\n" if lang == "te" else "Need some info:\n")
         for info in missing:
             response += f"❓ {questions[lang].get(info, info)}\n"
-        state["final_response"] = response
-        return state
+        return self._turn(state, response)
     
-    def _executor(self, state: AgentState) -> AgentState:
-        tool, text, lang, params = state["tool_to_use"], state["user_input"], state["language"], state["extracted_params"]
-        
-        if tool == "none":
-            state["tool_results"] = ""
-        elif tool == "vector_search":
-            state["tool_results"] = self.vector_store.search(text, language=lang, n_results=3)
-        elif tool == "check_eligibility":
-            state["tool_results"] = check_eligibility.invoke({"scheme_name": params.get('scheme_name', text), 
-                "age": params.get('age', 30), "annual_income": params.get('income', 100000), 
-                "occupation": params.get('occupation'), "language": lang})
-        elif tool == "compare_schemes":
-            state["tool_results"] = compare_schemes.invoke({"scheme1": "PM Kisan", "scheme2": "PM Awas", "language": lang})
-        elif tool == "calculate_benefits":
-            state["tool_results"] = calculate_benefits.invoke({"scheme_name": params.get('scheme_name', text), "language": lang})
-        elif tool == "get_application_steps":
-            state["tool_results"] = get_application_steps.invoke({"scheme_name": params.get('scheme_name', text), "language": lang})
-        elif tool == "get_schemes_by_sector":
-            sector = next((s for s in ['agriculture', 'health', 'housing', 'finance', 'insurance', 'energy'] if s in text.lower()), "agriculture")
-            state["tool_results"] = get_schemes_by_sector.invoke({"sector": sector, "language": lang})
-        elif tool == "get_all_schemes":
-            state["tool_results"] = get_all_schemes.invoke({"language": lang})
+    def _call_tool(self, call: dict):
+        if call["tool"] in TOOLS:
+            return TOOLS[call["tool"]].invoke(call["args"])
+        return self.vector_store.search(**call["args"])
+    
+    def _run_tool(self, call: dict):
+        args = call["args"]
+        if "query" in args:
+            args = {**args, "query": normalize_text(args["query"])}
+        key = make_key(call["tool"], args, args.get("language"))
+        with span(f"tool.{call['tool']}"):
+            return self.tool_flight.do(key, lambda: self._call_tool(call))
+    
+    @traced("executor")
+    def _executor(self, state: AgentState, config) -> dict:
+        calls = state["tool_calls"]
+        session_id = config["configurable"].get("thread_id", "default")
+        speculated = [self.speculator.take(session_id, call) for call in calls]
+        missing = [call for call, future in zip(calls, speculated) if future is None]
+        if len(missing) <= 1:
+            computed = iter([self._run_tool(call) for call in missing])
         else:
-            state["tool_results"] = self.vector_store.search(text, language=lang)
+            # Multi-part question: fan the tool calls out, one synthesis afterwards
+            computed = iter(self.tool_pool.map(in_context(self._run_tool), missing))
+        return {"tool_results": [future.result() if future is not None else next(computed) for future in speculated]}
+    
+    def speculate(self, partial_text: str, session_id: str = "default") -> bool:
+        """
+        Plan on a partial transcript and start its tool calls in the background.
         
-        return state
+        The next turn of the session reuses the results where its final plan
+        makes the same calls. Returns True if anything was started.
+        """
+        user_context = {}
+        if self.checkpoints.saver is not None:
+            user_context = self.graph.get_state(self.checkpoints.config(session_id)).values.get("user_context", {})
+        plan = self._plan(partial_text, self._detect_language(partial_text), user_context)
+        started = self.speculator.speculate(session_id, plan)
+        if started:
+            print(f"⚡ Speculating {[c['tool'] for c in plan['tool_calls']]} from partial transcript")
+        return started
     
-    def _synthesizer(self, state: AgentState) -> AgentState:
+    def _prepare_synthesis(self, state: AgentState):
+        """
+        Decide how to answer.
+        
+        Returns (answer, None, None) when no LLM call is needed (greeting,
+        templated or cached answer), otherwise (None, PromptPlan, cache_key).
+        """
         intent, lang, text, results = state["intent"], state["language"], state["user_input"], state["tool_results"]
+        intents = state["intents"]
         
         if intent == "greet":
-            state["final_response"] = "నమస్కారం! 🙏 నేను NIVA. ఏ యోజన గురించి తెలుసుకోవాలి?" if lang == "te" else "Hello! 🙏 I'm NIVA. Which scheme would you like to know about?"
-            return state
+            return ("నమస్కారం! 🙏 నేను NIVA. ఏ యోజన గురించి తెలుసుకోవాలి?" if lang == "te" else "Hello! 🙏 I'm NIVA. Which scheme would you like to know about?"), None, None
         
-        prompt = f"""మీరు NIVA. తెలుగులో మాత్రమే 4-6 వాక్యాలలో సమాధానం ఇవ్వండి.
-సమాచారం: {results}""" if lang == "te" else f"""You are NIVA. Reply in English only, 4-6 sentences.
-Info: {results}"""
+        if self.template_answers and all(i in FACTUAL_INTENTS for i in intents):
+            return "\n\n".join(render(r) for r in results), None, None
         
-        response = self.llm.invoke([SystemMessage(content=prompt), HumanMessage(content=text)])
-        state["final_response"] = response.content
-        return state
+        cache_key = None
+        if all(i in CACHEABLE_INTENTS for i in intents):
+            cache_key = make_key("+".join(intents), {c["tool"]: c["args"] for c in state["tool_calls"]}, lang)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached, None, None
+        
+        if len(results) == 1:
+            info = render_compact(results[0])
+        else:
+            info = "\n\n".join(f"[{call['intent']}]\n{render_compact(r)}" for call, r in zip(state["tool_calls"], results))
+        # Cached answers must not depend on the conversation, so they get no history
+        history = [] if cache_key is not None else state.get("conversation_history", [])
+        plan = build_prompt(intents, lang, text, info, history)
+        return None, plan, cache_key
+    
+    def _log_tokens(self, provider, plan, message):
+        usage = getattr(message, "usage_metadata", None) or {}
+        print(f"🔢 Tokens ({provider.name}): prompt≈{plan.prompt_tokens} in={usage.get('input_tokens', '?')} "
+              f"out={usage.get('output_tokens', '?')} max={plan.max_tokens} "
+              f"history={plan.history_used} dropped_lines={plan.dropped_lines}")
+    
+    def _template_answer(self, state: AgentState) -> str:
+        print("⚠️ No LLM provider available, answering from templates")
+        return "\n\n".join(render(r) for r in state["tool_results"])
+    
+    def _llm_key(self, state: AgentState, plan) -> tuple:
+        return ("+".join(state["intents"]), plan.max_tokens,
+                tuple((m.type, normalize_text(m.content)) for m in plan.messages))
+    
+    def _generate(self, state: AgentState, plan, cache_key):
+        """Answer from the first LLM provider that succeeds; None if all fail."""
+        for provider in self.llm_router.candidates(state["intent"]):
+            try:
+                with span("llm", provider=provider.name):
+                    message = provider.invoke(plan.messages, plan.max_tokens, state["priority"])
+            except Exception as e:
+                self.llm_router.report_failure(provider, e)
+                continue
+            self._log_tokens(provider, plan, message)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, message.content)
+            return message.content
+        return None
+    
+    async def _agenerate(self, state: AgentState, plan, cache_key):
+        for provider in self.llm_router.candidates(state["intent"]):
+            try:
+                with span("llm", provider=provider.name):
+                    message = await provider.ainvoke(plan.messages, plan.max_tokens, state["priority"])
+            except Exception as e:
+                self.llm_router.report_failure(provider, e)
+                continue
+            self._log_tokens(provider, plan, message)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, message.content)
+            return message.content
+        return None
+    
+    @traced("synthesizer")
+    def _synthesizer(self, state: AgentState) -> dict:
+        answer, plan, cache_key = self._prepare_synthesis(state)
+        if plan is not None:
+            answer = self.llm_flight.do(self._llm_key(state, plan), lambda: self._generate(state, plan, cache_key))
+            if answer is None:
+                answer = self._template_answer(state)
+        return self._turn(state, answer)
     
-    def process(self, user_input: str) -> dict:
+    @traced("synthesizer")
+    async def _asynthesizer(self, state: AgentState) -> dict:
+        answer, plan, cache_key = self._prepare_synthesis(state)
+        if plan is not None:
+            answer = await self.llm_flight.ado(self._llm_key(state, plan), lambda: self._agenerate(state, plan, cache_key))
+            if answer is None:
+                answer = self._template_answer(state)
+        return self._turn(state, answer)
+    
+    def flight_stats(self) -> dict:
+        """Coalescing counters of the tool and LLM single-flight layers."""
+        return {"tools": self.tool_flight.stats(), "llm": self.llm_flight.stats()}
+    
+    @staticmethod
+    def _detect_language(text: str) -> str:
         # Auto-detect language from input text (Telugu Unicode range check)
-        has_telugu = any('\u0C00' <= c <= '\u0C7F' for c in user_input)
-        lang = "te" if has_telugu else "en"
-        
-        state = {"user_input": user_input, "language": lang, "conversation_history": self.conversation_history,
-                 "intent": "", "requires_info": False, "missing_info": [], "extracted_params": {},
-                 "tool_to_use": "", "tool_results": "", "final_response": ""}
+        return "te" if any('\u0C00' <= c <= '\u0C7F' for c in text) else "en"
+    
+    def _turn_input(self, user_input: str, priority: int = None) -> dict:
+        """Graph input for a turn; everything else comes from the session's checkpoint."""
+        return {"user_input": user_input, "language": self._detect_language(user_input),
+                "priority": current_priority() if priority is None else priority}
+    
+    def _finish(self, final: dict, session_id: str) -> dict:
+        self.speculator.finish(session_id)
+        self.checkpoints.compact(session_id)
+        return {"response": final["final_response"], "language": final["language"], "intent": final["intent"]}
+    
+    def process(self, user_input: str, priority: int = None, session_id: str = "default") -> dict:
+        with get_tracer().turn():
+            final = self.graph.invoke(self._turn_input(user_input, priority), self.checkpoints.config(session_id), durability=self.checkpoints.durability)
+            return self._finish(final, session_id)
+    
+    def process_stream(self, user_input: str, priority: int = None, session_id: str = "default"):
+        """
+        Stream a turn through the graph.
         
-        final = self.graph.invoke(state)
+        Yields {"type": "token", "content": ...} for each LLM token of the
+        synthesizer, then one {"type": "done", "response", "language", "intent"}
+        event. Cached, templated and ask-info answers, and answers shared with
+        an identical request already in flight, produce no tokens and arrive
+        whole in the "done" event. A {"type": "reset"} just before "done"
+        means the tokens were not the answer (a provider failed mid-stream):
+        discard them and use the "done" response. `priority` is the groq_client
+        priority for the LLM call (defaults to the caller's context);
+        `session_id` selects the session's checkpointed state.
+        """
+        final, streamed = None, ""
+        with get_tracer().turn():
+            for mode, payload in self.graph.stream(self._turn_input(user_input, priority), self.checkpoints.config(session_id),
+                                                   stream_mode=["messages", "values"], durability=self.checkpoints.durability):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    if metadata.get("langgraph_node") == "synthesizer" and chunk.content:
+                        streamed += chunk.content
+                        yield {"type": "token", "content": chunk.content}
+                else:
+                    final = payload
+            done = self._finish(final, session_id)
         
-        self.conversation_history.extend([{"role": "user", "content": user_input}, {"role": "assistant", "content": final["final_response"]}])
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
+        if streamed and streamed.strip() != done["response"].strip():
+            # A provider failed mid-answer (then another one or the templates answered): drop what was streamed
+            yield {"type": "reset"}
+        yield {"type": "done", **done}
+    
+    async def aprocess(self, user_input: str, priority: int = None, session_id: str = "default") -> dict:
+        """Async version of process (uses the graph's ainvoke and the async LLM client)."""
+        with get_tracer().turn():
+            final = await self.graph.ainvoke(self._turn_input(user_input, priority), self.checkpoints.config(session_id), durability=self.checkpoints.durability)
+            return self._finish(final, session_id)
+    
+    async def aprocess_stream(self, user_input: str, priority: int = None, session_id: str = "default"):
+        """Async version of process_stream; yields the same events."""
+        final, streamed = None, ""
+        with get_tracer().turn():
+            async for mode, payload in self.graph.astream(self._turn_input(user_input, priority), self.checkpoints.config(session_id),
+                                                          stream_mode=["messages", "values"], durability=self.checkpoints.durability):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    if metadata.get("langgraph_node") == "synthesizer" and chunk.content:
+                        streamed += chunk.content
+                        yield {"type": "token", "content": chunk.content}
+                else:
+                    final = payload
+            done = self._finish(final, session_id)
         
-        return {"response": final["final_response"], "language": lang, "intent": final["intent"]}
+        if streamed and streamed.strip() != done["response"].strip():
+            # A provider failed mid-answer (then another one or the templates answered): drop what was streamed
+            yield {"type": "reset"}
+        yield {"type": "done", **done}
+    
+    def history(self, session_id: str = "default") -> list:
+        """The session's recent messages as {"role", "content"} dicts."""
+        if self.checkpoints.saver is None:
+            return []
+        return list(self.graph.get_state(self.checkpoints.config(session_id)).values.get("conversation_history", []))
     
-    def clear_history(self):
-        self.conversation_history = []
-        self.user_context = {}
+    def clear_history(self, session_id: str = "default"):
+        self.checkpoints.clear(session_id)
 
 
 SchemeAgent = AgentWorkflow
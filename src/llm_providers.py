@@ -0,0 +1,230 @@
+"""
+Pluggable LLM backends for the synthesizer.
+
+Providers:
+    groq  - llama-3.3-70b on Groq (shared pooled client + rate-limit scheduler)
+    local - a small quantized GGUF model on CPU via llama.cpp (optional:
+            pip install llama-cpp-python, set NIVA_LOCAL_MODEL_PATH)
+
+LLMRouter picks the providers to try for an intent: a per-intent choice
+first (NIVA_LLM_INTENT_PROVIDERS, e.g. "all:local,apply:local"), then the
+global order (NIVA_LLM_PROVIDERS, default "groq,local"). Providers that
+are not configured are skipped, and one that fails is skipped for a
+cooldown period (NIVA_LLM_COOLDOWN). Transient errors (timeouts, rate
+limits, 5xx, which the Groq scheduler has already retried) fail that one
+request over to the next provider without a cooldown, so one slow
+response doesn't leave a single-provider setup on templates. With no
+provider at all the agent answers from templates, so it runs with no
+GROQ_API_KEY and no network.
+"""
+import abc
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from .groq_client import get_scheduler, is_retryable, make_chat_groq
+from .prompt_builder import count_tokens
+
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+class ChatLlamaCpp(BaseChatModel):
+    """Minimal LangChain chat model over llama_cpp.Llama (supports token streaming)."""
+
+    model_path: str
+    n_ctx: int = 2048
+    n_threads: Optional[int] = None
+    temperature: float = 0.3
+    max_tokens: int = 256
+
+    _llama: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "llama-cpp"
+
+    def _client(self):
+        if self._llama is None:
+            from llama_cpp import Llama
+            print(f"Loading local model ({os.path.basename(self.model_path)})...")
+            self._llama = Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads, verbose=False)
+            print("✅ Local model loaded!")
+        return self._llama
+
+    def _request(self, messages: List[BaseMessage], stop, kwargs) -> dict:
+        return {
+            "messages": [{"role": _ROLES.get(m.type, "user"), "content": m.content} for m in messages],
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "stop": stop,
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # llama.cpp contexts are not safe to share between concurrent calls
+        with self._lock:
+            out = self._client().create_chat_completion(**self._request(messages, stop, kwargs))
+        usage = out.get("usage") or {}
+        message = AIMessage(content=out["choices"][0]["message"]["content"] or "", usage_metadata={
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        with self._lock:
+            for chunk in self._client().create_chat_completion(stream=True, **self._request(messages, stop, kwargs)):
+                token = chunk["choices"][0]["delta"].get("content")
+                if not token:
+                    continue
+                generation = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=generation)
+                yield generation
+
+
+class LLMProvider(abc.ABC):
+    """One LLM backend. Subclasses build `self.model` (a LangChain chat model) lazily."""
+
+    name = "base"
+
+    def __init__(self):
+        self._model = None
+
+    @abc.abstractmethod
+    def available(self) -> bool:
+        """Whether the backend is configured (key, model file, package)."""
+
+    @abc.abstractmethod
+    def build(self) -> BaseChatModel:
+        """The chat model, built on first use."""
+
+    def is_transient(self, error: Exception) -> bool:
+        """Whether `error` is worth trying again soon rather than cooling the provider down."""
+        return isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError))
+
+    @property
+    def model(self) -> BaseChatModel:
+        if self._model is None:
+            self._model = self.build()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def unload(self) -> bool:
+        """Drop the built model; it is rebuilt on next use."""
+        if self._model is None:
+            return False
+        self._model = None
+        return True
+
+    def invoke(self, messages: list, max_tokens: int, priority: int = None) -> AIMessage:
+        return self.model.invoke(messages, max_tokens=max_tokens)
+
+    async def ainvoke(self, messages: list, max_tokens: int, priority: int = None) -> AIMessage:
+        return await self.model.ainvoke(messages, max_tokens=max_tokens)
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, model: str = "llama-3.3-70b-versatile", api_key: str = None):
+        super().__init__()
+        self.model_name = model
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.scheduler = get_scheduler("llm")
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def is_transient(self, error: Exception) -> bool:
+        return is_retryable(error) or super().is_transient(error)
+
+    def build(self) -> BaseChatModel:
+        return make_chat_groq(model=self.model_name, api_key=self.api_key, temperature=0.3, max_tokens=1024)
+
+    def invoke(self, messages: list, max_tokens: int, priority: int = None) -> AIMessage:
+        cost = sum(count_tokens(m.content) for m in messages) + max_tokens
+        return self.scheduler.call(lambda: self.model.invoke(messages, max_tokens=max_tokens), cost=cost, level=priority)
+
+    async def ainvoke(self, messages: list, max_tokens: int, priority: int = None) -> AIMessage:
+        cost = sum(count_tokens(m.content) for m in messages) + max_tokens
+        return await self.scheduler.acall(lambda: self.model.ainvoke(messages, max_tokens=max_tokens), cost=cost, level=priority)
+
+
+class LocalLlamaProvider(LLMProvider):
+    name = "local"
+
+    def __init__(self, model_path: str = None, n_threads: int = None):
+        super().__init__()
+        self.model_path = model_path or os.getenv("NIVA_LOCAL_MODEL_PATH", "")
+        self.n_threads = n_threads or (int(os.getenv("NIVA_LOCAL_THREADS")) if os.getenv("NIVA_LOCAL_THREADS") else None)
+
+    def available(self) -> bool:
+        return bool(self.model_path) and os.path.exists(self.model_path) and importlib.util.find_spec("llama_cpp") is not None
+
+    def build(self) -> BaseChatModel:
+        return ChatLlamaCpp(model_path=self.model_path, n_threads=self.n_threads,
+                            n_ctx=int(os.getenv("NIVA_LOCAL_CONTEXT", "2048")))
+
+
+PROVIDERS = {"groq": GroqProvider, "local": LocalLlamaProvider}
+
+
+class LLMRouter:
+    """Orders providers per intent and skips ones that recently failed."""
+
+    def __init__(self, providers: list, intent_providers: dict = None, cooldown_seconds: float = 30.0):
+        self.providers = {p.name: p for p in providers}
+        self.order = [p.name for p in providers]
+        self.intent_providers = intent_providers or {}
+        self.cooldown_seconds = cooldown_seconds
+        self._failed_at = {}
+
+    def candidates(self, intent: str) -> list:
+        names = [self.intent_providers[intent]] if intent in self.intent_providers else []
+        names += [n for n in self.order if n not in names]
+        now = time.monotonic()
+        return [self.providers[n] for n in names
+                if n in self.providers and self.providers[n].available()
+                and now - self._failed_at.get(n, float("-inf")) >= self.cooldown_seconds]
+
+    def mark_failed(self, provider: LLMProvider):
+        self._failed_at[provider.name] = time.monotonic()
+
+    def report_failure(self, provider: LLMProvider, error: Exception):
+        """A call failed: cool the provider down, unless the error was transient."""
+        transient = provider.is_transient(error)
+        print(f"⚠️ LLM provider {provider.name} failed{' (transient)' if transient else ''}: {error}")
+        if not transient:
+            self.mark_failed(provider)
+
+
+def _parse_intent_providers(value: str) -> dict:
+    pairs = (item.split(":", 1) for item in value.split(",") if ":" in item)
+    return {intent.strip(): name.strip() for intent, name in pairs}
+
+
+def router_from_env() -> LLMRouter:
+    """Build the router from NIVA_LLM_PROVIDERS / NIVA_LLM_INTENT_PROVIDERS / NIVA_LLM_COOLDOWN."""
+    names = [n.strip() for n in os.getenv("NIVA_LLM_PROVIDERS", "groq,local").split(",") if n.strip()]
+    unknown = [n for n in names if n not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown LLM provider(s): {', '.join(unknown)}")
+    return LLMRouter(
+        [PROVIDERS[n]() for n in names],
+        intent_providers=_parse_intent_providers(os.getenv("NIVA_LLM_INTENT_PROVIDERS", "")),
+        cooldown_seconds=float(os.getenv("NIVA_LLM_COOLDOWN", "30")),
+    )
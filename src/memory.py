@@ -0,0 +1,274 @@
+"""
+Memory accounting and budgets.
+
+Each component that holds memory (embedding model, fallback ASR, local
+LLM, intent classifier, response cache, conversation sessions, agent
+checkpoints) reports its approximate size; the process total is the RSS
+from /proc. Sizes are served next to the latency metrics when the metrics
+endpoint is on (NIVA_TRACING=prometheus): niva_memory_bytes{component=...}
+on /metrics and a JSON report on /metrics/memory.
+
+A governor thread enforces budgets every NIVA_MEMORY_CHECK_SECONDS:
+
+    NIVA_MEMORY_BUDGET_MB=0      no process budget (default), accounting only
+    NIVA_MEMORY_BUDGET_MB=1500   over this RSS, shrink components in order
+                                 until back under it: response cache, idle
+                                 persisted sessions, idle checkpoints, fallback ASR
+                                 model, local LLM
+    NIVA_MEMORY_BUDGETS=response_cache=64,conversations=128
+                                 per-component budgets (MB), shrunk on their own
+
+Sessions count as idle after NIVA_MEMORY_IDLE_SECONDS; active ones are
+never evicted. Unloaded models are loaded again on their next use.
+"""
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import threading
+from collections import Counter
+
+MB = 1024 * 1024
+
+
+def process_rss() -> int:
+    """Resident set size of this process in bytes (peak RSS where /proc is missing, 0 on Windows)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def module_bytes(module) -> int:
+    """Parameter and buffer bytes of a torch module (0 for anything else)."""
+    total = 0
+    for name in ("parameters", "buffers"):
+        tensors = getattr(module, name, None)
+        if callable(tensors):
+            total += sum(t.numel() * t.element_size() for t in tensors())
+    return total
+
+
+_libc = None
+
+
+def release():
+    """Collect garbage and hand freed heap back to the OS (glibc), so RSS actually drops."""
+    global _libc
+    gc.collect()
+    if _libc is None:
+        path = ctypes.util.find_library("c") if sys.platform.startswith("linux") else None
+        try:
+            _libc = ctypes.CDLL(path) if path else False
+        except OSError:
+            _libc = False
+    if _libc and hasattr(_libc, "malloc_trim"):
+        _libc.malloc_trim(0)
+
+
+class Component:
+    __slots__ = ("name", "size", "shrink")
+
+    def __init__(self, name: str, size, shrink=None):
+        self.name = name
+        self.size = size
+        self.shrink = shrink
+
+
+class MemoryGovernor:
+    """Sizes registered components and shrinks them when a budget is exceeded."""
+
+    def __init__(self, budget_bytes: int = 0, component_budgets: dict = None, interval: float = 30.0):
+        self.budget_bytes = budget_bytes
+        self.component_budgets = component_budgets or {}
+        self.interval = interval
+        self.shrinks = Counter()
+        self._components = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._over = False
+
+    def register(self, name: str, size, shrink=None):
+        """
+        size() returns bytes; shrink() frees what it can and returns a short
+        description, or None when there was nothing to free. Over the process
+        budget, components are shrunk in registration order.
+        """
+        self._components[name] = Component(name, size, shrink)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.budget_bytes or self.component_budgets)
+
+    def sizes(self) -> dict:
+        sizes = {}
+        for name, component in list(self._components.items()):
+            try:
+                sizes[name] = int(component.size())
+            except Exception:
+                sizes[name] = 0
+        return sizes
+
+    def report(self) -> dict:
+        return {"rss_bytes": process_rss(), "budget_bytes": self.budget_bytes,
+                "component_budgets": self.component_budgets, "components": self.sizes(),
+                "shrinks": dict(self.shrinks)}
+
+    def _shrink(self, name: str) -> bool:
+        component = self._components[name]
+        if component.shrink is None:
+            return False
+        freed = component.shrink()
+        if freed:
+            self.shrinks[name] += 1
+            print(f"♻️ Memory: {name}: {freed}")
+        return bool(freed)
+
+    def enforce(self) -> list:
+        """Shrink components over their own budget, then, over the process budget, in order until under it."""
+        with self._lock:
+            shrunk = []
+            sizes = self.sizes()
+            for name, limit in self.component_budgets.items():
+                if name in self._components and sizes.get(name, 0) > limit and self._shrink(name):
+                    shrunk.append(name)
+            if shrunk:
+                release()
+
+            if self.budget_bytes and process_rss() > self.budget_bytes:
+                for name in list(self._components):
+                    if name not in shrunk and self._shrink(name):
+                        shrunk.append(name)
+                        release()
+                        if process_rss() <= self.budget_bytes:
+                            break
+
+            over = bool(self.budget_bytes) and process_rss() > self.budget_bytes
+            if over and not self._over:
+                print(f"⚠️ Memory: RSS {process_rss() / MB:.0f} MB still over the {self.budget_bytes / MB:.0f} MB budget")
+            self._over = over
+            return shrunk
+
+    def render(self) -> str:
+        """Prometheus gauges for the metrics endpoint."""
+        lines = ["# HELP niva_memory_bytes Approximate resident size per component",
+                 "# TYPE niva_memory_bytes gauge",
+                 f'niva_memory_bytes{{component="process_rss"}} {process_rss()}']
+        lines += [f'niva_memory_bytes{{component="{name}"}} {size}' for name, size in self.sizes().items()]
+        lines += ["# HELP niva_memory_budget_bytes Configured memory budget (0 = none)",
+                  "# TYPE niva_memory_budget_bytes gauge",
+                  f'niva_memory_budget_bytes{{component="process_rss"}} {self.budget_bytes}']
+        lines += [f'niva_memory_budget_bytes{{component="{name}"}} {limit}' for name, limit in self.component_budgets.items()]
+        lines += ["# HELP niva_memory_shrinks_total Times a component was shrunk to meet a budget",
+                  "# TYPE niva_memory_shrinks_total counter"]
+        lines += [f'niva_memory_shrinks_total{{component="{name}"}} {self.shrinks[name]}' for name in self._components]
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"⚠️ Memory governor error: {e}")
+
+    def start(self):
+        """Check budgets in a daemon thread (only if any budget is set)."""
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="niva-memory", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def _embedding_model(vector_store):
+    fn = getattr(vector_store, "embedding_fn", None)
+    if fn is None:
+        return None
+    return getattr(fn, "_model", None) or getattr(fn, "models", {}).get(getattr(fn, "model_name", None))
+
+
+def _classifier_bytes(classifier) -> int:
+    if classifier is None:
+        return 0
+    return classifier.weights.nbytes + classifier.bias.nbytes + sys.getsizeof(classifier.vocab)
+
+
+def watch(governor: "MemoryGovernor" = None, stt=None, agent=None, conversations=None, idle_seconds: float = None):
+    """Register the app's components (in shrink order), expose them on /metrics and start the governor."""
+    from .tracing import add_collector
+
+    governor = governor or get_governor()
+    idle = idle_seconds if idle_seconds is not None else float(os.getenv("NIVA_MEMORY_IDLE_SECONDS", "900"))
+
+    if agent is not None:
+        governor.register("embedding_model", lambda: module_bytes(_embedding_model(agent.vector_store)))
+        governor.register("intent_classifier", lambda: _classifier_bytes(agent.intent_classifier))
+
+        def clear_cache():
+            count = len(agent.response_cache)
+            agent.response_cache.clear()
+            return f"cleared {count} cached answers" if count else None
+        governor.register("response_cache", agent.response_cache.memory_bytes, clear_cache)
+
+    if conversations is not None:
+        if conversations.backend is None:
+            # Evicting would delete the transcripts for good: account for them only
+            print("⚠️ Conversation store has no backend: its sessions are not evicted over the memory budget")
+            governor.register("conversations", conversations.memory_bytes)
+        else:
+            def evict_sessions():
+                count = conversations.evict_idle(idle)
+                return f"evicted {count} idle sessions" if count else None
+            governor.register("conversations", conversations.memory_bytes, evict_sessions)
+
+    if agent is not None:
+        def evict_checkpoints():
+            count = agent.checkpoints.evict_idle(idle)
+            return f"evicted {count} idle checkpoints" if count else None
+        governor.register("checkpoints", agent.checkpoints.memory_bytes, evict_checkpoints)
+
+    if stt is not None:
+        governor.register("asr_fallback", lambda: module_bytes(getattr(stt.local_model, "model", None)),
+                          lambda: "unloaded" if stt.unload_local_model() else None)
+
+    local = agent.llm_router.providers.get("local") if agent is not None else None
+    if local is not None:
+        # llama.cpp maps the GGUF file; its weights are about the file size
+        governor.register("local_llm", lambda: os.path.getsize(local.model_path) if local.loaded else 0,
+                          lambda: "unloaded" if local.unload() else None)
+
+    add_collector("memory", governor.render, governor.report)
+    return governor.start()
+
+
+def _parse_budgets(value: str) -> dict:
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {name.strip(): int(float(mb) * MB) for name, mb in pairs}
+
+
+def from_env() -> MemoryGovernor:
+    """Configure from NIVA_MEMORY_BUDGET_MB / NIVA_MEMORY_BUDGETS / NIVA_MEMORY_CHECK_SECONDS."""
+    return MemoryGovernor(budget_bytes=int(float(os.getenv("NIVA_MEMORY_BUDGET_MB", "0")) * MB),
+                          component_budgets=_parse_budgets(os.getenv("NIVA_MEMORY_BUDGETS", "")),
+                          interval=float(os.getenv("NIVA_MEMORY_CHECK_SECONDS", "30")))
+
+
+_governor = None
+
+
+def get_governor() -> MemoryGovernor:
+    global _governor
+    if _governor is None:
+        _governor = from_env()
+    return _governor
@@ -0,0 +1,241 @@
+"""
+Opt-in per-request CPU profiles.
+
+A profiled request is sampled by one background thread that reads every
+thread's Python stack (sys._current_frames) every few milliseconds while
+the request runs; threads parked in a selector, lock or idle pool worker
+are skipped, so the profile shows where CPU went (tokenization, MiniLM,
+resampling, LangGraph...). Concurrent requests share the process, so a
+profile taken under load also contains their work.
+
+Profiles are written as speedscope JSON (https://www.speedscope.app) or
+collapsed stacks (flamegraph.pl, speedscope) to NIVA_PROFILE_DIR:
+
+    NIVA_PROFILE=0        off (default); nothing runs, no sampler thread
+    NIVA_PROFILE=1        profile every request
+    NIVA_PROFILE=0.05     profile a random 5% of requests
+
+Of the sampled requests only the slowest NIVA_PROFILE_KEEP are kept on
+disk. With NIVA_PROFILE_ALLOW_FLAG=1 a single request can ask for a
+profile (?profile=1 or an X-NIVA-Profile: 1 header); those are always kept.
+"""
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# (file, function) of Python frames that only wait
+IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get"),
+               ("thread.py", "_worker"), ("socket.py", "accept"), ("socketserver.py", "serve_forever")}
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Collapsed stacks sampled while one request ran."""
+
+    def __init__(self, label: str, interval: float):
+        self.label = label
+        self.interval = interval
+        self.stacks = Counter()
+        self.started = time.time()
+        self.duration = 0.0
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self) -> dict:
+        frames, index, samples, weights = [], {}, [], []
+        for stack, count in self.stacks.items():
+            sample = []
+            for name in stack.split(";"):
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                sample.append(index[name])
+            samples.append(sample)
+            weights.append(round(count * self.interval * 1000, 3))
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": self.label, "exporter": "niva", "shared": {"frames": frames},
+                "profiles": [{"type": "sampled", "name": self.label, "unit": "milliseconds",
+                              "startValue": 0, "endValue": round(sum(weights), 3),
+                              "samples": samples, "weights": weights}]}
+
+
+class Sampler:
+    """One daemon thread sampling all threads while at least one profile is active."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, profile: Profile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="niva-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _sample(self) -> list:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, str(ident)))
+            stacks.append(";".join(reversed(frames)))
+        return stacks
+
+    def _run(self):
+        while True:
+            stacks = self._sample()
+            with self._lock:
+                # Only profiles still active: a stopped one is being written out
+                for profile in self._active:
+                    profile.stacks.update(stacks)
+                if not self._active:
+                    self._thread = None
+                    return
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Writes profiles; of the sampled ones only the slowest `keep` stay on disk."""
+
+    def __init__(self, directory: str = "profiles", keep: int = 10, fmt: str = "speedscope"):
+        self.directory = directory
+        self.keep = keep
+        self.fmt = fmt
+        self._slowest = []  # min-heap of (duration, seq, path)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _write(self, profile: Profile) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile.started))
+        base = os.path.join(self.directory, f"{stamp}-{profile.label}-{profile.duration * 1000:.0f}ms")
+        if self.fmt == "collapsed":
+            path = base + ".collapsed"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.collapsed())
+        else:
+            path = base + ".speedscope.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(profile.speedscope(), f)
+        return path
+
+    def record(self, profile: Profile, forced: bool = False):
+        """Write a profile; returns its path, or None if it wasn't among the slowest."""
+        if forced:
+            return self._write(profile)
+        with self._lock:
+            if len(self._slowest) >= self.keep and profile.duration <= self._slowest[0][0]:
+                return None
+            path = self._write(profile)
+            heapq.heappush(self._slowest, (profile.duration, next(self._seq), path))
+            evicted = heapq.heappop(self._slowest)[2] if len(self._slowest) > self.keep else None
+        if evicted and os.path.exists(evicted):
+            os.remove(evicted)
+        return path
+
+    def slowest(self) -> list:
+        """(seconds, path) of the kept sampled profiles, slowest first."""
+        with self._lock:
+            return [(d, p) for d, _, p in sorted(self._slowest, reverse=True)]
+
+
+class _Noop:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Profiling:
+    __slots__ = ("profiler", "profile", "forced", "t0")
+
+    def __init__(self, profiler, label: str, forced: bool):
+        self.profiler = profiler
+        self.profile = Profile(label, profiler.sampler.interval)
+        self.forced = forced
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.profiler.sampler.start(self.profile)
+        return self.profile
+
+    def __exit__(self, *exc):
+        self.profiler.sampler.stop(self.profile)
+        self.profile.duration = time.perf_counter() - self.t0
+        path = self.profiler.store.record(self.profile, self.forced)
+        if path and self.forced:
+            print(f"🔬 Profile of {self.profile.label} ({self.profile.duration:.2f}s): {path}")
+        return False
+
+
+class Profiler:
+    def __init__(self, rate: float = 0.0, allow_flag: bool = False, store: ProfileStore = None, interval: float = 0.005):
+        self.rate = rate
+        self.allow_flag = allow_flag
+        self.store = store or ProfileStore()
+        self.sampler = Sampler(interval)
+
+    def request(self, label: str, flag: bool = False):
+        """Context manager profiling one request if sampled or (when allowed) flagged."""
+        forced = flag and self.allow_flag
+        if not forced and not (self.rate and (self.rate >= 1 or random.random() < self.rate)):
+            return _NOOP
+        return _Profiling(self, label, forced)
+
+
+def requested(request) -> bool:
+    """Whether a gr.Request / Starlette request asks for a profile (?profile=1 or X-NIVA-Profile: 1)."""
+    if request is None:
+        return False
+    flag = (getattr(request, "query_params", None) or {}).get("profile") or (getattr(request, "headers", None) or {}).get("x-niva-profile")
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+def from_env() -> Profiler:
+    """Configure from NIVA_PROFILE / _ALLOW_FLAG / _DIR / _KEEP / _FORMAT / _INTERVAL_MS."""
+    store = ProfileStore(directory=os.getenv("NIVA_PROFILE_DIR") or "profiles",
+                         keep=int(os.getenv("NIVA_PROFILE_KEEP", "10")),
+                         fmt=os.getenv("NIVA_PROFILE_FORMAT", "speedscope"))
+    return Profiler(rate=float(os.getenv("NIVA_PROFILE", "0")),
+                    allow_flag=os.getenv("NIVA_PROFILE_ALLOW_FLAG", "0").lower() in ("1", "true", "yes"),
+                    store=store, interval=float(os.getenv("NIVA_PROFILE_INTERVAL_MS", "5")) / 1000)
+
+
+_profiler = None
+
+
+def get_profiler() -> Profiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = from_env()
+    return _profiler
@@ -0,0 +1,121 @@
+"""
+Prompt builder for the synthesizer with local token budgeting.
+
+Tool results arrive as compact plain lines (renderer.render_compact); a
+short, summarized slice of the conversation is added, and the whole
+prompt is trimmed to a per-intent token budget. max_tokens for the
+completion is sized per intent and language instead of a fixed 1024.
+"""
+import math
+from dataclasses import dataclass, field
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+
+# Prompt (input) budget per intent, in tokens
+PROMPT_BUDGETS = {
+    "search": 500, "all": 600, "sector": 450, "eligibility": 400,
+    "compare": 450, "calculate": 350, "apply": 400,
+}
+DEFAULT_PROMPT_BUDGET = 500
+
+# Completion budget per intent (English); Telugu needs more tokens per sentence
+COMPLETION_BUDGETS = {
+    "search": 220, "all": 300, "sector": 220, "eligibility": 180,
+    "compare": 260, "calculate": 160, "apply": 220,
+}
+DEFAULT_COMPLETION_BUDGET = 220
+TELUGU_TOKEN_FACTOR = 2.5
+MAX_COMPLETION_TOKENS = 1024
+
+HISTORY_MESSAGES = 4
+HISTORY_CHARS = 160
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally (tiktoken if available, otherwise a script-aware estimate)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return math.ceil(ascii_chars / 4) + math.ceil((len(text) - ascii_chars) / 2)
+
+
+def summarize_message(content: str, limit: int = HISTORY_CHARS) -> str:
+    """First sentence of a message, without Markdown, cut to `limit` characters."""
+    text = " ".join(content.replace("*", "").split())
+    for end in (". ", "? ", "! ", "। "):
+        cut = text.find(end)
+        if 0 < cut < limit:
+            return text[:cut + 1]
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+@dataclass(slots=True)
+class PromptPlan:
+    messages: list
+    prompt_tokens: int
+    max_tokens: int
+    dropped_lines: int = 0
+    history_used: int = 0
+    info_lines: list = field(default_factory=list)
+
+
+def completion_budget(intents: list, language: str) -> int:
+    base = sum(COMPLETION_BUDGETS.get(i, DEFAULT_COMPLETION_BUDGET) for i in intents) or DEFAULT_COMPLETION_BUDGET
+    if language == "te":
+        base = int(base * TELUGU_TOKEN_FACTOR)
+    return min(base, MAX_COMPLETION_TOKENS)
+
+
+def build_prompt(intents: list, language: str, user_text: str, info: str, history: list) -> PromptPlan:
+    """
+    Build synthesizer messages within the token budget for `intents`.
+
+    History is dropped first (oldest turn first), then tool info lines from
+    the end, until the prompt fits.
+    """
+    budget = sum(PROMPT_BUDGETS.get(i, DEFAULT_PROMPT_BUDGET) for i in intents) or DEFAULT_PROMPT_BUDGET
+    header = ("మీరు NIVA. తెలుగులో మాత్రమే 4-6 వాక్యాలలో సమాధానం ఇవ్వండి." if language == "te"
+              else "You are NIVA. Reply in English only, 4-6 sentences.")
+    info_label = "సమాచారం" if language == "te" else "Info"
+    history_label = "ఇంతకు ముందు" if language == "te" else "Earlier"
+
+    turns = [f"{'user' if m['role'] == 'user' else 'NIVA'}: {summarize_message(m['content'])}"
+             for m in history[-HISTORY_MESSAGES:]]
+    lines = [line for line in info.split("\n") if line.strip()]
+
+    used = count_tokens(header) + count_tokens(user_text) + count_tokens(info_label) + 8
+    line_costs = [count_tokens(line) + 1 for line in lines]
+    turn_costs = [count_tokens(turn) + 1 for turn in turns]
+
+    dropped = 0
+    while turns and used + sum(line_costs) + sum(turn_costs) > budget:
+        turns.pop(0)
+        turn_costs.pop(0)
+    while len(lines) > 1 and used + sum(line_costs) > budget:
+        lines.pop()
+        line_costs.pop()
+        dropped += 1
+
+    parts = [header]
+    if turns:
+        parts.append(f"{history_label}:\n" + "\n".join(turns))
+    parts.append(f"{info_label}: " + "\n".join(lines))
+    system = "\n".join(parts)
+
+    return PromptPlan(
+        messages=[SystemMessage(content=system), HumanMessage(content=user_text)],
+        prompt_tokens=used + sum(line_costs) + sum(turn_costs),
+        max_tokens=completion_budget(intents, language),
+        dropped_lines=dropped,
+        history_used=len(turns),
+        info_lines=lines,
+    )
@@ -0,0 +1,294 @@
+"""
+Markdown renderer for tool results (Telugu + English).
+
+Per-scheme fragments are memoized by (scheme_id, language, view), so a
+scheme is formatted once and reused by every list, comparison and prompt
+that mentions it.
+"""
+from functools import lru_cache
+
+from .catalogue import SCHEMES_BY_ID, on_reload
+from .results import (SchemeListResult, EligibilityResult, ComparisonResult,
+                      BenefitResult, ApplicationStepsResult)
+
+
+LABELS = {
+    "te": {
+        "description": "వివరణ",
+        "benefits": "లాభాలు",
+        "documents": "అవసరమైన పత్రాలు",
+    },
+    "en": {
+        "description": "Description",
+        "benefits": "Benefits",
+        "documents": "Required documents",
+    },
+}
+
+
+def _field(scheme: dict, name: str, language: str):
+    return scheme.get(f"{name}_{language}", scheme.get(f"{name}_en", ""))
+
+
+@lru_cache(maxsize=1024)
+def scheme_fragment(scheme_id: str, language: str, view: str) -> str:
+    """
+    Render one scheme in a given view.
+
+    Views:
+        detail  - name, description, benefits, documents (keyword search)
+        summary - name, sector, truncated description (full list)
+        sector  - name, description, benefits (sector list)
+        brief   - name, sector, benefits (semantic search)
+        docs    - bullet list of required documents
+        compact - single line of plain fields for LLM prompts
+    """
+    scheme = SCHEMES_BY_ID.get(scheme_id)
+    if scheme is None:
+        return ""
+    labels = LABELS.get(language, LABELS["en"])
+    name = _field(scheme, "name", language)
+    description = _field(scheme, "description", language)
+    benefits = _field(scheme, "benefits", language)
+    documents = _field(scheme, "documents", language)
+    sector = scheme["sector"]
+
+    if view == "detail":
+        return (f"**{name}**\n"
+                f"   {labels['description']}: {description}\n"
+                f"   {labels['benefits']}: {benefits}\n"
+                f"   {labels['documents']}: {', '.join(documents)}")
+    if view == "summary":
+        return f"**{name}** ({sector})\n   {description[:80]}..."
+    if view == "sector":
+        return f"**{name}**\n   {description}\n   {labels['benefits']}: {benefits}"
+    if view == "brief":
+        return f"**{name}** ({sector})\n   {labels['benefits']}: {benefits}"
+    if view == "docs":
+        return "".join(f"   • {doc}\n" for doc in documents)
+    if view == "compact":
+        return f"{name} [{sector}] | {benefits} | {', '.join(documents)}"
+    raise ValueError(f"Unknown view: {view}")
+
+
+def clear_cache():
+    """Drop memoized fragments (runs automatically on catalogue reload)."""
+    scheme_fragment.cache_clear()
+
+
+on_reload(clear_cache)
+
+
+def _numbered(ids, language: str, view: str) -> str:
+    return "".join(f"{i}. {scheme_fragment(sid, language, view)}\n\n"
+                   for i, sid in enumerate(ids, 1))
+
+
+def _issue_text(issue, language: str) -> str:
+    rule, value = issue.rule, issue.value
+    te = language == "te"
+    if rule == "min_age":
+        return f"వయస్సు {value} సంవత్సరాల కంటే తక్కువ" if te else f"Age below {value} years"
+    if rule == "max_age":
+        return f"వయస్సు {value} సంవత్సరాల కంటే ఎక్కువ" if te else f"Age above {value} years"
+    if rule == "income_limit":
+        return f"ఆదాయం పరిమితి (₹{value:,}) కంటే ఎక్కువ" if te else f"Income exceeds limit (₹{value:,})"
+    if rule == "occupation":
+        return "ఈ యోజన రైతులకు మాత్రమే" if te else "This scheme is only for farmers"
+    if rule == "category":
+        cat_list = ", ".join(value)
+        return f"వర్గం {cat_list} లో ఒకటి అయి ఉండాలి" if te else f"Category must be one of {cat_list}"
+    if rule == "category_missing":
+        cat_list = ", ".join(value)
+        return f"మీ వర్గం ({cat_list}) లో ఒకటి అయి ఉండాలి" if te else f"Your category should be one of ({cat_list})"
+    return str(rule)
+
+
+def _render_list(result: SchemeListResult) -> str:
+    lang = result.language
+    te = lang == "te"
+    ids = [m.scheme_id for m in result.matches]
+
+    if result.kind == "vector":
+        if not ids:
+            return "కోరిన యోజనలు కనబడలేదు." if te else "No schemes found."
+        return _numbered(ids, lang, "brief")
+
+    if result.kind == "search":
+        if not ids:
+            return "కోరిన యోజనలు కనబడలేదు. దయచేసి వేరే పదాలతో వెతకండి." if te else "No schemes found. Please search with different keywords."
+        header = f"నేను {len(ids)} యోజనలను కనుగొన్నాను:\n\n" if te else f"I found {len(ids)} schemes:\n\n"
+        return header + _numbered(ids, lang, "detail")
+
+    if result.kind == "sector":
+        sector = result.query
+        if not ids:
+            return f"'{sector}' విభాగంలో యోజనలు కనబడలేదు" if te else f"No schemes found in '{sector}' sector"
+        header = f"**{sector} విభాగం యోజనలు:**\n\n" if te else f"**{sector.title()} Sector Schemes:**\n\n"
+        return header + _numbered(ids, lang, "sector")
+
+    header = "అందుబాటులో ఉన్న ప్రభుత్వ యోజనలు:\n\n" if te else "Available Government Schemes:\n\n"
+    footer = "ఏదైనా యోజన యొక్క పూర్తి సమాచారం కోసం దాని పేరు చెప్పండి." if te else "Tell me the scheme name for complete information."
+    return header + _numbered(ids, lang, "summary") + footer
+
+
+def _render_eligibility(result: EligibilityResult) -> str:
+    lang = result.language
+    te = lang == "te"
+    if not result.found:
+        return f"'{result.query}' పేరుతో యోజన కనబడలేదు." if te else f"Scheme '{result.query}' not found."
+
+    scheme = SCHEMES_BY_ID[result.scheme_id]
+    name = _field(scheme, "name", lang)
+    if result.issues:
+        head = f"❌ మీరు **{name}** కు అర్హులు కాదు.\n\nకారణాలు:\n" if te else f"❌ You are not eligible for **{name}**.\n\nReasons:\n"
+        return head + "".join(f"• {_issue_text(issue, lang)}\n" for issue in result.issues)
+
+    labels = LABELS.get(lang, LABELS["en"])
+    parts = [
+        f"✅ అభినందనలు! మీరు **{name}** కు అర్హులు!\n\n" if te else f"✅ Congratulations! You are eligible for **{name}**!\n\n",
+        f"{labels['benefits']}: {_field(scheme, 'benefits', lang)}\n",
+        f"{'అవసరమైన పత్రాలు' if te else 'Required documents'}: {', '.join(_field(scheme, 'documents', lang))}\n",
+        "\nదరఖాస్తు కోసం మీకు సమీపంలో ఉన్న CSC కేంద్రం లేదా ప్రభుత్వ కార్యాలయానికి వెళ్లండి." if te else "\nVisit your nearest CSC center or government office to apply.",
+    ]
+    return "".join(parts)
+
+
+def _render_comparison(result: ComparisonResult) -> str:
+    lang = result.language
+    te = lang == "te"
+    if not result.found:
+        return "ఒకటి లేదా రెండు యోజనలు కనబడలేదు" if te else "One or both schemes not found"
+
+    s1, s2 = (SCHEMES_BY_ID[sid] for sid in result.scheme_ids)
+    n1, n2 = "యోజన 1" if te else "Scheme 1", "యోజన 2" if te else "Scheme 2"
+    titles = (("**యోజనల పోలిక:**", "🎯 **లక్ష్యం:**", "💰 **లాభాలు:**", "📄 **అవసరమైన పత్రాలు:**") if te else
+              ("**Scheme Comparison:**", "🎯 **Purpose:**", "💰 **Benefits:**", "📄 **Required Documents:**"))
+    return "".join([
+        f"{titles[0]}\n\n",
+        f"📋 **{_field(s1, 'name', lang)}** vs **{_field(s2, 'name', lang)}**\n\n",
+        f"{titles[1]}\n",
+        f"• {n1}: {_field(s1, 'description', lang)}\n",
+        f"• {n2}: {_field(s2, 'description', lang)}\n\n",
+        f"{titles[2]}\n",
+        f"• {n1}: {_field(s1, 'benefits', lang)}\n",
+        f"• {n2}: {_field(s2, 'benefits', lang)}\n\n",
+        f"{titles[3]}\n",
+        f"• {n1}: {', '.join(_field(s1, 'documents', lang))}\n",
+        f"• {n2}: {', '.join(_field(s2, 'documents', lang))}\n",
+    ])
+
+
+def _render_benefits(result: BenefitResult) -> str:
+    lang = result.language
+    te = lang == "te"
+    if not result.found:
+        return f"'{result.query}' యోజన కనబడలేదు" if te else f"Scheme '{result.query}' not found"
+
+    scheme = SCHEMES_BY_ID[result.scheme_id]
+    name = _field(scheme, "name", lang)
+    amount, months, family_size = result.amount, result.months, result.family_size
+
+    if result.formula == "annual":
+        lines = ([f"**{name} లాభాల లెక్కింపు:**\n", f"💰 వార్షిక మొత్తం: ₹{amount:,}",
+                  f"📅 {months} నెలల కోసం: ₹{result.total:,.0f}"] if te else
+                 [f"**{name} Benefits Calculator:**\n", f"💰 Annual Amount: ₹{amount:,}",
+                  f"📅 For {months} months: ₹{result.total:,.0f}"])
+        if result.installments > 1:
+            count, each = result.installments, amount // result.installments
+            lines.append(f"💳 చెల్లింపు విధానం: {count} విడతలుగా (ప్రతి ₹{each:,})" if te else
+                         f"💳 Payment Mode: {count} installments (₹{each:,} each)")
+    elif result.formula == "one_time":
+        lines = ([f"**{name} లాభాల లెక్కింపు:**\n", f"💰 మొత్తం సహాయం: ₹{amount:,}",
+                  f"🏠 కుటుంబ సభ్యులు: {family_size}", "📋 గమనిక: ఇది ఒక్కసారి సహాయం"] if te else
+                 [f"**{name} Benefits Calculator:**\n", f"💰 Total Assistance: ₹{amount:,}",
+                  f"🏠 Family Size: {family_size}", "📋 Note: This is a one-time assistance"])
+    elif result.formula == "coverage":
+        lines = ([f"**{name} లాభాల లెక్కింపు:**\n", f"💰 వార్షిక కవరేజ్: ₹{amount:,}",
+                  f"👨‍👩‍👧‍👦 కుటుంబ సభ్యులు: {family_size}", f"🏥 ప్రతి కుటుంబానికి: ₹{amount:,}",
+                  "📋 గమనిక: ఆరోగ్య బీమా కవరేజ్"] if te else
+                 [f"**{name} Benefits Calculator:**\n", f"💰 Annual Coverage: ₹{amount:,}",
+                  f"👨‍👩‍👧‍👦 Family Members: {family_size}", f"🏥 Per Family: ₹{amount:,}",
+                  "📋 Note: Health insurance coverage"])
+    else:
+        lines = ([f"**{name} లాభాలు:**\n", f"💰 {_field(scheme, 'benefits', lang)}",
+                  "📋 ఖచ్చితమైన మొత్తం కోసం సంబంధిత కార్యాలయాన్ని సంప్రదించండి."] if te else
+                 [f"**{name} Benefits:**\n", f"💰 {_field(scheme, 'benefits', lang)}",
+                  "📋 Contact relevant office for exact amount."])
+    return "\n".join(lines) + "\n"
+
+
+APPLICATION_STEPS = {
+    "te": ["**సమీప CSC సెంటర్ / ప్రభుత్వ కార్యాలయానికి వెళ్లండి**", "**దరఖాస్తు ఫారం పూరించండి**",
+           "**పత్రాలను జమ చేయండి**", "**రసీదు తీసుకోండి**", "**మీ దరఖాస్తు స్థితిని ట్రాక్ చేయండి**"],
+    "en": ["**Visit Nearest CSC Center / Government Office**", "**Fill Application Form**",
+           "**Submit Documents**", "**Collect Receipt**", "**Track Your Application Status**"],
+}
+STEP_NUMBERS = ["2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣"]
+
+
+def _render_application(result: ApplicationStepsResult) -> str:
+    lang = result.language
+    te = lang == "te"
+    if not result.found:
+        return f"'{result.query}' యోజన కనబడలేదు" if te else f"Scheme '{result.query}' not found"
+
+    name = _field(SCHEMES_BY_ID[result.scheme_id], "name", lang)
+    steps = APPLICATION_STEPS["te" if te else "en"]
+    return "".join([
+        f"**{name} - దరఖాస్తు విధానం:**\n\n📝 **దశలు:**\n\n1️⃣ **అవసరమైన పత్రాలను సేకరించండి:**\n" if te else
+        f"**{name} - Application Process:**\n\n📝 **Steps:**\n\n1️⃣ **Collect Required Documents:**\n",
+        scheme_fragment(result.scheme_id, lang, "docs"),
+        "".join(f"\n{num} {step}\n" for num, step in zip(STEP_NUMBERS, steps)),
+        "\n💡 **చిట్కా:** అన్ని అసలు పత్రాలతో పాటు ఫోటో కాపీలు తీసుకెళ్లండి.\n" if te else
+        "\n💡 **Tip:** Carry photocopies along with original documents.\n",
+    ])
+
+
+_RENDERERS = {
+    SchemeListResult: _render_list,
+    EligibilityResult: _render_eligibility,
+    ComparisonResult: _render_comparison,
+    BenefitResult: _render_benefits,
+    ApplicationStepsResult: _render_application,
+}
+
+
+def render(result) -> str:
+    """Render a tool result as user-facing Markdown in the result's language."""
+    if result is None:
+        return ""
+    if isinstance(result, str):
+        return result
+    return _RENDERERS[type(result)](result)
+
+
+def render_compact(result) -> str:
+    """Render a tool result as short plain lines for an LLM prompt (no emojis or Markdown)."""
+    if result is None:
+        return ""
+    if isinstance(result, str):
+        return result
+    lang = result.language
+    if not result.found:
+        return render(result)
+
+    if isinstance(result, SchemeListResult):
+        return "\n".join(scheme_fragment(m.scheme_id, lang, "compact") for m in result.matches)
+    if isinstance(result, EligibilityResult):
+        line = scheme_fragment(result.scheme_id, lang, "compact")
+        if result.eligible:
+            return f"eligible: yes\n{line}"
+        reasons = "; ".join(_issue_text(issue, lang) for issue in result.issues)
+        return f"eligible: no ({reasons})\n{line}"
+    if isinstance(result, ComparisonResult):
+        return "\n".join(scheme_fragment(sid, lang, "compact") for sid in result.scheme_ids)
+    if isinstance(result, BenefitResult):
+        line = scheme_fragment(result.scheme_id, lang, "compact")
+        if result.formula == "generic":
+            return line
+        return f"{line}\n{result.formula} amount: ₹{result.amount:,}; months: {result.months}; total: ₹{result.total:,.0f}"
+    if isinstance(result, ApplicationStepsResult):
+        return scheme_fragment(result.scheme_id, lang, "compact") + "\napply: " + " → ".join(
+            s.strip("*") for s in APPLICATION_STEPS["te" if lang == "te" else "en"])
+    return render(result)
@@ -0,0 +1,96 @@
+"""
+Response cache for deterministic tool-backed intents.
+
+Answers for intents like "all schemes", "schemes by sector" or
+"application steps" depend only on the resolved tool arguments, the
+language and the catalogue, so the synthesized reply can be reused
+without another LLM call.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .catalogue import catalogue_version, on_reload
+
+
+# Intents whose answer is fully determined by (tool args, language, catalogue).
+# Not compare (its tool args are fixed, whatever schemes were asked about), nor
+# eligibility / calculate (the answer follows the user's wording and defaults).
+CACHEABLE_INTENTS = {"all", "sector", "apply"}
+
+# Intents that are pure catalogue facts and can skip the LLM entirely
+# when templated answers are enabled (NIVA_TEMPLATE_ANSWERS=1)
+FACTUAL_INTENTS = {"all", "sector", "apply"}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items() if k != "language"))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def make_key(intent: str, tool_args: dict, language: str) -> tuple:
+    """Build a cache key from intent, resolved tool args, language and catalogue version."""
+    return (intent, _freeze(tool_args), language, catalogue_version())
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry TTL."""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        on_reload(self.clear)  # held weakly: the listener goes away with the cache
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the cached answers (keys and strings)."""
+        with self._lock:
+            return sum(sys.getsizeof(key) + sys.getsizeof(value) for key, (value, _) in self._entries.items())
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def from_env() -> ResponseCache:
+    """Create a cache sized from NIVA_RESPONSE_CACHE_SIZE / NIVA_RESPONSE_CACHE_TTL."""
+    return ResponseCache(
+        max_size=int(os.getenv("NIVA_RESPONSE_CACHE_SIZE", "256")),
+        ttl_seconds=float(os.getenv("NIVA_RESPONSE_CACHE_TTL", "3600")),
+    )
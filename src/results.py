@@ -0,0 +1,102 @@
+"""
+Typed results returned by the scheme tools and the vector store.
+
+Tools only compute *what* the answer is (scheme ids, eligibility issues,
+amounts); `renderer.py` turns these objects into Telugu/English Markdown or
+compact prompt text.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(slots=True)
+class SchemeMatch:
+    """A scheme returned by a search, with its relevance score (1.0 for exact matches)."""
+    scheme_id: str
+    score: float = 1.0
+
+
+@dataclass(slots=True)
+class SchemeListResult:
+    """A list of schemes.
+
+    kind is one of "search" (keyword search), "vector" (semantic search),
+    "all" (full catalogue) or "sector" (schemes of one sector).
+    """
+    kind: str
+    language: str
+    matches: list = field(default_factory=list)
+    query: str = ""
+
+    @property
+    def found(self) -> bool:
+        return bool(self.matches)
+
+
+@dataclass(slots=True)
+class EligibilityIssue:
+    """One failed eligibility rule, e.g. ("income_limit", 200000)."""
+    rule: str
+    value: object = None
+
+
+@dataclass(slots=True)
+class EligibilityResult:
+    query: str
+    language: str
+    scheme_id: Optional[str] = None
+    issues: list = field(default_factory=list)
+
+    @property
+    def found(self) -> bool:
+        return self.scheme_id is not None
+
+    @property
+    def eligible(self) -> bool:
+        return self.found and not self.issues
+
+
+@dataclass(slots=True)
+class ComparisonResult:
+    query: tuple
+    language: str
+    scheme_ids: tuple = ()
+
+    @property
+    def found(self) -> bool:
+        return len(self.scheme_ids) == 2
+
+
+@dataclass(slots=True)
+class BenefitResult:
+    """Estimated benefit of a scheme.
+
+    formula is "annual" (amount per year, prorated to months), "one_time",
+    "coverage" (per-family insurance cover) or "generic" (text from catalogue);
+    see benefits.py. installments is the number of payments a year (0 = not
+    paid in installments).
+    """
+    query: str
+    language: str
+    scheme_id: Optional[str] = None
+    formula: str = "generic"
+    amount: int = 0
+    total: float = 0.0
+    months: int = 12
+    family_size: int = 1
+    installments: int = 0
+
+    @property
+    def found(self) -> bool:
+        return self.scheme_id is not None
+
+
+@dataclass(slots=True)
+class ApplicationStepsResult:
+    query: str
+    language: str
+    scheme_id: Optional[str] = None
+
+    @property
+    def found(self) -> bool:
+        return self.scheme_id is not None
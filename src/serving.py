@@ -0,0 +1,289 @@
+"""
+Multi-process serving.
+
+One process runs the planner, tools, formatting and resampling on one core
+(the GIL). With NIVA_WORKERS=N (N > 1, Linux/macOS) `python app.py` runs N
+worker processes behind one front instead:
+
+    master  - loads the catalogue, keyword index, intent classifier and
+              embedding model once, freezes the GC and forks the workers
+              and the front, so workers share those pages copy-on-write;
+              restarts any process that exits
+    workers - each serves the full Gradio app on a Unix socket; Groq
+              clients, caches, sessions and the Chroma client are per worker
+    front   - HTTP on the app port; proxies every request to a worker,
+              keeping a browser (niva_worker cookie) or Gradio session
+              (session_hash) on the same worker so its conversation stays put
+
+    GET /healthz  the front is up
+    GET /readyz   200 while at least one worker is ready; JSON per worker
+
+Worker i serves its Prometheus metrics on NIVA_METRICS_PORT + i.
+"""
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+import zlib
+
+COOKIE = "niva_worker"
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+              "transfer-encoding", "upgrade"}
+
+
+def supported() -> bool:
+    return hasattr(os, "fork")
+
+
+def preload():
+    """Load the read-only data and models once, before forking."""
+    from . import catalogue  # noqa: F401 - schemes.json and the id index load on import
+    from .extractor import get_extractor
+    from .intent_classifier import get_intent_classifier
+    get_extractor()
+    get_intent_classifier()
+    try:
+        # Class-level cache: every worker's SchemeVectorStore reuses this model
+        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+        SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    except Exception as e:
+        print(f"⚠️ Embedding model not preloaded ({e}); each worker loads its own")
+        return
+    # Chroma's client starts native threads, which must not exist across a
+    # fork: build the index in a short-lived child so workers find it ready
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            from .vector_store import get_vector_store
+            get_vector_store()
+        except Exception as e:
+            print(f"⚠️ Could not build the vector index: {e}")
+            code = 1
+        os._exit(code)
+    os.waitpid(pid, 0)
+
+
+def run_worker(blocks, index: int, socket_path: str, init=None):
+    """Serve `blocks` on a Unix socket (in a forked child)."""
+    import gradio as gr
+    import uvicorn
+    from fastapi import FastAPI
+
+    if init is not None:
+        init(index)
+    app = FastAPI()
+
+    @app.get("/healthz")
+    def healthz():
+        return {"ready": True, "pid": os.getpid(), "worker": index}
+
+    app = gr.mount_gradio_app(app, blocks, path="/", show_error=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    print(f"✅ Worker {index} (pid {os.getpid()}) serving on {socket_path}")
+    uvicorn.Server(uvicorn.Config(app, uds=socket_path, log_level="warning", timeout_graceful_shutdown=5)).run()
+
+
+class Worker:
+    __slots__ = ("index", "socket_path", "client", "ready", "inflight", "served", "pid")
+
+    def __init__(self, index: int, socket_path: str):
+        import httpx
+        self.index = index
+        self.socket_path = socket_path
+        self.client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=socket_path),
+                                        base_url="http://worker", timeout=httpx.Timeout(None, connect=5.0))
+        self.ready = False
+        self.inflight = 0
+        self.served = 0
+        self.pid = None
+
+
+class Front:
+    """Sticky reverse proxy from one TCP port to the workers' Unix sockets."""
+
+    def __init__(self, socket_paths: list, check_interval: float = 1.0):
+        self.workers = [Worker(i, path) for i, path in enumerate(socket_paths)]
+        self.check_interval = check_interval
+
+    async def check(self):
+        """Poll every worker's /healthz; a worker that doesn't answer gets no new sessions."""
+        while True:
+            for worker in self.workers:
+                try:
+                    response = await worker.client.get("/healthz", timeout=2.0)
+                    worker.ready = response.status_code == 200
+                    worker.pid = response.json().get("pid") if worker.ready else None
+                except Exception:
+                    worker.ready = False
+            await asyncio.sleep(self.check_interval)
+
+    @staticmethod
+    def _session_hash(request, body: bytes):
+        if request.query_params.get("session_hash"):
+            return request.query_params["session_hash"]
+        if body:
+            try:
+                return json.loads(body).get("session_hash")
+            except (ValueError, AttributeError):
+                return None
+        return None
+
+    def pick(self, request, body: bytes = b""):
+        """The worker for a request: cookie, then Gradio session hash, then the least busy ready worker."""
+        ready = [w for w in self.workers if w.ready]
+        if not ready:
+            return None
+        cookie = request.cookies.get(COOKIE, "")
+        if cookie.isdigit() and int(cookie) < len(self.workers) and self.workers[int(cookie)].ready:
+            return self.workers[int(cookie)]
+        session = self._session_hash(request, body)
+        if session:
+            worker = self.workers[zlib.crc32(session.encode()) % len(self.workers)]
+            if worker.ready:
+                return worker
+        return min(ready, key=lambda w: w.inflight)
+
+    async def proxy(self, request):
+        from starlette.responses import JSONResponse, StreamingResponse
+
+        # Only queue joins carry the session in the body; everything else streams through
+        body = await request.body() if request.method == "POST" and request.url.path.endswith("/queue/join") else None
+        worker = self.pick(request, body or b"")
+        if worker is None:
+            return JSONResponse({"error": "no worker ready"}, status_code=503, headers={"Retry-After": "2"})
+
+        # httpx sets the length (or chunks a streamed body) itself
+        headers = [(k, v) for k, v in request.headers.items() if k not in HOP_BY_HOP and k != "content-length"]
+        headers.append(("x-forwarded-for", request.client.host if request.client else ""))
+        if body is None and request.method in ("POST", "PUT", "PATCH"):
+            body = request.stream()
+        upstream = worker.client.build_request(request.method, request.url.path, params=request.url.query,
+                                               headers=headers, content=body)
+        worker.inflight += 1
+        try:
+            response = await worker.client.send(upstream, stream=True)
+        except Exception as e:
+            worker.inflight -= 1
+            worker.ready = False
+            return JSONResponse({"error": f"worker {worker.index} unavailable: {e}"}, status_code=502)
+
+        async def body_stream():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                worker.inflight -= 1
+                worker.served += 1
+                await response.aclose()
+
+        proxied = StreamingResponse(body_stream(), status_code=response.status_code)
+        proxied.raw_headers = [(k.encode("latin-1"), v.encode("latin-1"))
+                               for k, v in response.headers.multi_items() if k.lower() not in HOP_BY_HOP | {"date", "server"}]
+        if request.cookies.get(COOKIE) != str(worker.index):
+            proxied.raw_headers.append((b"set-cookie", f"{COOKIE}={worker.index}; Path=/; HttpOnly; SameSite=Lax".encode()))
+        return proxied
+
+    def status(self) -> dict:
+        return {"workers": [{"worker": w.index, "pid": w.pid, "ready": w.ready, "inflight": w.inflight,
+                             "served": w.served} for w in self.workers]}
+
+    def app(self):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def healthz(request):
+            return JSONResponse({"ok": True})
+
+        async def readyz(request):
+            ready = any(w.ready for w in self.workers)
+            return JSONResponse({"ready": ready, **self.status()}, status_code=200 if ready else 503)
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            checker = asyncio.create_task(self.check())
+            yield
+            checker.cancel()
+
+        methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"]
+        return Starlette(routes=[Route("/healthz", healthz), Route("/readyz", readyz),
+                                 Route("/{path:path}", self.proxy, methods=methods)], lifespan=lifespan)
+
+
+def run_front(socket_paths: list, host: str, port: int):
+    import uvicorn
+    front = Front(socket_paths)
+    print(f"🌐 Front on http://{host}:{port} → {len(socket_paths)} workers (ready: /readyz)")
+    uvicorn.Server(uvicorn.Config(front.app(), host=host, port=port, log_level="warning",
+                                  timeout_graceful_shutdown=5)).run()
+
+
+def serve(blocks, workers: int, host: str = "0.0.0.0", port: int = 7860, init_worker=None):
+    """Preload, fork `workers` Gradio workers and the front, and keep them running until SIGINT/SIGTERM."""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    preload()
+    socket_dir = tempfile.mkdtemp(prefix="niva-")
+    sockets = [os.path.join(socket_dir, f"worker-{i}.sock") for i in range(workers)]
+    # Objects loaded so far are never collected: the collector won't touch (and copy) their pages
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(role):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                if role == "front":
+                    run_front(sockets, host, port)
+                else:
+                    run_worker(blocks, role, sockets[role], init_worker)
+            finally:
+                os._exit(0)
+        children[pid] = role
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    spawn("front")
+
+    restarts = {}
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        role = children.pop(pid, None)
+        if stopping or role is None:
+            continue
+        # Back off if a process keeps dying right after starting
+        last = restarts.get(role, 0.0)
+        restarts[role] = time.monotonic()
+        name = "front" if role == "front" else f"worker {role}"
+        print(f"⚠️ {name} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        if time.monotonic() - last < 5:
+            time.sleep(5)
+        if not stopping:
+            spawn(role)
+    shutil.rmtree(socket_dir, ignore_errors=True)
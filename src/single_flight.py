@@ -0,0 +1,143 @@
+"""
+Single-flight coalescing for identical concurrent requests.
+
+When many users ask the same thing at once (say, right after a PM Kisan
+installment), each would run its own vector query, tool call, LLM
+completion and TTS synthesis. A SingleFlight lets the first caller for a
+key do the work while every concurrent caller with the same key waits for
+and shares that result, so backend calls scale with distinct questions,
+not with users. Nothing is kept once a flight lands; reuse after that is
+the response cache's job.
+
+Sync (`do`) and async (`ado`) callers share the same flights. If an async
+leader is cancelled (its user went away), one of its followers takes over.
+
+Every flight's counters (leaders that ran the work against followers that
+shared it) are on /metrics (niva_single_flight_*{flight=...}) and
+/metrics/single_flight.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import Future
+
+from .tracing import add_collector
+
+_registry = weakref.WeakValueDictionary()  # name -> live SingleFlight, for /metrics
+
+
+def normalize_text(text: str) -> str:
+    """Key form of free text: case-folded, whitespace collapsed."""
+    return " ".join(text.casefold().split())
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """At most one in-flight computation per key; concurrent callers share it."""
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._flights = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        _registry[name] = self
+
+    def _join(self, key) -> tuple:
+        """(future, is_leader) for key."""
+        with self._lock:
+            self.calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self.executions += 1
+            return future, True
+
+    def _land(self, key, future: Future, result=None, error: BaseException = None):
+        with self._lock:
+            self._flights.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """Return fn(), or the result of an identical call already in flight."""
+        if not self.enabled:
+            return fn()
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self._land(key, future, error=e)
+                raise
+            self._land(key, future, result)
+            return result
+
+    async def ado(self, key, coro_fn):
+        """Async do(): await coro_fn(), or share an identical call already in flight."""
+        if not self.enabled:
+            return await coro_fn()
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # shield: a cancelled follower must not cancel the shared flight
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = await coro_fn()
+            except asyncio.CancelledError:
+                self._land(key, future, error=_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._land(key, future, error=e)
+                raise
+            self._land(key, future, result)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "executions": self.executions, "coalesced": self.coalesced,
+                    "in_flight": len(self._flights)}
+
+
+def report() -> dict:
+    """Counters of every live flight (tools, llm, tts), by name."""
+    return {name: flight.stats() for name, flight in sorted(_registry.items())}
+
+
+def render() -> str:
+    """Prometheus counters per flight for the metrics endpoint."""
+    flights = report()
+    lines = []
+    for metric, key, kind, help_text in (
+            ("niva_single_flight_leaders_total", "executions", "counter", "Calls that ran the work (flight leaders)"),
+            ("niva_single_flight_coalesced_total", "coalesced", "counter", "Calls that shared a leader's result"),
+            ("niva_single_flight_in_flight", "in_flight", "gauge", "Flights currently running")):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{flight="{name}"}} {stats[key]}' for name, stats in flights.items()]
+    return "\n".join(lines) + "\n"
+
+
+add_collector("single_flight", render, report)
+
+
+def enabled_from_env() -> bool:
+    """NIVA_SINGLE_FLIGHT=0 turns coalescing off."""
+    return os.getenv("NIVA_SINGLE_FLIGHT", "1").lower() in ("1", "true", "yes")
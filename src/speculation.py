@@ -0,0 +1,105 @@
+"""
+Speculative tool pre-execution from partial transcripts.
+
+While STT is still finishing, the agent plans on the partial text it
+already has. If that plan is confident and names a scheme or sector, its
+tool calls start in the background. When the final transcript is planned,
+every tool call whose (tool, args) matches a speculated one takes the
+speculated result (a hit); the rest are discarded (misses). stats() shows
+whether speculation is paying off; the agent serves it on /metrics
+(niva_speculation_*) and /metrics/speculation.
+
+Vector search is not speculated: its argument is the raw query text, which
+a partial transcript never matches exactly.
+"""
+import threading
+import time
+
+from .response_cache import make_key
+
+
+SPECULATIVE_TOOLS = {"check_eligibility", "compare_schemes", "calculate_benefits",
+                     "get_application_steps", "get_schemes_by_sector", "get_all_schemes"}
+
+
+def _key(call: dict) -> tuple:
+    return make_key(call["tool"], call["args"], call["args"].get("language"))
+
+
+class Speculator:
+    """Background tool calls per session, matched against the final plan."""
+
+    def __init__(self, run_tool, pool, threshold: float = 0.7, max_age: float = 30.0):
+        self.run_tool = run_tool
+        self.pool = pool
+        self.threshold = threshold
+        self.max_age = max_age
+        self._pending = {}  # session_id -> (started_at, {key: future})
+        self._lock = threading.Lock()
+        self.speculated = 0
+        self.hits = 0
+        self.misses = 0
+
+    def worth_it(self, plan: dict) -> bool:
+        """Only confident, fully specified plans of deterministic tools are speculated."""
+        calls = plan["tool_calls"]
+        params = plan["extracted_params"]
+        return (bool(calls) and not plan["requires_info"]
+                and plan["intent_confidence"] >= self.threshold
+                and all(c["tool"] in SPECULATIVE_TOOLS for c in calls)
+                and (plan["intent"] == "all" or "scheme_name" in params or "sector" in params))
+
+    def speculate(self, session_id: str, plan: dict) -> bool:
+        """Start the plan's tool calls in the background; returns True if started."""
+        if not self.worth_it(plan):
+            return False
+        futures = {_key(c): self.pool.submit(self.run_tool, c) for c in plan["tool_calls"]}
+        now = time.monotonic()
+        with self._lock:
+            stale = [sid for sid, (started, _) in self._pending.items() if now - started > self.max_age]
+            for sid in stale + [session_id]:
+                self._discard(sid)
+            self._pending[session_id] = (now, futures)
+            self.speculated += len(futures)
+        return True
+
+    def take(self, session_id: str, call: dict):
+        """Speculated future for this call, or None."""
+        with self._lock:
+            started, futures = self._pending.get(session_id, (0.0, {}))
+            if time.monotonic() - started > self.max_age:
+                return None
+            future = futures.pop(_key(call), None)
+            if future is not None:
+                self.hits += 1
+            return future
+
+    def _discard(self, session_id: str):
+        _, futures = self._pending.pop(session_id, (0.0, {}))
+        for future in futures.values():
+            future.cancel()
+        self.misses += len(futures)
+
+    def finish(self, session_id: str):
+        """Drop whatever the final plan did not use."""
+        with self._lock:
+            self._discard(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            settled = self.hits + self.misses
+            return {"speculated": self.speculated, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / settled if settled else 0.0}
+
+    def render(self) -> str:
+        """Prometheus counters and hit-rate gauge for the metrics endpoint."""
+        stats = self.stats()
+        lines = []
+        for name, help_text in (("speculated", "Tool calls started from a partial transcript"),
+                                ("hits", "Speculated tool calls the final plan used"),
+                                ("misses", "Speculated tool calls discarded")):
+            lines += [f"# HELP niva_speculation_{name}_total {help_text}", f"# TYPE niva_speculation_{name}_total counter",
+                      f"niva_speculation_{name}_total {stats[name]}"]
+        lines += ["# HELP niva_speculation_hit_rate Share of settled speculated calls that were used",
+                  "# TYPE niva_speculation_hit_rate gauge", f"niva_speculation_hit_rate {stats['hit_rate']:.4f}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,206 @@
+"""
+Startup time: import budgets, background model loading, time to ready.
+
+    python -m src.startup [--module app] [--budget-ms 3000] [--top 15]
+
+imports the module in a fresh interpreter with `-X importtime` and lists
+the top-level packages that cost the most (their own import time, nested
+imports included under the package that owns them); it exits 1 when the
+total is over the budget (NIVA_IMPORT_BUDGET_MS, 0 = report only).
+
+At launch the app starts loading its models in a background thread while
+the UI is already served. Handlers wait for readiness (at most
+NIVA_READY_TIMEOUT seconds) instead of asking for a button press. Time to
+ready and the first request's latency are measured from process start,
+printed, and served on /metrics (niva_startup_seconds{phase=...}) and
+/metrics/startup when the metrics endpoint is on.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+_imported_at = time.perf_counter()
+
+
+def process_age() -> float:
+    """Seconds since this process started (since this module was imported where /proc is missing)."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime", "r") as f:
+            return max(0.0, float(f.read().split()[0]) - started)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - _imported_at
+
+
+class Startup:
+    """Readiness of the models loaded at launch, and how long getting there took."""
+
+    def __init__(self, ready_timeout: float = 120.0):
+        self.ready_timeout = ready_timeout
+        self.phases = {}  # phase -> seconds since process start
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str):
+        """Record when a phase was first reached."""
+        self.phases.setdefault(phase, round(process_age(), 3))
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def set_ready(self):
+        if self.ready:
+            return
+        self.error = None
+        self.mark("ready")
+        self._done.set()
+        imports = f" (imports {self.phases['imports']:.1f} s)" if "imports" in self.phases else ""
+        print(f"✅ Ready {self.phases['ready']:.1f} s after start{imports}")
+
+    def start(self, init):
+        """Run init() in a daemon thread; it (or set_ready) marks the process ready."""
+        if self._thread is not None:
+            return self
+
+        def run():
+            try:
+                init()
+                self.set_ready()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Model loading failed: {self.error}")
+                self._done.set()
+
+        self._thread = threading.Thread(target=run, name="niva-startup", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        self._done.wait(self.ready_timeout if timeout is None else timeout)
+        return self.ready
+
+    async def wait_ready(self, timeout: float = None) -> bool:
+        """Wait (without blocking the event loop) until the models are loaded; False on timeout or failure."""
+        if not self._done.is_set():
+            await asyncio.to_thread(self._done.wait, self.ready_timeout if timeout is None else timeout)
+        return self.ready
+
+    def status(self) -> str:
+        if self.error is not None:
+            return f"❌ Model loading failed: {self.error}"
+        if self.ready:
+            return f"✅ Ready (models loaded {self.phases['ready']:.1f} s after start)"
+        if self._thread is None:
+            return "⏳ Models not loaded"
+        return f"⏳ Loading models… {process_age():.0f} s"
+
+    @contextlib.contextmanager
+    def request(self):
+        """Time the first request served (waiting for readiness included); later ones pass through."""
+        if "first_request" in self.phases or not self._lock.acquire(blocking=False):
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases["first_request_latency"] = round(time.perf_counter() - start, 3)
+            self.mark("first_request")
+            print(f"⏱️ First request took {self.phases['first_request_latency']:.2f} s "
+                  f"({self.phases['first_request']:.1f} s after start)")
+
+    def report(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "process_age_seconds": round(process_age(), 3),
+                "phases": dict(self.phases)}
+
+    def render(self) -> str:
+        """Prometheus gauges for the metrics endpoint."""
+        lines = ["# HELP niva_startup_seconds Seconds from process start to each startup phase",
+                 "# TYPE niva_startup_seconds gauge"]
+        lines += [f'niva_startup_seconds{{phase="{phase}"}} {seconds}' for phase, seconds in self.phases.items()
+                  if phase != "first_request_latency"]
+        lines += ["# HELP niva_first_request_seconds Latency of the first request after start",
+                  "# TYPE niva_first_request_seconds gauge"]
+        if "first_request_latency" in self.phases:
+            lines.append(f"niva_first_request_seconds {self.phases['first_request_latency']}")
+        lines += ["# HELP niva_ready Whether the models are loaded", "# TYPE niva_ready gauge", f"niva_ready {int(self.ready)}"]
+        return "\n".join(lines) + "\n"
+
+
+_startup = None
+
+
+def get_startup() -> Startup:
+    global _startup
+    if _startup is None:
+        from .tracing import add_collector
+        _startup = Startup(ready_timeout=float(os.getenv("NIVA_READY_TIMEOUT", "120")))
+        add_collector("startup", _startup.render, _startup.report)
+    return _startup
+
+
+def import_times(module: str, python: str = sys.executable) -> list:
+    """(module, self µs, cumulative µs, depth) for each import made by `import module` in a fresh interpreter."""
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                          text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(own), int(cumulative), depth))
+    # Only what `import module` pulled in, not the interpreter's own startup (site, encodings)
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = max((i for i in range(end) if rows[i][3] == 0), default=-1) + 1
+    return rows[start:end + 1]
+
+
+def by_package(rows: list) -> Counter:
+    """Self time (µs) per top-level package; each import counts once, under the package it belongs to."""
+    totals = Counter()
+    for name, own, _, _ in rows:
+        totals[name.split(".")[0]] += own
+    return totals
+
+
+def report(module: str, budget_ms: float = 0, top: int = 15) -> bool:
+    """Print the import-time report for `module`; False when it is over the budget."""
+    rows = import_times(module)
+    total_ms = rows[-1][2] / 1000
+    verdict = f" (budget {budget_ms:.0f} ms)" if budget_ms else ""
+    print(f"📦 import {module}: {total_ms:.0f} ms, {len(rows)} modules{verdict}")
+    for package, own in by_package(rows).most_common(top):
+        print(f"   {package:<28} {own / 1000:8.1f} ms  {100 * own / rows[-1][2]:5.1f}%")
+    if budget_ms and total_ms > budget_ms:
+        print(f"❌ {total_ms - budget_ms:.0f} ms over the import budget")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for a NIVA module")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("NIVA_IMPORT_BUDGET_MS", "0")))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    sys.exit(0 if report(args.module, args.budget_ms, args.top) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+Per-stage latency tracing.
+
+Stages (STT resampling and upload, planner, each tool, embedding, Chroma,
+LLM, TTS) are timed as spans. Spans of one turn are collected and, when
+the turn ends, labelled with its intent and handed to the exporters
+configured in NIVA_TRACING (comma separated):
+
+    prometheus - histograms per (stage, intent), served as Prometheus text
+                 on NIVA_METRICS_PORT (/metrics, /metrics/percentiles;
+                 other modules add gauges with add_collector)
+    jsonl      - one JSON line per span in NIVA_TRACE_PATH
+    otel       - OpenTelemetry spans, if opentelemetry-api is installed
+
+With NIVA_TRACING empty (default) span() hands back a shared no-op context
+manager, so instrumented code pays one attribute check.
+"""
+import asyncio
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_ids = itertools.count(1)
+_current_turn = contextvars.ContextVar("niva_turn", default=None)
+_current_span = contextvars.ContextVar("niva_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attrs")
+
+    def __init__(self, name: str, trace_id: int, parent_id: int, attrs: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = 0.0
+        self.attrs = attrs
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "trace": self.trace_id, "span": self.span_id, "parent": self.parent_id,
+                "start": self.start, "ms": round(self.duration * 1000, 3), **self.attrs}
+
+
+class Turn:
+    """The spans of one user turn; labelled with the turn's intent when it ends."""
+    __slots__ = ("span", "spans", "closed")
+
+    def __init__(self, attrs: dict):
+        self.span = Span("turn", next(_ids), None, attrs)
+        self.spans = []
+        self.closed = False
+
+
+class _Noop:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "token", "t0")
+
+    def __init__(self, tracer, name: str, attrs: dict):
+        turn = _current_turn.get()
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        elif turn is not None:
+            trace_id, parent_id = turn.span.trace_id, turn.span.span_id
+        else:
+            trace_id, parent_id = next(_ids), None
+        self.tracer = tracer
+        self.span = Span(name, trace_id, parent_id, attrs)
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        self.t0 = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self.t0
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        _reset(_current_span, self.token)
+        self.tracer._record(self.span)
+        return False
+
+
+class _TurnContext:
+    __slots__ = ("tracer", "turn", "token", "t0")
+
+    def __init__(self, tracer, attrs: dict):
+        self.tracer = tracer
+        self.turn = Turn(attrs)
+
+    def __enter__(self):
+        self.token = _current_turn.set(self.turn)
+        self.t0 = time.perf_counter()
+        return self.turn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.turn.span.duration = time.perf_counter() - self.t0
+        if exc_type is not None:
+            self.turn.span.attrs["error"] = exc_type.__name__
+        _reset(_current_turn, self.token)
+        self.tracer._close(self.turn)
+        return False
+
+
+def _reset(var, token):
+    try:
+        var.reset(token)
+    except ValueError:
+        # Exited in another context (e.g. a generator resumed elsewhere)
+        var.set(None)
+
+
+class Tracer:
+    """Times spans and hands each finished turn's spans to the exporters."""
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+        self.enabled = bool(self.exporters)
+
+    def span(self, name: str, **attrs):
+        """Context manager timing one stage."""
+        if not self.enabled:
+            return _NOOP
+        return _SpanContext(self, name, attrs)
+
+    def turn(self, **attrs):
+        """Context manager grouping a turn's spans; nested turns join the outer one."""
+        if not self.enabled or _current_turn.get() is not None:
+            return _NOOP
+        return _TurnContext(self, attrs)
+
+    def annotate(self, **attrs):
+        """Set attributes (e.g. intent) on the current turn."""
+        turn = _current_turn.get()
+        if turn is not None:
+            turn.span.attrs.update(attrs)
+
+    def _record(self, span: Span):
+        turn = _current_turn.get()
+        if turn is not None and not turn.closed:
+            turn.spans.append(span)
+            return
+        if turn is not None:
+            # Finished after its turn (e.g. a trailing TTS sentence)
+            span.attrs.setdefault("intent", turn.span.attrs.get("intent", ""))
+        self._export([span])
+
+    def _close(self, turn: Turn):
+        turn.closed = True
+        intent = turn.span.attrs.setdefault("intent", "")
+        for span in turn.spans:
+            span.attrs.setdefault("intent", intent)
+        self._export(turn.spans + [turn.span])
+
+    def _export(self, spans: list):
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                print(f"⚠️ Trace exporter {type(exporter).__name__} failed: {e}")
+
+    def exporter(self, kind):
+        return next((e for e in self.exporters if isinstance(e, kind)), None)
+
+    def percentiles(self) -> dict:
+        """p50/p95/p99 per (stage, intent), if the prometheus exporter is on."""
+        prometheus = self.exporter(PrometheusExporter)
+        return prometheus.percentiles() if prometheus else {}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles interpolated within a bucket."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class PrometheusExporter:
+    """Latency histograms per (stage, intent), rendered in Prometheus text format."""
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def export(self, spans: list):
+        with self._lock:
+            for span in spans:
+                key = (span.name, span.attrs.get("intent", ""))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(self.buckets)
+                histogram.observe(span.duration)
+
+    def percentiles(self) -> dict:
+        with self._lock:
+            return {f"{stage}/{intent or '-'}": {"count": h.count, **{f"p{round(q * 100)}": round(h.quantile(q), 4) for q in self.QUANTILES}}
+                    for (stage, intent), h in sorted(self._histograms.items())}
+
+    def render(self) -> str:
+        lines = ["# HELP niva_stage_seconds Latency of each pipeline stage per intent",
+                 "# TYPE niva_stage_seconds histogram"]
+        quantiles = []
+        with self._lock:
+            for (stage, intent), h in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",intent="{intent}"'
+                cumulative = 0
+                for bound, n in zip(self.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'niva_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'niva_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"niva_stage_seconds_sum{{{labels}}} {h.sum:.6f}")
+                lines.append(f"niva_stage_seconds_count{{{labels}}} {h.count}")
+                quantiles += [f'niva_stage_seconds_quantile{{{labels},quantile="{q}"}} {h.quantile(q):.6f}' for q in self.QUANTILES]
+        lines += ["# HELP niva_stage_seconds_quantile Estimated latency quantiles per stage and intent",
+                  "# TYPE niva_stage_seconds_quantile gauge"] + quantiles
+        return "\n".join(lines) + "\n"
+
+
+class JSONLExporter:
+    """One JSON line per span."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list):
+        lines = [json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans]
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+class OTelExporter:
+    """Replays finished spans into OpenTelemetry (needs opentelemetry-api and an SDK)."""
+
+    def __init__(self):
+        from opentelemetry import trace
+        self._trace = trace
+        self._tracer = trace.get_tracer("niva")
+
+    def export(self, spans: list):
+        started = {}
+        for span in sorted(spans, key=lambda s: s.start):
+            parent = started.get(span.parent_id)
+            context = self._trace.set_span_in_context(parent) if parent is not None else None
+            started[span.span_id] = self._tracer.start_span(span.name, context=context, start_time=int(span.start * 1e9),
+                                                            attributes=span.attrs)
+        for span in spans:
+            started[span.span_id].end(end_time=int((span.start + span.duration) * 1e9))
+
+
+def in_context(fn):
+    """Wrap fn for a thread pool so its spans join the submitting turn."""
+    if not get_tracer().enabled:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def traced(name: str):
+    """Decorator: time every call of a sync or async function as span `name`."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with get_tracer().span(name):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with get_tracer().span(name):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+_collectors = {}
+
+
+def add_collector(name: str, render, report=None):
+    """Extra gauges on /metrics: render() returns Prometheus text, report() is served as JSON on /metrics/<name>."""
+    _collectors[name] = (render, report)
+
+
+def collector_report(name: str):
+    """A registered collector's JSON report (None when it has none), e.g. for benchmark summaries."""
+    report = _collectors.get(name, (None, None))[1]
+    return report() if report is not None else None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    tracer = None
+
+    def do_GET(self):
+        prometheus = self.tracer.exporter(PrometheusExporter)
+        name = self.path[len("/metrics/"):]
+        if self.path == "/metrics":
+            text = prometheus.render() + "".join(render() for render, _ in list(_collectors.values()))
+            body, content_type = text.encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics/percentiles":
+            body, content_type = json.dumps(prometheus.percentiles(), indent=2).encode(), "application/json"
+        elif _collectors.get(name, (None, None))[1] is not None:
+            body, content_type = json.dumps(_collectors[name][1](), indent=2).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int = None, tracer: Tracer = None):
+    """Serve /metrics in a daemon thread; returns the server (None without the prometheus exporter)."""
+    tracer = tracer or get_tracer()
+    if tracer.exporter(PrometheusExporter) is None:
+        return None
+    port = port if port is not None else int(os.getenv("NIVA_METRICS_PORT", "9464"))
+    handler = type("MetricsHandler", (_MetricsHandler,), {"tracer": tracer})
+    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+    threading.Thread(target=server.serve_forever, name="niva-metrics", daemon=True).start()
+    print(f"📈 Metrics on http://localhost:{server.server_port}/metrics")
+    return server
+
+
+def from_env() -> Tracer:
+    """Configure from NIVA_TRACING / NIVA_TRACE_PATH."""
+    exporters = []
+    for kind in filter(None, (k.strip() for k in os.getenv("NIVA_TRACING", "").split(","))):
+        if kind == "prometheus":
+            exporters.append(PrometheusExporter())
+        elif kind == "jsonl":
+            exporters.append(JSONLExporter(os.getenv("NIVA_TRACE_PATH") or "traces.jsonl"))
+        elif kind == "otel":
+            try:
+                exporters.append(OTelExporter())
+            except ImportError:
+                print("⚠️ NIVA_TRACING=otel needs: pip install opentelemetry-api opentelemetry-sdk")
+        else:
+            raise ValueError(f"Unknown trace exporter: {kind}")
+    return Tracer(exporters)
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = from_env()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    """Replace the process-wide tracer (tests, benchmarks)."""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attrs):
+    return get_tracer().span(name, **attrs)
@@ -5,6 +5,13 @@ Supports Telugu and English with natural neural voices.
 import edge_tts
 import asyncio
 import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .single_flight import SingleFlight, enabled_from_env as single_flight_enabled
+from .tracing import in_context, traced
 
 # Voice mappings for Telugu and English
 VOICES = {
@@ -18,6 +25,29 @@ VOICES = {
     }
 }
 
+# Sentence end: punctuation followed by whitespace (so "2.67" is not split), or a newline
+_SENTENCE_END = re.compile(r'[.!?।]+(?=\s)|\n+')
+MIN_SENTENCE_CHARS = 12
+
+
+def split_sentences(buffer, min_chars=MIN_SENTENCE_CHARS):
+    """
+    Split streamed text into complete sentences.
+    
+    Returns (sentences, remainder) where remainder is the unfinished tail.
+    Fragments shorter than min_chars (e.g. "1.") are merged into the next sentence.
+    """
+    sentences, start = [], 0
+    for match in _SENTENCE_END.finditer(buffer):
+        if match.end() - start < min_chars:
+            continue
+        sentence = buffer[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, buffer[start:]
+
+
 class EdgeTTS:
     def __init__(self, default_language="te", default_gender="female"):
         """
@@ -29,22 +59,35 @@ class EdgeTTS:
         """
         self.default_language = default_language
         self.default_gender = default_gender
+        # Identical sentences synthesized concurrently (same text and voice) share one request
+        self.flight = SingleFlight("tts", enabled=single_flight_enabled())
         print(f"✅ TTS initialized with {default_language} {default_gender} voice")
     
-    async def _synthesize_async(self, text, output_path, language=None, gender=None):
-        """Internal async method to synthesize speech."""
+    def _voice(self, language=None, gender=None):
         lang = language or self.default_language
         gend = gender or self.default_gender
-        
-        # Get voice
-        voice = VOICES.get(lang, {}).get(gend, VOICES["en"]["female"])
-        
+        return VOICES.get(lang, {}).get(gend, VOICES["en"]["female"])
+    
+    async def _synthesize_async(self, text, output_path, language=None, gender=None):
+        """Internal async method to synthesize speech."""
         # Create communicate object
-        communicate = edge_tts.Communicate(text, voice)
+        communicate = edge_tts.Communicate(text, self._voice(language, gender))
         
         # Save audio
         await communicate.save(output_path)
+        return output_path
+    
+    def _flight_key(self, text, language, gender):
+        return (" ".join(text.split()), self._voice(language, gender))
     
+    @staticmethod
+    def _deliver(path, output_path):
+        """Copy audio shared from another caller's synthesis to this caller's path."""
+        if path != output_path:
+            shutil.copyfile(path, output_path)
+        return output_path
+    
+    @traced("tts")
     def synthesize(self, text, output_path="output.mp3", language=None, gender=None):
         """
         Synthesize text to speech and save to file.
@@ -60,8 +103,20 @@ class EdgeTTS:
         """
         try:
             # Run async synthesis
-            asyncio.run(self._synthesize_async(text, output_path, language, gender))
-            return output_path
+            path = self.flight.do(self._flight_key(text, language, gender),
+                                  lambda: asyncio.run(self._synthesize_async(text, output_path, language, gender)))
+            return self._deliver(path, output_path)
+        except Exception as e:
+            print(f"❌ TTS error: {e}")
+            return None
+    
+    @traced("tts")
+    async def asynthesize(self, text, output_path="output.mp3", language=None, gender=None):
+        """Async version of synthesize for use inside a running event loop."""
+        try:
+            path = await self.flight.ado(self._flight_key(text, language, gender),
+                                         lambda: self._synthesize_async(text, output_path, language, gender))
+            return self._deliver(path, output_path)
         except Exception as e:
             print(f"❌ TTS error: {e}")
             return None
@@ -75,6 +130,136 @@ class EdgeTTS:
         return self.synthesize(text, output_path, language="en")
 
 
+class SentenceTTSStream:
+    """
+    Incremental TTS for streamed LLM output.
+    
+    Feed text as it arrives; each completed sentence is synthesized in the
+    background while later tokens are still generating. Audio files are
+    handed back in sentence order and live in a temporary directory until
+    cleanup() (or the end of a `with` block).
+    """
+    
+    def __init__(self, tts, language=None, max_workers=2):
+        self.tts = tts
+        self.language = language
+        self.output_dir = tempfile.mkdtemp(prefix="niva_tts_")
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._buffer = ""
+        self._pending = []
+        self._parts = 0  # numbered by submission: ready() shrinks _pending
+    
+    def _submit(self, sentence):
+        path = os.path.join(self.output_dir, f"part_{self._parts:03d}.mp3")
+        self._parts += 1
+        self._pending.append(self._pool.submit(in_context(self.tts.synthesize), sentence, path, self.language))
+    
+    def feed(self, text):
+        """Add streamed text; queue synthesis for every sentence it completes."""
+        sentences, self._buffer = split_sentences(self._buffer + text)
+        for sentence in sentences:
+            self._submit(sentence)
+    
+    def close(self):
+        """Flush the unfinished tail as the last sentence."""
+        tail, self._buffer = self._buffer.strip(), ""
+        if tail:
+            self._submit(tail)
+        self._pool.shutdown(wait=False)
+    
+    def ready(self):
+        """Return audio paths that finished in order so far (non-blocking)."""
+        paths = []
+        while self._pending and self._pending[0].done():
+            path = self._pending.pop(0).result()
+            if path:
+                paths.append(path)
+        return paths
+    
+    def drain(self):
+        """Yield the remaining audio paths in order, waiting for each one."""
+        while self._pending:
+            path = self._pending.pop(0).result()
+            if path:
+                yield path
+    
+    def cleanup(self):
+        """Stop synthesis still queued and delete the audio files (call once the paths are consumed)."""
+        self._buffer = ""
+        self._pending.clear()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+class AsyncSentenceTTSStream:
+    """asyncio counterpart of SentenceTTSStream using EdgeTTS.asynthesize."""
+    
+    def __init__(self, tts, language=None):
+        self.tts = tts
+        self.language = language
+        self.output_dir = tempfile.mkdtemp(prefix="niva_tts_")
+        self._buffer = ""
+        self._pending = []
+        self._parts = 0  # numbered by submission: ready() and cancel() shrink _pending
+    
+    def _submit(self, sentence):
+        path = os.path.join(self.output_dir, f"part_{self._parts:03d}.mp3")
+        self._parts += 1
+        self._pending.append(asyncio.ensure_future(self.tts.asynthesize(sentence, path, self.language)))
+    
+    def feed(self, text):
+        """Add streamed text; start synthesis for every sentence it completes."""
+        sentences, self._buffer = split_sentences(self._buffer + text)
+        for sentence in sentences:
+            self._submit(sentence)
+    
+    def close(self):
+        """Flush the unfinished tail as the last sentence."""
+        tail, self._buffer = self._buffer.strip(), ""
+        if tail:
+            self._submit(tail)
+    
+    def ready(self):
+        """Return audio paths that finished in order so far (non-blocking)."""
+        paths = []
+        while self._pending and self._pending[0].done():
+            path = self._pending.pop(0).result()
+            if path:
+                paths.append(path)
+        return paths
+    
+    async def drain(self):
+        """Yield the remaining audio paths in order, awaiting each one."""
+        while self._pending:
+            path = await self._pending.pop(0)
+            if path:
+                yield path
+    
+    def cancel(self):
+        """Drop buffered text and cancel synthesis still in flight (barge-in)."""
+        self._buffer = ""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+    
+    def cleanup(self):
+        """Cancel synthesis in flight and delete the audio files (call once the paths are consumed)."""
+        self.cancel()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
 # Test module
 if __name__ == "__main__":
     print("Testing Edge TTS module...")
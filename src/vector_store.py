@@ -7,6 +7,9 @@ import json
 import chromadb
 from chromadb.utils import embedding_functions
 
+from .results import SchemeMatch, SchemeListResult
+from .tracing import span, traced
+
 
 class SchemeVectorStore:
     """ChromaDB-based vector store for government schemes."""
@@ -70,25 +73,35 @@ class SchemeVectorStore:
         collection.add(documents=documents, metadatas=metadatas, ids=ids)
         print(f"✅ Added {len(schemes)} schemes to vector store")
     
-    def search(self, query: str, language: str = "te", n_results: int = 3) -> str:
-        """Search for relevant schemes."""
-        results = self.collection.query(query_texts=[query], n_results=n_results)
-        
-        if not results["metadatas"] or not results["metadatas"][0]:
-            return "కోరిన యోజనలు కనబడలేదు." if language == "te" else "No schemes found."
-        
-        response = ""
-        for i, meta in enumerate(results["metadatas"][0], 1):
-            name = meta.get(f"name_{language}", meta.get("name_en", "Unknown"))
-            benefits = meta.get(f"benefits_{language}", meta.get("benefits_en", ""))
-            sector = meta.get("sector", "")
-            
-            if language == "te":
-                response += f"{i}. **{name}** ({sector})\n   లాభాలు: {benefits}\n\n"
-            else:
-                response += f"{i}. **{name}** ({sector})\n   Benefits: {benefits}\n\n"
+    @traced("vector_search")
+    def search(self, query: str, language: str = "te", n_results: int = 3) -> SchemeListResult:
+        """Search for relevant schemes (render with renderer.render)."""
+        # Embed and query separately so each shows up as its own stage
+        with span("vector_search.embed"):
+            embeddings = self.embedding_fn([query])
+        with span("vector_search.chroma"):
+            results = self.collection.query(query_embeddings=embeddings, n_results=n_results)
+        return self._result(results, 0, query, language)
+    
+    @traced("vector_search")
+    def search_many(self, queries: list, language: str = "te", n_results: int = 3) -> list:
+        """Search several queries with one embedding batch and one Chroma query."""
+        with span("vector_search.embed"):
+            embeddings = self.embedding_fn(list(queries))
+        with span("vector_search.chroma"):
+            results = self.collection.query(query_embeddings=embeddings, n_results=n_results)
+        return [self._result(results, i, query, language) for i, query in enumerate(queries)]
+    
+    @staticmethod
+    def _result(results: dict, i: int, query: str, language: str) -> SchemeListResult:
+        matches = []
+        if results["metadatas"] and results["metadatas"][i]:
+            distances = (results.get("distances") or [[]] * (i + 1))[i]
+            for j, meta in enumerate(results["metadatas"][i]):
+                score = 1.0 - distances[j] if j < len(distances) else 1.0
+                matches.append(SchemeMatch(meta.get("id", results["ids"][i][j]), score))
         
-        return response
+        return SchemeListResult(kind="vector", language=language, matches=matches, query=query)
 
 
 # Singleton instance
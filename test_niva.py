@@ -102,47 +102,48 @@ def test_tools():
     print("\n🔍 Testing LangChain tools...")
     try:
         from src.tools import search_schemes, check_eligibility, get_all_schemes
+        from src.renderer import render
         
         # Test 1: Search schemes in Telugu
-        result = search_schemes.invoke({"query": "రైతు", "language": "te"})
+        result = render(search_schemes.invoke({"query": "రైతు", "language": "te"}))
         if "కిసాన్" not in result:
             print(f"❌ Telugu search failed: {result[:100]}")
             return False
         
         # Test 2: Search schemes in English
-        result = search_schemes.invoke({"query": "health", "language": "en"})
+        result = render(search_schemes.invoke({"query": "health", "language": "en"}))
         if "Ayushman" not in result:
             print(f"❌ English search failed: {result[:100]}")
             return False
         
         # Test 3: Check eligibility (eligible)
-        result = check_eligibility.invoke({
+        result = render(check_eligibility.invoke({
             "scheme_name": "PM Kisan",
             "age": 35,
             "annual_income": 150000,
             "occupation": "farmer",
             "category": None,
             "language": "en"
-        })
+        }))
         if "eligible" not in result.lower():
             print(f"❌ Eligibility check failed: {result[:100]}")
             return False
         
         # Test 4: Check eligibility (not eligible)
-        result = check_eligibility.invoke({
+        result = render(check_eligibility.invoke({
             "scheme_name": "Ayushman Bharat",
             "age": 40,
             "annual_income": 500000,
             "occupation": None,
             "category": None,
             "language": "en"
-        })
+        }))
         if "not eligible" not in result.lower():
             print(f"❌ Ineligibility check failed: {result[:100]}")
             return False
         
         # Test 5: Get all schemes
-        result = get_all_schemes.invoke({"language": "en"})
+        result = render(get_all_schemes.invoke({"language": "en"}))
         if "6" not in result and "six" not in result.lower():
             print(f"❌ Get all schemes failed: {result[:100]}")
             return False
@@ -155,6 +156,1191 @@ def test_tools():
         traceback.print_exc()
         return False
 
+def test_renderer():
+    """Test structured tool results and the memoized renderer"""
+    print("\n🔍 Testing result renderer...")
+    try:
+        from src.tools import get_all_schemes, get_schemes_by_sector
+        from src.renderer import render, render_compact, scheme_fragment
+        
+        result = get_schemes_by_sector.invoke({"sector": "health", "language": "en"})
+        if [m.scheme_id for m in result.matches] != ["ayushman"]:
+            print(f"❌ Sector result has wrong schemes: {result.matches}")
+            return False
+        
+        scheme_fragment.cache_clear()
+        render(get_all_schemes.invoke({"language": "te"}))
+        render(get_all_schemes.invoke({"language": "te"}))
+        info = scheme_fragment.cache_info()
+        if info.hits < 6 or info.misses != 6:
+            print(f"❌ Fragments not memoized: {info}")
+            return False
+        
+        compact = render_compact(result)
+        if "**" in compact or "Ayushman" not in compact:
+            print(f"❌ Compact rendering failed: {compact}")
+            return False
+        
+        print("✅ Renderer working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Renderer testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_response_cache():
+    """Test response cache TTL/LRU eviction and catalogue invalidation"""
+    print("\n🔍 Testing response cache...")
+    try:
+        from src.response_cache import CACHEABLE_INTENTS, ResponseCache, make_key
+        from src.catalogue import reload_schemes
+        
+        if CACHEABLE_INTENTS & {"compare", "eligibility", "calculate"}:
+            print(f"❌ Answers that depend on the user's wording must not be cached: {CACHEABLE_INTENTS}")
+            return False
+        
+        cache = ResponseCache(max_size=2, ttl_seconds=60)
+        k1 = make_key("all", {"language": "en"}, "en")
+        k2 = make_key("sector", {"sector": "health", "language": "en"}, "en")
+        k3 = make_key("apply", {"scheme_name": "kisan", "language": "en"}, "en")
+        cache.put(k1, "a")
+        cache.put(k2, "b")
+        cache.get(k1)
+        cache.put(k3, "c")
+        if cache.get(k2) is not None or cache.get(k1) != "a":
+            print("❌ LRU eviction failed")
+            return False
+        
+        expired = ResponseCache(ttl_seconds=-1)
+        expired.put(k1, "a")
+        if expired.get(k1) is not None:
+            print("❌ TTL expiry failed")
+            return False
+        
+        reload_schemes()
+        if len(cache) != 0:
+            print("❌ Cache not cleared on catalogue reload")
+            return False
+        
+        import gc, weakref
+        from src import catalogue
+        listeners = len(catalogue._reload_listeners)
+        dropped = weakref.ref(ResponseCache())
+        gc.collect()
+        reload_schemes()
+        if dropped() is not None or len(catalogue._reload_listeners) > listeners:
+            print("❌ Reload listener keeps a discarded cache alive")
+            return False
+        
+        print("✅ Response cache working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Response cache testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_extractor():
+    """Test the compiled single-pass intent/parameter extractor"""
+    print("\n🔍 Testing keyword extractor...")
+    try:
+        from src.extractor import get_extractor
+        
+        extractor = get_extractor()
+        result = extractor.extract("I am 35 years old, farmer, annual income 150000. Am I eligible for PM Kisan?")
+        expected = {"age": 35, "income": 150000, "occupation": "farmer", "scheme_name": "pmkisan"}
+        if result.intent != "eligibility" or result.params != expected:
+            print(f"❌ English extraction failed: {result}")
+            return False
+        
+        result = extractor.extract("నా వయస్సు 35, ఆదాయం 1.5 లక్షలు. ఆరోగ్యం విభాగం యోజనలు")
+        if result.intent != "sector" or result.params.get("sector") != "health" or result.params.get("income") != 150000:
+            print(f"❌ Telugu extraction failed: {result}")
+            return False
+        
+        if extractor.extract("Show me this scheme").intent != "search":
+            print("❌ 'hi' inside 'this' was treated as a greeting")
+            return False
+        
+        print("✅ Extractor working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Extractor testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_intent_classifier():
+    """Test the local intent classifier (accuracy and sub-millisecond latency)"""
+    print("\n🔍 Testing intent classifier...")
+    try:
+        from src.intent_classifier import load_utterances, evaluate
+        
+        report = evaluate(load_utterances())
+        print(f"  Accuracy {report['accuracy']:.1%}, p50 {report['latency_ms_p50']:.3f} ms")
+        if report["accuracy"] < 0.7:
+            print(f"❌ Held-out accuracy too low: {report['accuracy']:.1%}")
+            return False
+        if report["latency_ms_p50"] > 1.0:
+            print(f"❌ Classifier too slow: {report['latency_ms_p50']:.3f} ms")
+            return False
+        
+        # Routing: keyword rules that fired win unless the classifier agrees or is very sure
+        from src.extractor import get_extractor
+        from src.intent_classifier import get_intent_classifier, pick_intent
+        routes = {
+            "which government schemes do you have": "all",
+            "what is Jan Dhan yojana": "search",
+            "what is PM Kisan": "search",
+            "list all schemes": "all",
+            "how do I apply for PM Awas": "apply",
+            "am I eligible for ayushman bharat": "eligibility",
+            "compare PM Kisan and PM Awas": "compare",
+            "how much money will I get from PM Kisan": "calculate",
+            "show me health schemes": "sector",
+            "కిసాన్ గురించి చెప్పండి": "search",
+        }
+        extractor, classifier = get_extractor(), get_intent_classifier()
+        for text, expected in routes.items():
+            intent, _ = pick_intent(classifier, text, extractor.extract(text))
+            if intent != expected:
+                print(f"❌ {text!r} routed to {intent}, expected {expected}")
+                return False
+        
+        class Unsure:
+            def __init__(self, intent, confidence):
+                self.answer = (intent, confidence)
+            
+            def predict(self, text):
+                return self.answer
+        
+        applying = extractor.extract("how do I apply for PM Awas")
+        if pick_intent(Unsure("compare", 0.8), "", applying)[0] != "apply" or \
+                pick_intent(Unsure("compare", 0.95), "", applying)[0] != "compare":
+            print("❌ Classifier must only overrule a keyword rule when very sure")
+            return False
+        
+        print("✅ Intent classifier working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Intent classifier testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_prompt_builder():
+    """Test prompt compaction and token budgeting"""
+    print("\n🔍 Testing prompt builder...")
+    try:
+        from src.prompt_builder import build_prompt, count_tokens, PROMPT_BUDGETS
+        
+        info = "\n".join(f"Scheme {i} [agriculture] | ₹6000 per year | Aadhar Card, Bank Account" for i in range(60))
+        history = [{"role": "user", "content": "Tell me about PM Kisan. " * 20},
+                   {"role": "assistant", "content": "PM Kisan gives ₹6000 per year. " * 20}] * 5
+        plan = build_prompt(["calculate"], "en", "How much will I get?", info, history)
+        
+        if plan.prompt_tokens > PROMPT_BUDGETS["calculate"]:
+            print(f"❌ Prompt over budget: {plan.prompt_tokens}")
+            return False
+        if count_tokens(plan.messages[0].content + plan.messages[1].content) > PROMPT_BUDGETS["calculate"]:
+            print("❌ Rendered prompt over budget")
+            return False
+        if plan.dropped_lines == 0 or not plan.info_lines:
+            print("❌ Info was not trimmed to the budget")
+            return False
+        
+        te_plan = build_prompt(["calculate"], "te", "నాకు ఎంత వస్తుంది?", "PM Kisan | ₹6000", history[:2])
+        if te_plan.max_tokens <= plan.max_tokens or te_plan.history_used != 2:
+            print(f"❌ Unexpected Telugu plan: max_tokens={te_plan.max_tokens}, history={te_plan.history_used}")
+            return False
+        
+        print(f"  Prompt {plan.prompt_tokens} tokens, {plan.dropped_lines} lines dropped, max_tokens {plan.max_tokens}")
+        print("✅ Prompt builder working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Prompt builder testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_groq_scheduler():
+    """Test Groq rate limiting and retry-after handling (no network)"""
+    print("\n🔍 Testing Groq scheduler...")
+    try:
+        import time
+        import httpx
+        import groq
+        from src.groq_client import GroqScheduler, PRIORITY_BATCH
+        
+        scheduler = GroqScheduler("test", requests_per_minute=600, tokens_per_minute=6000)
+        scheduler.requests.tokens = 0  # empty bucket: next request waits ~0.1s
+        start = time.perf_counter()
+        scheduler.acquire(cost=10, level=PRIORITY_BATCH)
+        if time.perf_counter() - start < 0.05:
+            print("❌ Empty bucket did not throttle")
+            return False
+        
+        response = httpx.Response(429, headers={"retry-after": "0.05"}, request=httpx.Request("POST", "https://api.groq.com"))
+        attempts = []
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise groq.RateLimitError("rate limited", response=response, body=None)
+            return "ok"
+        
+        start = time.perf_counter()
+        result = scheduler.call(flaky)
+        elapsed = time.perf_counter() - start
+        stats = scheduler.stats()
+        if result != "ok" or stats["retries"] != 2 or elapsed < 0.1:
+            print(f"❌ Unexpected retry behaviour: {result}, {stats}, {elapsed:.2f}s")
+            return False
+        
+        # The shared async client must survive event loops coming and going (asyncio.run per call)
+        import asyncio
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from src.groq_client import get_async_http_client
+        
+        class Ok(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Ok)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        async def fetch():
+            return (await get_async_http_client().get(f"http://127.0.0.1:{server.server_port}/")).text
+        try:
+            bodies = [asyncio.run(fetch()) for _ in range(3)]
+        finally:
+            server.shutdown()
+        if bodies != ["ok"] * 3:
+            print(f"❌ Async client failed across event loops: {bodies}")
+            return False
+        
+        print(f"  {stats['retries']} retries, queue wait: {stats['queue_wait']}")
+        print("✅ Groq scheduler working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Groq scheduler testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_llm_router():
+    """Test LLM provider selection and failover (no network)"""
+    print("\n🔍 Testing LLM router...")
+    try:
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from src.llm_providers import LLMProvider, LLMRouter, LocalLlamaProvider
+        
+        class FakeProvider(LLMProvider):
+            def __init__(self, name, fail=False):
+                super().__init__()
+                self.name, self.fail = name, fail
+            def available(self):
+                return True
+            def build(self):
+                return FakeListChatModel(responses=[f"answer from {self.name}"])
+            def invoke(self, messages, max_tokens, priority=None):
+                if self.fail:
+                    raise RuntimeError("provider down")
+                return super().invoke(messages, max_tokens, priority)
+        
+        router = LLMRouter([FakeProvider("groq", fail=True), FakeProvider("local")], intent_providers={"all": "local"})
+        if [p.name for p in router.candidates("all")] != ["local", "groq"]:
+            print("❌ Per-intent provider not tried first")
+            return False
+        
+        # Failover: first provider fails and is put on cooldown
+        answer = None
+        for provider in router.candidates("search"):
+            try:
+                answer = provider.invoke([], 64).content
+                break
+            except RuntimeError as e:
+                router.report_failure(provider, e)
+        if answer != "answer from local" or [p.name for p in router.candidates("search")] != ["local"]:
+            print(f"❌ Failover failed: {answer}")
+            return False
+        
+        # A timeout fails the request over but doesn't cool the provider down
+        flaky = FakeProvider("groq")
+        router = LLMRouter([flaky])
+        router.report_failure(flaky, TimeoutError("read timed out"))
+        if [p.name for p in router.candidates("search")] != ["groq"]:
+            print("❌ A transient error put the only provider on cooldown")
+            return False
+        
+        class Incomplete(LLMProvider):
+            def available(self):
+                return True
+        try:
+            Incomplete()
+            print("❌ A provider without build() must not be constructible")
+            return False
+        except TypeError:
+            pass
+        
+        if LocalLlamaProvider(model_path="/nonexistent.gguf").available():
+            print("❌ Local provider available without a model file")
+            return False
+        
+        print("✅ LLM router working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ LLM router testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_conversation_store():
+    """Test the bounded conversation store and its persistence backends"""
+    print("\n🔍 Testing conversation store...")
+    try:
+        import tempfile
+        from src.conversation_store import ConversationStore, SQLiteBackend, AppendLogBackend
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for backend_cls, name in ((SQLiteBackend, "conversations.db"), (AppendLogBackend, "conversations.jsonl")):
+                path = os.path.join(tmp, name)
+                store = ConversationStore(capacity=6, backend=backend_cls(path, 6))
+                for i in range(50):
+                    store.add_turn("s1", f"question {i}", f"answer {i}", "en")
+                store.add_turn("s2", "ప్రశ్న", "జవాబు", "te")
+                
+                if len(store.session("s1").messages) != 6:
+                    print(f"❌ Ring buffer not bounded ({backend_cls.__name__})")
+                    return False
+                
+                # A fresh store (e.g. after a restart) sees the same recent messages
+                reopened = ConversationStore(capacity=6, backend=backend_cls(path, 6))
+                if reopened.history("s1") != store.history("s1") or reopened.history("s1")[-1]["content"] != "answer 49":
+                    print(f"❌ History not restored ({backend_cls.__name__})")
+                    return False
+                
+                reopened.clear("s2")
+                if ConversationStore(capacity=6, backend=backend_cls(path, 6)).history("s2"):
+                    print(f"❌ Cleared session came back ({backend_cls.__name__})")
+                    return False
+        
+        print("✅ Conversation store working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Conversation store testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_checkpointer():
+    """Test per-session graph state: history reducer and bounded checkpoints"""
+    print("\n🔍 Testing session checkpoints...")
+    try:
+        from langgraph.graph import StateGraph, END
+        from src.checkpointer import SessionCheckpoints, BoundedMemorySaver
+        from src.langgraph_agent import AgentState, HISTORY_LIMIT
+        
+        def respond(state):
+            turns = state.get("user_context", {}).get("turns", 0) + 1
+            return {"final_response": f"reply {turns}", "user_context": {"turns": turns},
+                    "conversation_history": [{"role": "user", "content": state["user_input"]},
+                                             {"role": "assistant", "content": f"reply {turns}"}]}
+        
+        workflow = StateGraph(AgentState)
+        workflow.add_node("respond", respond)
+        workflow.add_edge("respond", END)
+        workflow.set_entry_point("respond")
+        checkpoints = SessionCheckpoints(BoundedMemorySaver(), max_sessions=2)
+        graph = workflow.compile(checkpointer=checkpoints.saver)
+        
+        for i in range(30):
+            graph.invoke({"user_input": f"q{i}", "language": "en"}, checkpoints.config("a"), durability=checkpoints.durability)
+            checkpoints.compact("a")
+        state = graph.get_state(checkpoints.config("a")).values
+        if state["final_response"] != "reply 30" or len(state["conversation_history"]) != HISTORY_LIMIT:
+            print(f"❌ Session state not carried over: {state['final_response']}, {len(state['conversation_history'])} messages")
+            return False
+        if len(checkpoints.saver.storage["a"][""]) != 1:
+            print("❌ Old checkpoints were not pruned")
+            return False
+        
+        for session in ("b", "c"):
+            graph.invoke({"user_input": "hi", "language": "en"}, checkpoints.config(session), durability=checkpoints.durability)
+            checkpoints.compact(session)
+        if "a" in checkpoints.saver.storage:
+            print("❌ Least recently used session was not evicted")
+            return False
+        
+        print("✅ Session checkpoints working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Session checkpoints testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_speculation():
+    """Test speculative tool calls: reuse on agreement, discard otherwise"""
+    print("\n🔍 Testing speculation...")
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        from src.speculation import Speculator
+        
+        ran = []
+        def run_tool(call):
+            ran.append(call["tool"])
+            return f"result of {call['tool']}"
+        
+        def plan(tool, scheme, confidence=0.9):
+            return {"intent": "apply", "intent_confidence": confidence, "requires_info": False,
+                    "extracted_params": {"scheme_name": scheme},
+                    "tool_calls": [{"intent": "apply", "tool": tool, "args": {"scheme_name": scheme, "language": "en"}}]}
+        
+        speculator = Speculator(run_tool, ThreadPoolExecutor(max_workers=2), threshold=0.7)
+        if speculator.speculate("s", plan("get_application_steps", "pmkisan", confidence=0.3)):
+            print("❌ Speculated on a low-confidence plan")
+            return False
+        
+        # Final transcript agrees: the speculated result is reused
+        speculator.speculate("s", plan("get_application_steps", "pmkisan"))
+        future = speculator.take("s", plan("get_application_steps", "pmkisan")["tool_calls"][0])
+        if future is None or future.result() != "result of get_application_steps":
+            print("❌ Speculated result not reused")
+            return False
+        speculator.finish("s")
+        
+        # Final transcript disagrees: nothing to take, speculation counted as a miss
+        speculator.speculate("s", plan("get_application_steps", "pmay"))
+        if speculator.take("s", plan("get_application_steps", "ayushman")["tool_calls"][0]) is not None:
+            print("❌ Mismatched speculation was reused")
+            return False
+        speculator.finish("s")
+        
+        stats = speculator.stats()
+        if (stats["hits"], stats["misses"]) != (1, 1):
+            print(f"❌ Unexpected counters: {stats}")
+            return False
+        metrics = speculator.render()
+        if "niva_speculation_hits_total 1" not in metrics or "niva_speculation_hit_rate 0.5000" not in metrics:
+            print(f"❌ Hit rate missing from metrics:\n{metrics}")
+            return False
+        print(f"  {stats}")
+        print("✅ Speculation working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Speculation testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_single_flight():
+    """Test that identical concurrent calls share one computation"""
+    print("\n🔍 Testing single-flight coalescing...")
+    try:
+        import asyncio
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from src.single_flight import SingleFlight
+        
+        flight = SingleFlight("test")
+        runs = []
+        def work():
+            runs.append(1)
+            time.sleep(0.2)
+            return "answer"
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: flight.do("pm kisan", work), range(8)))
+        if results != ["answer"] * 8 or len(runs) != 1:
+            print(f"❌ {len(runs)} computations for 8 identical calls")
+            return False
+        
+        async def awork():
+            runs.append(1)
+            await asyncio.sleep(0.2)
+            return "async answer"
+        
+        async def spike():
+            leader = asyncio.create_task(flight.ado("pmay", awork))
+            await asyncio.sleep(0.05)
+            followers = [asyncio.create_task(flight.ado("pmay", awork)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            leader.cancel()  # a follower takes over
+            return await asyncio.gather(*followers)
+        
+        results = asyncio.run(spike())
+        if results != ["async answer"] * 5 or len(runs) != 3:
+            print(f"❌ Unexpected async results {results} ({len(runs)} computations)")
+            return False
+        
+        stats = flight.stats()
+        print(f"  {stats}")
+        if stats["in_flight"] != 0 or stats["coalesced"] < 7:
+            print("❌ Unexpected counters")
+            return False
+        from src import single_flight
+        metrics = single_flight.render()
+        if f'niva_single_flight_coalesced_total{{flight="test"}} {stats["coalesced"]}' not in metrics or \
+                f'niva_single_flight_leaders_total{{flight="test"}} {stats["executions"]}' not in metrics:
+            print(f"❌ Counters missing from metrics:\n{metrics}")
+            return False
+        print("✅ Single-flight working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Single-flight testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_tracing():
+    """Test per-stage spans, intent labels and percentiles"""
+    print("\n🔍 Testing tracing...")
+    try:
+        import time
+        from src.tracing import Tracer, PrometheusExporter
+        
+        if Tracer().span("planner").__enter__() is not None:
+            print("❌ Disabled tracer should hand back a no-op span")
+            return False
+        
+        prometheus = PrometheusExporter()
+        tracer = Tracer([prometheus])
+        for _ in range(20):
+            with tracer.turn():
+                with tracer.span("planner"):
+                    tracer.annotate(intent="apply")
+                with tracer.span("executor"):
+                    with tracer.span("tool.get_application_steps"):
+                        time.sleep(0.002)
+        
+        percentiles = tracer.percentiles()
+        stages = set(percentiles)
+        expected = {"turn/apply", "planner/apply", "executor/apply", "tool.get_application_steps/apply"}
+        if stages != expected:
+            print(f"❌ Unexpected stages: {stages}")
+            return False
+        tool = percentiles["tool.get_application_steps/apply"]
+        print(f"  tool: {tool}")
+        if tool["count"] != 20 or not (0.001 <= tool["p50"] <= tool["p95"] <= tool["p99"]):
+            print("❌ Unexpected percentiles")
+            return False
+        if 'niva_stage_seconds_count{stage="turn",intent="apply"} 20' not in prometheus.render():
+            print("❌ Prometheus text missing the turn histogram")
+            return False
+        print("✅ Tracing working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Tracing testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_profiling():
+    """Test sampled request profiles and keeping only the slowest"""
+    print("\n🔍 Testing profiling...")
+    try:
+        import json
+        import os
+        import tempfile
+        import time
+        from src.profiling import Profiler, ProfileStore
+        
+        def busy_stage(seconds):
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                sum(i * i for i in range(1000))
+        
+        if Profiler(rate=0.0).request("off", flag=True).__enter__() is not None:
+            print("❌ Flags must not start a profile unless allowed")
+            return False
+        
+        directory = tempfile.mkdtemp()
+        profiler = Profiler(rate=1.0, store=ProfileStore(directory, keep=2), interval=0.002)
+        for label, seconds in [("fast", 0.05), ("slowest", 0.2), ("medium", 0.1)]:
+            with profiler.request(label):
+                busy_stage(seconds)
+        
+        kept = profiler.store.slowest()
+        if [os.path.basename(p).split("-")[2] for _, p in kept] != ["slowest", "medium"] or len(os.listdir(directory)) != 2:
+            print(f"❌ Unexpected kept profiles: {kept}")
+            return False
+        with open(kept[0][1], "r", encoding="utf-8") as f:
+            frames = [frame["name"] for frame in json.load(f)["shared"]["frames"]]
+        if not any(name.startswith("busy_stage") for name in frames):
+            print("❌ Profiled function missing from the speedscope frames")
+            return False
+        print(f"  kept: {[os.path.basename(p) for _, p in kept]}")
+        print("✅ Profiling working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Profiling testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_memory():
+    """Test per-component memory accounting and budget enforcement"""
+    print("\n🔍 Testing memory budgets...")
+    try:
+        from src.conversation_store import ConversationStore
+        from src.memory import MemoryGovernor, process_rss
+        from src.response_cache import ResponseCache
+        
+        class FakeSTT:
+            local_model = object()
+            
+            def unload_local_model(self):
+                unloaded, self.local_model = self.local_model is not None, None
+                return unloaded
+        
+        cache = ResponseCache()
+        for i in range(50):
+            cache.put(("all", i), "answer " * 100)
+        conversations = ConversationStore()
+        for i in range(5):
+            conversations.add_turn(f"s{i}", "question", "answer " * 50)
+        stt = FakeSTT()
+        
+        governor = MemoryGovernor(component_budgets={"response_cache": 1024})
+        governor.register("response_cache", cache.memory_bytes, lambda: "cleared" if len(cache) and not cache.clear() else None)
+        governor.register("conversations", conversations.memory_bytes,
+                          lambda: f"evicted {conversations.evict_idle(0)}" if len(conversations) else None)
+        governor.register("asr_fallback", lambda: 0, lambda: "unloaded" if stt.unload_local_model() else None)
+        
+        sizes = governor.sizes()
+        if process_rss() <= 0 or sizes["response_cache"] < 50 * 700 or sizes["conversations"] <= 0:
+            print(f"❌ Unexpected sizes: {sizes}, rss={process_rss()}")
+            return False
+        if governor.enforce() != ["response_cache"] or len(cache) or len(conversations) != 5:
+            print("❌ A component budget must only shrink that component")
+            return False
+        
+        governor.budget_bytes = 1  # always over: every component is shrunk, in order
+        shrunk = governor.enforce()
+        if shrunk != ["conversations", "asr_fallback"] or len(conversations) or stt.local_model is not None:
+            print(f"❌ Unexpected shrink order: {shrunk}")
+            return False
+        if 'niva_memory_shrinks_total{component="asr_fallback"} 1' not in governor.render():
+            print("❌ Missing memory gauges")
+            return False
+        
+        # Without a backend, evicting would lose the transcripts: watch() only accounts for them
+        from src.memory import watch
+        conversations.add_turn("kept", "question", "answer")
+        watched = watch(MemoryGovernor(budget_bytes=1), conversations=conversations, idle_seconds=0)
+        watched.stop()
+        if watched.enforce() or conversations.history("kept") == [] or "conversations" not in watched.sizes():
+            print("❌ Memory-only conversations must not be evicted")
+            return False
+        print(f"  sizes: {sizes}, shrinks: {dict(governor.shrinks)}")
+        print("✅ Memory budgets working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Memory budget testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_serving():
+    """Test sticky worker selection in the multi-process front"""
+    print("\n🔍 Testing multi-worker routing...")
+    try:
+        from starlette.requests import Request
+        from src.serving import Front
+        
+        def request(cookie=None, query=""):
+            headers = [(b"cookie", f"niva_worker={cookie}".encode())] if cookie is not None else []
+            return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": query.encode()})
+        
+        front = Front([f"/tmp/niva-test-{i}.sock" for i in range(3)])
+        if front.pick(request()) is not None:
+            print("❌ No worker may be picked before any is ready")
+            return False
+        for worker in front.workers:
+            worker.ready = True
+        front.workers[0].inflight = 5
+        
+        if front.pick(request(cookie=2)).index != 2:
+            print("❌ The worker cookie must be sticky")
+            return False
+        by_session = front.pick(request(query="session_hash=abc123")).index
+        if any(front.pick(request(query="session_hash=abc123")).index != by_session for _ in range(5)):
+            print("❌ A Gradio session must stay on one worker")
+            return False
+        if front.pick(request(), b'{"session_hash": "abc123", "data": []}').index != by_session:
+            print("❌ Queue joins must route by the session_hash in the body")
+            return False
+        if front.pick(request()).index == 0:
+            print("❌ New sessions should go to the least busy worker")
+            return False
+        front.workers[2].ready = False
+        if front.pick(request(cookie=2)).index == 2:
+            print("❌ A session on an unready worker must move")
+            return False
+        print(f"  session abc123 -> worker {by_session}")
+        print("✅ Multi-worker routing working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Multi-worker routing testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_api():
+    """Test the headless API: chat, streamed voice, batched search, backpressure"""
+    print("\n🔍 Testing headless API...")
+    try:
+        import glob
+        import io
+        import json
+        import tempfile
+        import numpy as np
+        from scipy.io import wavfile
+        from starlette.testclient import TestClient
+        from src.api import Admission, NivaAPI, create_app
+        from src.results import SchemeListResult, SchemeMatch
+        
+        class FakeAgent:
+            async def aprocess(self, text, priority=None, session_id="default"):
+                return {"response": f"answer to {text}", "language": "en", "intent": "search"}
+            
+            async def aprocess_stream(self, text, priority=None, session_id="default"):
+                for token in ["PM Kisan gives ", "6000 a year. ", "Apply online."]:
+                    yield {"type": "token", "content": token}
+                yield {"type": "done", "response": "PM Kisan gives 6000 a year. Apply online.", "language": "en", "intent": "search"}
+        
+        class FakeSTT:
+            async def atranscribe_numpy(self, audio, sample_rate=16000, language="te"):
+                return {"text": "tell me about pm kisan", "language": language}
+        
+        class FakeTTS:
+            async def asynthesize(self, text, path, language=None):
+                with open(path, "wb") as f:
+                    f.write(f"[{text}]".encode())
+                return path
+        
+        class FakeVectorStore:
+            calls = 0
+            
+            def search_many(self, queries, language="te", n_results=3):
+                FakeVectorStore.calls += 1
+                return [SchemeListResult("vector", language, [SchemeMatch("pm_kisan", 0.9)] * n_results, q) for q in queries]
+        
+        api = NivaAPI(agent=FakeAgent(), stt=FakeSTT(), tts=FakeTTS(), vector_store=FakeVectorStore())
+        client = TestClient(create_app(api))
+        
+        reply = client.post("/v1/chat", json={"message": "hello", "session_id": "s1"}).json()
+        if reply["response"] != "answer to hello" or reply["session_id"] != "s1":
+            print(f"❌ Unexpected chat reply: {reply}")
+            return False
+        events = [json.loads(line) for line in client.post("/v1/chat", json={"message": "hi", "stream": True}).text.splitlines()]
+        if [e["type"] for e in events] != ["token", "token", "token", "done"]:
+            print(f"❌ Unexpected chat stream: {events}")
+            return False
+        
+        bad_requests = [("/v1/chat", b"{not json"), ("/v1/chat", b"[1, 2]"), ("/v1/chat", b'{"message": {"text": "hi"}}'),
+                        ("/v1/schemes/search", b"{not json"), ("/v1/schemes/search", b'"pm kisan"'),
+                        ("/v1/schemes/search", b'{"queries": "pm kisan"}'), ("/v1/schemes/search", '{"query": "x", "n": "²"}'.encode())]
+        for path, body in bad_requests:
+            status = client.post(path, content=body, headers={"content-type": "application/json"}).status_code
+            if status != 400:
+                print(f"❌ {path} answered {status} to {body!r}, expected 400")
+                return False
+        if client.post("/v1/voice", content=b"RIFF", headers={"content-length": "lots"}).status_code != 400:
+            print("❌ A non-numeric Content-Length must be rejected")
+            return False
+        
+        results = client.post("/v1/schemes/search", json={"queries": [f"farmer {i}" for i in range(8)], "n": 2}).json()["results"]
+        if len(results) != 8 or FakeVectorStore.calls != 1 or len(results[0]["results"]) != 2:
+            print(f"❌ Searches were not batched: {FakeVectorStore.calls} calls")
+            return False
+        
+        wav = io.BytesIO()
+        wavfile.write(wav, 8000, (np.sin(np.arange(8000) / 5) * 8000).astype(np.int16))
+        audio_dirs = set(glob.glob(os.path.join(tempfile.gettempdir(), "niva_tts_*")))
+        voice = client.post("/v1/voice?language=en", content=wav.getvalue())
+        if voice.headers["content-type"] != "audio/mpeg" or voice.content != b"[PM Kisan gives 6000 a year.][Apply online.]":
+            print(f"❌ Unexpected voice stream: {voice.status_code} {voice.content[:80]}")
+            return False
+        if set(glob.glob(os.path.join(tempfile.gettempdir(), "niva_tts_*"))) - audio_dirs:
+            print("❌ Voice turn left its audio directory behind")
+            return False
+        if client.post("/v1/voice", content=b"not a wav").status_code != 415:
+            print("❌ Non-WAV audio must be rejected")
+            return False
+        
+        # A provider failing mid-answer: the streamed part is dropped, the final answer is spoken
+        class FailoverAgent(FakeAgent):
+            async def aprocess_stream(self, text, priority=None, session_id="default"):
+                yield {"type": "token", "content": "PM Kisan gi"}
+                yield {"type": "reset"}
+                yield {"type": "done", "response": "PM Kisan gives 6000 a year.", "language": "en", "intent": "search"}
+        
+        api.agent = FailoverAgent()
+        voice = client.post("/v1/voice?language=en", content=wav.getvalue())
+        if voice.content != b"[PM Kisan gives 6000 a year.]":
+            print(f"❌ Audio after a mid-stream failover: {voice.content[:80]}")
+            return False
+        api.agent = FakeAgent()
+        
+        api.turns = Admission(limit=0, queue=0)
+        if client.post("/v1/chat", json={"message": "hello"}).status_code != 503:
+            print("❌ A full queue must answer 503")
+            return False
+        print(f"  search batches: {api.search_batcher.stats()}")
+        print("✅ Headless API working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Headless API testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_duplex():
+    """Test full-duplex voice: codecs, jitter buffer, end-pointing, barge-in, WebSocket"""
+    print("\n🔍 Testing full-duplex voice...")
+    try:
+        import asyncio
+        import base64
+        import json
+        import numpy as np
+        from starlette.testclient import TestClient
+        from src.api import NivaAPI, create_app
+        from src.duplex import DuplexSession, JitterBuffer, mulaw_decode, mulaw_encode
+        
+        samples = np.linspace(-0.9, 0.9, 400)
+        if np.abs(mulaw_decode(mulaw_encode(samples)) - samples).max() > 0.03:
+            print("❌ μ-law round trip is too lossy")
+            return False
+        jitter = JitterBuffer(depth=2)
+        played = jitter.push(0, b"a") + jitter.push(2, b"c") + jitter.push(1, b"b") + jitter.push(4, b"e") + \
+            jitter.push(5, b"f") + jitter.push(6, b"g")
+        if played != [b"a", b"b", b"c", None, b"e", b"f", b"g"]:
+            print(f"❌ Jitter buffer should reorder and skip the lost frame: {played}")
+            return False
+        jitter = JitterBuffer(depth=3)
+        if jitter.push(5, b"a") + jitter.push(7, b"c") + jitter.push(8, b"d") != [b"a"] or \
+                jitter.push(9, b"e") != [None, b"c", b"d", b"e"]:
+            print("❌ A lost frame must be given up once `depth` later frames have arrived")
+            return False
+        # A huge jump must not pad millions of silent frames; a 16-bit wraparound must not go late
+        jitter = JitterBuffer(depth=3)
+        jumped = jitter.push(0, b"a") + jitter.push(2_000_000, b"x") + jitter.push(2_000_001, b"y")
+        if jumped != [b"a", b"x", b"y"] or jitter.lost or jitter.resyncs != 1:
+            print(f"❌ A large seq jump should resync: {jumped}")
+            return False
+        jitter = JitterBuffer(depth=3)
+        wrapped = jitter.push(65534, b"a") + jitter.push(65535, b"b") + jitter.push(0, b"c") + jitter.push(1, b"d")
+        if wrapped != [b"a", b"b", b"c", b"d"] or jitter.late:
+            print(f"❌ Sequence wraparound should resync, not count frames late: {wrapped}")
+            return False
+        for bad in ("7", 1.5, True):
+            try:
+                jitter.push(bad, b"z")
+                print(f"❌ A non-integer seq should be rejected: {bad!r}")
+                return False
+            except ValueError:
+                pass
+        
+        class FakeAgent:
+            async def aprocess_stream(self, text, priority=None, session_id="default"):
+                for token in ["PM Kisan gives 6000 a year. ", "Apply online."]:
+                    await asyncio.sleep(0.01)
+                    yield {"type": "token", "content": token}
+                yield {"type": "done", "response": "PM Kisan gives 6000 a year. Apply online.", "language": "en"}
+        
+        class FakeSTT:
+            async def atranscribe_numpy(self, audio, sample_rate=16000, language="te", use_fallback=True):
+                return {"text": "tell me about pm kisan"}
+        
+        class FakeTTS:
+            async def asynthesize(self, text, path, language=None):
+                with open(path, "wb") as f:
+                    f.write(text.encode())
+                return path
+        
+        t = np.arange(160) / 8000
+        tone = mulaw_encode(0.5 * np.sin(2 * np.pi * 300 * t))
+        quiet = mulaw_encode(np.zeros(160))
+        utterance = [quiet] * 20 + [tone] * 25 + [quiet] * 15
+        
+        async def call():
+            events, frames = [], []
+            
+            async def send_json(event):
+                events.append(event["type"])
+            
+            async def send_bytes(data):
+                frames.append(data)
+            
+            # Each sentence "decodes" to a second of audio, played at real time
+            session = DuplexSession(FakeAgent(), FakeSTT(), FakeTTS(), send_json, send_bytes, language="en",
+                                    endpoint_ms=200, decoder=lambda data, rate: np.full(rate, 0.1, dtype=np.float32))
+            for seq, frame in enumerate(utterance):
+                await session.receive(frame, seq)
+            while not frames:
+                await asyncio.sleep(0.01)
+            for seq, frame in enumerate([tone] * 10, start=len(utterance)):
+                await session.receive(frame, seq)
+            await asyncio.sleep(0.05)
+            sent = len(frames)
+            await asyncio.sleep(0.2)
+            await session.close()
+            return events, sent, len(frames), session.stats
+        
+        events, sent, after, stats = asyncio.run(call())
+        if events[:3] != ["speech_start", "transcript", "token"] or "barge_in" not in events or "turn_end" in events:
+            print(f"❌ Unexpected duplex events: {events}")
+            return False
+        if after != sent or sent >= 100:
+            print(f"❌ Audio kept playing after barge-in ({sent} → {after} frames)")
+            return False
+        
+        api = NivaAPI(agent=FakeAgent(), stt=FakeSTT(), tts=FakeTTS(), vector_store=None,
+                      call_options={"endpoint_ms": 200, "decoder": lambda data, rate: np.full(rate // 10, 0.1, dtype=np.float32)})
+        client = TestClient(create_app(api))
+        with client.websocket_connect("/v1/voice/stream?language=en&codec=mulaw") as ws:
+            ready = ws.receive_json()
+            for frame in utterance:
+                ws.send_bytes(frame)
+            types, audio = [], 0
+            while "turn_end" not in types:
+                message = ws.receive()
+                if message.get("bytes"):
+                    audio += 1
+                else:
+                    types.append(json.loads(message["text"])["type"])
+            ws.send_json({"type": "hangup"})
+        if ready["rate"] != 8000 or types != ["speech_start", "transcript", "token", "token", "turn_end"] or audio != 10:
+            print(f"❌ Unexpected WebSocket call: {ready} {types} {audio} frames")
+            return False
+        
+        # Malformed frames are reported and the call stays open; a rate with no samples per frame is refused
+        with client.websocket_connect("/v1/voice/stream?language=en&codec=pcm16") as ws:
+            ws.receive_json()
+            for bad in ("not json", "[1, 2]", '{"type": "audio", "data": "@@@"}', '{"type": "audio", "data": 5}',
+                        json.dumps({"type": "audio", "data": base64.b64encode(b"odd").decode()}),
+                        json.dumps({"type": "audio", "seq": "7", "data": base64.b64encode(b"\0\0").decode()})):
+                ws.send_text(bad)
+                if ws.receive_json()["type"] != "error":
+                    print(f"❌ A malformed frame must get an error event: {bad}")
+                    return False
+            ws.send_bytes(b"\0" * 640)
+            ws.send_json({"type": "hangup"})
+        from starlette.websockets import WebSocketDisconnect
+        try:
+            with client.websocket_connect("/v1/voice/stream?language=en&codec=mulaw&rate=40") as ws:
+                ws.receive_json()
+            print("❌ A rate with no samples in a frame must be refused")
+            return False
+        except WebSocketDisconnect as e:
+            if e.code != 1008:
+                print(f"❌ Unexpected close code for a bad rate: {e.code}")
+                return False
+        
+        class BrokenAgent:
+            async def aprocess_stream(self, text, priority=None, session_id="default"):
+                raise RuntimeError("LLM down")
+                yield
+        
+        async def failing_call():
+            events = []
+            
+            async def send_json(event):
+                events.append(event)
+            
+            async def send_bytes(data):
+                pass
+            
+            session = DuplexSession(BrokenAgent(), FakeSTT(), FakeTTS(), send_json, send_bytes, language="en", endpoint_ms=200)
+            for seq, frame in enumerate(utterance):
+                await session.receive(frame, seq)
+            await session._turn_task
+            await session.close()
+            return events, session.stats
+        
+        failed, failed_stats = asyncio.run(failing_call())
+        if [e["type"] for e in failed][-2:] != ["error", "turn_end"] or "LLM down" not in failed[-1]["error"] or \
+                failed_stats["errors"] != 1:
+            print(f"❌ A failed turn must reach the caller: {failed}")
+            return False
+        print(f"  barge-in after {sent} frames, time to first audio {stats['first_audio_ms']} ms")
+        print("✅ Full-duplex voice working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Full-duplex voice testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_startup():
+    """Test lazy package imports, the import-time report and background readiness"""
+    print("\n🔍 Testing startup...")
+    try:
+        import subprocess
+        import sys
+        import time
+        from src.startup import Startup, by_package, import_times
+        
+        probe = "import sys, src; heavy = [m for m in ('langchain_core', 'chromadb', 'edge_tts', 'scipy') if m in sys.modules]; " \
+                "print(heavy, src.render.__module__)"
+        out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout.strip()
+        if out != "[] src.renderer":
+            print(f"❌ `import src` must not import the models' dependencies: {out}")
+            return False
+        
+        rows = import_times("src.catalogue")
+        if rows[-1][0] != "src.catalogue" or "src" not in by_package(rows) or any(r[0] == "site" for r in rows):
+            print(f"❌ Unexpected import-time rows: {rows[-3:]}")
+            return False
+        
+        startup = Startup()
+        startup.start(lambda: time.sleep(0.2))
+        loading = startup.status()
+        if startup.ready or not startup.wait(5) or not loading.startswith("⏳") or not startup.status().startswith("✅"):
+            print(f"❌ Background loading not reported: {loading} / {startup.status()}")
+            return False
+        for _ in range(2):
+            with startup.request():
+                time.sleep(0.01)
+        if startup.phases["first_request_latency"] < 0.01 or startup.phases["ready"] > startup.phases["first_request"]:
+            print(f"❌ Unexpected startup phases: {startup.phases}")
+            return False
+        if "niva_ready 1" not in startup.render() or "niva_first_request_seconds" not in startup.render():
+            print("❌ Missing startup gauges")
+            return False
+        
+        def broken():
+            raise RuntimeError("no model")
+        failed = Startup().start(broken)
+        if failed.wait(5) or "no model" not in failed.status():
+            print("❌ A failed load must not report ready")
+            return False
+        print(f"  phases: {startup.phases}")
+        print("✅ Startup working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Startup testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_batch():
+    """Test batch CSV scoring: parity with the tools, chunked output, batched LLM prompts"""
+    print("\n🔍 Testing batch scoring...")
+    try:
+        import os
+        import tempfile
+        import pandas as pd
+        from langchain_core.messages import AIMessage
+        from src.batch import llm_summaries, score_csv
+        from src.catalogue import SCHEMES
+        from src.tools import check_eligibility
+        
+        source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures", "citizens.csv")
+        output = os.path.join(tempfile.mkdtemp(), "scored.csv")
+        stats = score_csv(source, output, chunk_size=3, workers=2)
+        scored = pd.read_csv(output, keep_default_na=False)
+        citizens = pd.read_csv(source, keep_default_na=False)
+        if stats["chunks"] != 4 or len(scored) != len(citizens) or stats["llm_calls"]:
+            print(f"❌ Unexpected batch stats: {stats}")
+            return False
+        
+        for row, out in zip(citizens.itertuples(), scored.itertuples()):
+            if row.age == "" or row.annual_income == "":
+                if out.eligible_count != 0 or not out.error:
+                    print(f"❌ Row {row.name} without age/income must be flagged")
+                    return False
+                continue
+            expected = [s["id"] for s in SCHEMES if check_eligibility.invoke({
+                "scheme_name": s["id"], "age": int(row.age), "annual_income": int(row.annual_income),
+                "occupation": row.occupation, "category": row.category or None, "language": "en"}).eligible]
+            if out.eligible_schemes.split(";") != expected and not (out.eligible_schemes == "" and not expected):
+                print(f"❌ {row.name}: batch says {out.eligible_schemes}, check_eligibility says {expected}")
+                return False
+            if not out.summary_te or not out.summary_en.startswith(("Eligible for", "Not eligible")):
+                print(f"❌ Missing summaries for {row.name}")
+                return False
+        
+        if scored.benefit_pmkisan[0] != 6000 or scored.benefit_total[0] != 6000 or scored.cover_total[0] <= 0:
+            print(f"❌ Unexpected benefit columns: {scored.iloc[0].to_dict()}")
+            return False
+        
+        class FakeLLM:
+            prompts = []
+            
+            def invoke(self, messages, max_tokens, priority=None):
+                FakeLLM.prompts.append(messages[-1].content)
+                lines = messages[-1].content.splitlines()
+                return AIMessage(content="\n".join(f"{i}. rewritten" for i in range(1, len(lines))))
+        
+        rewritten = llm_summaries([f"summary {i}" for i in range(7)], "en", FakeLLM(), batch_size=5)
+        if len(FakeLLM.prompts) != 2 or rewritten != ["rewritten"] * 4 + ["summary 4", "rewritten", "summary 6"]:
+            print(f"❌ LLM summaries not batched as expected: {rewritten}")
+            return False
+        print(f"  {stats['rows']} rows in {stats['chunks']} chunks, {stats['eligible_rows']} eligible")
+        print("✅ Batch scoring working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Batch scoring testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_benefits():
+    """Test catalogue-declared benefit formulas, single and vectorized"""
+    print("\n🔍 Testing benefit formulas...")
+    try:
+        import numpy as np
+        from src.benefits import BenefitEngine
+        from src.tools import calculate_benefits
+        
+        result = calculate_benefits.invoke({"scheme_name": "PM Kisan", "months": 6, "language": "en"})
+        if (result.formula, result.amount, result.total, result.installments) != ("annual", 6000, 3000, 3):
+            print(f"❌ PM Kisan should be ₹6,000 a year in 3 installments: {result}")
+            return False
+        if calculate_benefits.invoke({"scheme_name": "Ujjwala", "language": "en"}).formula != "generic":
+            print("❌ A scheme without a formula should stay generic")
+            return False
+        
+        engine = BenefitEngine([
+            {"id": "seeds", "benefit": {"kind": "annual", "per_acre": 4000, "cap": 20000}},
+            {"id": "ration", "benefit": {"kind": "one_time", "fixed": 500, "per_family_member": 1000}},
+            {"id": "text_only"},
+        ])
+        land, family = np.array([0, 2, 10]), np.array([1, 4, 6])
+        totals = engine.totals(land, family, months=6)
+        expected = [[engine.evaluate(sid, int(f), float(a), 6)[2] if sid != "text_only" else 0
+                     for sid in engine.ids] for a, f in zip(land, family)]
+        if totals.tolist() != expected or totals[2].tolist() != [10000, 6500, 0]:
+            print(f"❌ Vectorized totals don't match: {totals.tolist()} vs {expected}")
+            return False
+        sweep = engine.totals(np.arange(0, 11)[:, None], np.arange(1, 9)[None, :])
+        if sweep.shape != (11, 8, 3) or sweep[5, 0, 0] != 20000 or sweep[0, 7, 1] != 8500:
+            print(f"❌ Unexpected parameter sweep: {sweep.shape}")
+            return False
+        try:
+            BenefitEngine([{"id": "bad", "benefit": {"kind": "annual", "per_hectare": 10}}])
+            print("❌ An unknown formula term must be rejected")
+            return False
+        except ValueError:
+            pass
+        print(f"  PM Kisan: ₹{result.total:,.0f} for 6 months; sweep of {sweep.size} amounts")
+        print("✅ Benefit formulas working correctly")
+        return True
+    except Exception as e:
+        print(f"❌ Benefit formula testing failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_agent_basic():
     """Test basic agent functionality"""
     print("\n🔍 Testing agent (basic)...")
@@ -230,6 +1416,23 @@ def test_tts_imports():
         from src.tts import EdgeTTS
         
         tts = EdgeTTS()
+        
+        from src.tts import SentenceTTSStream
+        
+        class FakeTTS:
+            def synthesize(self, text, path, language=None):
+                with open(path, "w") as f:
+                    f.write(text)
+                return path
+        
+        with SentenceTTSStream(FakeTTS()) as speech:
+            speech.feed("PM Kisan gives 6000 a year. Apply")
+            speech.feed(" online at the portal.")
+            speech.close()
+            parts = [open(path).read() for path in speech.drain()]
+        if parts != ["PM Kisan gives 6000 a year.", "Apply online at the portal."] or os.path.exists(speech.output_dir):
+            print(f"❌ Sentence stream failed or left its files behind: {parts}")
+            return False
         print("✅ TTS module loaded successfully")
         return True
     except Exception as e:
@@ -261,6 +1464,26 @@ def run_all_tests():
         ("Schemes Database", test_schemes_database),
         ("Language Detection", test_language_detection),
         ("LangChain Tools", test_tools),
+        ("Result Renderer", test_renderer),
+        ("Response Cache", test_response_cache),
+        ("Keyword Extractor", test_extractor),
+        ("Intent Classifier", test_intent_classifier),
+        ("Prompt Builder", test_prompt_builder),
+        ("Groq Scheduler", test_groq_scheduler),
+        ("LLM Router", test_llm_router),
+        ("Conversation Store", test_conversation_store),
+        ("Session Checkpoints", test_checkpointer),
+        ("Speculation", test_speculation),
+        ("Single-Flight", test_single_flight),
+        ("Tracing", test_tracing),
+        ("Profiling", test_profiling),
+        ("Memory", test_memory),
+        ("Multi-Worker Routing", test_serving),
+        ("Headless API", test_api),
+        ("Full-Duplex Voice", test_duplex),
+        ("Startup", test_startup),
+        ("Batch Scoring", test_batch),
+        ("Benefit Formulas", test_benefits),
         ("Agent Basic", test_agent_basic),
         ("Agent Eligibility", test_agent_eligibility),
         ("TTS Module", test_tts_imports),